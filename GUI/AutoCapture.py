@@ -0,0 +1,106 @@
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+
+class StabilityDetector:
+    """
+    Detects when the scene has settled after a change, to trigger captures automatically.
+
+    Each frame is reduced to a tiny grayscale thumbnail, and the mean absolute difference to the
+    previous thumbnail measures motion. A difference above change_threshold arms the detector.
+    Once armed, the scene must then stay within still_threshold of a reference thumbnail
+    (taken when it became still) for stable_time seconds. Comparing against the reference as
+    well as the previous frame also catches slow drift. After a trigger, the detector is disarmed
+    until the next change, and no trigger happens within cooldown seconds of the last one.
+
+    Attributes:
+        size (Tuple[int, int]): The (width, height) of the thumbnails.
+        stable_time (float): Seconds the scene must be still before a trigger.
+        cooldown (float): Minimum seconds between triggers.
+        still_threshold (float): Maximum mean difference, in gray levels, of a still scene.
+        change_threshold (float): Minimum mean difference, in gray levels, between consecutive frames
+            that counts as a change.
+        armed (bool): Whether a change was seen since the last trigger.
+        motion (float): The mean difference of the last frame to the previous one.
+
+    Methods:
+        update(frame, timestamp): Feeds a frame and returns whether to capture now.
+        reset(): Forgets the previous frames and disarms the detector.
+    """
+    def __init__(self, size: Tuple[int, int]=(64, 36), stable_time: float=1.5, cooldown: float=3.0,
+                 still_threshold: float=1.5, change_threshold: float=6.0):
+        self.size = size
+        self.stable_time = stable_time
+        self.cooldown = cooldown
+        self.still_threshold = still_threshold
+        self.change_threshold = change_threshold
+        width, height = size
+        self._small = np.empty((height, width, 4), dtype=np.uint8)
+        self._gray = np.empty((height, width), dtype=np.uint8)
+        self._previous = np.empty((height, width), dtype=np.uint8)
+        self._reference = np.empty((height, width), dtype=np.uint8)
+        self._diff = np.empty((height, width), dtype=np.uint8)
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the previous frames and disarms the detector.
+        """
+        self.armed = False
+        self.motion = 0.0
+        self._has_previous = False
+        self._stable_since: Optional[float] = None
+        self._last_trigger = -np.inf
+
+    def _difference(self, a: np.ndarray, b: np.ndarray) -> float:
+        """
+        Returns the mean absolute difference of two thumbnails, in gray levels.
+        """
+        cv2.absdiff(a, b, dst=self._diff)
+        return cv2.mean(self._diff)[0]
+
+    def update(self, frame: np.ndarray, timestamp: float) -> bool:
+        """
+        Feeds a frame and returns whether the scene has just become stable after a change.
+
+        Args:
+            frame (np.ndarray): A BGRA image at any resolution.
+            timestamp (float): The frame time in seconds.
+        Returns:
+            bool: True if a capture should be triggered.
+        """
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGRA2GRAY, dst=self._gray)
+        trigger = self._has_previous and self._check(timestamp)
+        self._has_previous = True
+        self._gray, self._previous = self._previous, self._gray
+        return trigger
+
+    def _check(self, timestamp: float) -> bool:
+        """
+        Updates the stability state with the current thumbnail.
+        """
+        self.motion = self._difference(self._gray, self._previous)
+        if self.motion >= self.change_threshold:
+            self.armed = True
+            self._stable_since = None
+            return False
+        if self.motion > self.still_threshold:
+            self._stable_since = None
+            return False
+        drift = None if self._stable_since is None else self._difference(self._gray, self._reference)
+        if drift is None or drift > self.still_threshold:
+            # A slow change never exceeds change_threshold between frames, but does against the reference
+            if drift is not None and drift >= self.change_threshold:
+                self.armed = True
+            self._stable_since = timestamp
+            np.copyto(self._reference, self._gray)
+            return False
+
+        if self.armed and timestamp - self._stable_since >= self.stable_time \
+                and timestamp - self._last_trigger >= self.cooldown:
+            self.armed = False
+            self._last_trigger = timestamp
+            return True
+        return False
@@ -0,0 +1,142 @@
+import argparse
+import multiprocessing
+import numpy as np
+import threading
+import time
+from CameraProcess import CameraProcess, SyntheticCamera, camera_main
+from functools import partial
+from SharedFrames import FrameRing, SharedFramePool, frame_layout
+from typing import Callable, List, Tuple
+
+
+def gui_work(seconds: float):
+    """
+    Simulates the GUI's share of a frame: pure Python work that holds the GIL throughout.
+    """
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def run_single(factory: Callable[[], SyntheticCamera], seconds: float, work: float) -> Tuple[List[float], int]:
+    """
+    Grabs, retrieves and does the GUI work in one loop, as the GUI does without a camera process.
+
+    Returns:
+        Tuple[List[float], int]: The latency of each consumed frame in ms, and the number of ticks.
+    """
+    source = factory()
+    info = source.open({})
+    layout = frame_layout(info["width"], info["height"], info["display_width"], info["display_height"])
+    arrays = {name: np.empty(shape, dtype=dtype) for name, (shape, dtype) in layout.items()}
+    display_size = (info["display_width"], info["display_height"])
+    latencies = []
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        source.grab()
+        source.retrieve(arrays, display_size, False)
+        latencies.append((time.perf_counter_ns() - source.timestamp) / 1e6)
+        gui_work(work)
+    source.close()
+    return latencies, len(latencies)
+
+
+def consume(pool: SharedFramePool, seconds: float, work: float, interval: float) -> Tuple[List[float], int]:
+    """
+    Takes the latest frame from a ring on a timer, as the GUI does with a camera process.
+
+    Returns:
+        Tuple[List[float], int]: The latency of each consumed frame in ms, and the number of ticks.
+    """
+    latencies = []
+    ticks = 0
+    shown = None
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        ticks += 1
+        with pool.claim() as frame_set:
+            if frame_set is not None and frame_set.timestamp.get_nanoseconds() != shown:
+                shown = frame_set.timestamp.get_nanoseconds()
+                latencies.append((time.perf_counter_ns() - shown) / 1e6)
+                gui_work(work)
+                continue
+        time.sleep(interval)
+    return latencies, ticks
+
+
+def run_thread(factory: Callable[[], SyntheticCamera], seconds: float, work: float, interval: float,
+               slots: int) -> Tuple[List[float], int]:
+    """
+    Runs camera_main on a thread of this process, writing into a ring read by the main thread.
+    """
+    conn, child_conn = multiprocessing.Pipe()
+    lock = threading.Lock()
+    thread = threading.Thread(target=camera_main, args=(factory, {}, child_conn, lock), daemon=True)
+    thread.start()
+    kind, info = conn.recv()
+    ring = FrameRing(frame_layout(info["width"], info["height"], info["display_width"], info["display_height"]),
+                     slots, lock)
+    conn.send(("ring", (ring.name, slots)))
+    pool = SharedFramePool(ring)
+    try:
+        return consume(pool, seconds, work, interval)
+    finally:
+        conn.send(("stop", None))
+        thread.join()
+        pool.close()
+
+
+def run_process(factory: Callable[[], SyntheticCamera], seconds: float, work: float, interval: float,
+                slots: int) -> Tuple[List[float], int]:
+    """
+    Runs the camera in a CameraProcess, as the GUI does with --camera-process.
+    """
+    camera_process = CameraProcess(factory, {}, slots=slots)
+    pool = SharedFramePool(camera_process.start())
+    try:
+        return consume(pool, seconds, work, interval)
+    finally:
+        camera_process.stop()
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare frame latency with and without a camera process, "
+                                                 "using a synthetic camera.")
+    parser.add_argument("--mode", choices=["single", "thread", "process", "all"], default="all",
+                        help="Grab in the GUI loop, on a thread, in a separate process, or compare all three")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each run")
+    parser.add_argument("--width", type=int, default=2208, help="Image width")
+    parser.add_argument("--height", type=int, default=1242, help="Image height")
+    parser.add_argument("--fps", type=float, default=15.0, help="Camera frame rate")
+    parser.add_argument("--gui-work-ms", type=float, default=20.0,
+                        help="GIL-holding work done by the GUI for each frame it shows")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="GUI timer interval when no frame is new")
+    parser.add_argument("--slots", type=int, default=6, help="Ring slots")
+    args = parser.parse_args()
+
+    factory = partial(SyntheticCamera, args.width, args.height, args.fps)
+    work = args.gui_work_ms / 1000
+    interval = args.interval_ms / 1000
+    runs = {
+        "single": lambda: run_single(factory, args.seconds, work),
+        "thread": lambda: run_thread(factory, args.seconds, work, interval, args.slots),
+        "process": lambda: run_process(factory, args.seconds, work, interval, args.slots),
+    }
+    modes = list(runs) if args.mode == "all" else [args.mode]
+    expected = int(args.seconds * args.fps)
+    print(f"{args.width} x {args.height} at {args.fps:g} fps, {args.gui_work_ms:g} ms GUI work per frame, "
+          f"{args.seconds:g} s per run")
+    for mode in modes:
+        latencies, ticks = runs[mode]()
+        if not latencies:
+            print(f"{mode:>8}: no frames consumed")
+            continue
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{mode:>8}: latency p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, max {max(latencies):.1f} ms; "
+              f"{len(latencies)} of ~{expected} frames shown, {max(expected - len(latencies), 0)} missed; "
+              f"{ticks / args.seconds:.0f} GUI ticks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import multiprocessing
+import numpy as np
+import time
+from SharedFrames import FrameRing, frame_layout
+from typing import Callable, Dict, Optional, Tuple
+
+
+class SyntheticCamera:
+    """
+    A stand-in for the ZED camera, for benchmarks without a camera.
+
+    Frames become available at a fixed rate, independently of the reader like a real sensor.
+    grab blocks until the next frame is due and skips frames that were missed, and retrieve
+    copies prepared images into the slot, standing in for the SDK's retrieve copies.
+
+    Implements the camera source interface used by camera_main:
+        open(settings): Opens the camera and returns its info.
+        grab(): Waits for the next frame; returns whether one was grabbed.
+        timestamp: The image timestamp of the last grab, in ns.
+        retrieve(arrays, display_size, confidence): Writes the last grab into slot arrays.
+        set_video_settings(settings), set_runtime_params(params): Apply settings.
+        close(): Closes the camera.
+    """
+    def __init__(self, width: int=1280, height: int=720, fps: float=30.0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.video_settings: Dict[str, float] = {}
+        self.runtime_params: Dict[str, float] = {}
+        self.timestamp = 0
+        self._start = 0
+        self._frame = -1
+        self._sources: Dict[str, np.ndarray] = {}
+
+    def open(self, settings: dict) -> dict:
+        self.video_settings = {name: 0 for name in settings.get("video_settings", [])}
+        self.runtime_params = dict(settings.get("runtime", {}))
+        layout = frame_layout(self.width, self.height, self.width // 2, self.height // 2)
+        rng = np.random.default_rng(0)
+        self._sources = {name: rng.integers(0, 255, shape).astype(dtype) for name, (shape, dtype) in layout.items()}
+        self._start = time.perf_counter_ns()
+        self._frame = -1
+        return {"width": self.width, "height": self.height, "fps": self.fps,
+                "display_width": self.width // 2, "display_height": self.height // 2,
+                "video_settings": dict(self.video_settings)}
+
+    def grab(self) -> bool:
+        period = 1e9 / self.fps
+        frame = max(self._frame + 1, int((time.perf_counter_ns() - self._start) // period))
+        due = self._start + int(frame * period)
+        delay = due - time.perf_counter_ns()
+        if delay > 0:
+            time.sleep(delay / 1e9)
+        self._frame = frame
+        self.timestamp = due
+        return True
+
+    def retrieve(self, arrays: Dict[str, np.ndarray], display_size: Tuple[int, int], confidence: bool):
+        for name, array in arrays.items():
+            if name == "confidence" and not confidence:
+                continue
+            source = self._sources[name]
+            np.copyto(array, source[:array.shape[0], :array.shape[1]])
+
+    def set_video_settings(self, settings: Dict[str, float]):
+        self.video_settings.update(settings)
+
+    def set_runtime_params(self, params: dict):
+        self.runtime_params.update(params)
+
+    def close(self):
+        self._sources = {}
+
+
+def _attach_ring(conn, info: dict, lock) -> FrameRing:
+    """
+    Waits for the GUI to create the ring for the camera info, and attaches to it.
+    """
+    while True:
+        kind, payload = conn.recv()
+        if kind == "ring":
+            name, slots = payload
+            layout = frame_layout(info["width"], info["height"], info["display_width"], info["display_height"])
+            return FrameRing(layout, slots, lock, name=name)
+        if kind == "stop":
+            raise SystemExit(0)
+
+
+def camera_main(source_factory: Callable[[], object], settings: dict, conn, lock):
+    """
+    The main loop of the camera process. Owns the camera, grabs and retrieves into the ring.
+
+    Control messages from the GUI are (kind, payload) tuples, handled between grabs:
+        - ("video", {name: value}): Applies video settings, by sl.VIDEO_SETTINGS name.
+        - ("runtime", {name: value}): Applies runtime parameters.
+        - ("display_size", (width, height)): Retrieves the display products at a new size.
+        - ("confidence", bool): Retrieves the confidence map with each frame or not.
+        - ("reopen", settings): Reopens the camera, e.g. with a new resolution, and reattaches.
+        - ("stop", None): Closes the camera and exits.
+
+    The process replies to open and reopen with ("info", info) and waits for ("ring", (name, slots)),
+    or with ("error", message) if the camera failed to open.
+
+    Args:
+        source_factory (Callable): Creates the camera source, e.g. ZEDSource or SyntheticCamera.
+            It must be picklable, as it is passed to the new process.
+        settings (dict): The settings passed to the source's open.
+        conn (Connection): The control channel to the GUI.
+        lock: The lock shared with the ring's readers.
+    """
+    source = source_factory()
+    try:
+        info = source.open(settings)
+    except RuntimeError as e:
+        conn.send(("error", str(e)))
+        return
+    conn.send(("info", info))
+    ring = _attach_ring(conn, info, lock)
+    display_size = (info["display_width"], info["display_height"])
+    confidence = False
+    running = True
+    while running:
+        while conn.poll():
+            kind, payload = conn.recv()
+            if kind == "stop":
+                running = False
+                break
+            if kind == "video":
+                source.set_video_settings(payload)
+            elif kind == "runtime":
+                source.set_runtime_params(payload)
+            elif kind == "display_size":
+                # The slot arrays hold at most the display size the camera was opened with
+                display_size = (min(payload[0], info["display_width"]), min(payload[1], info["display_height"]))
+            elif kind == "confidence":
+                confidence = bool(payload)
+            elif kind == "reopen":
+                ring.close()
+                source.close()
+                try:
+                    info = source.open(payload)
+                except RuntimeError as e:
+                    conn.send(("error", str(e)))
+                    return
+                conn.send(("info", info))
+                ring = _attach_ring(conn, info, lock)
+                display_size = (info["display_width"], info["display_height"])
+        if not running or not source.grab():
+            continue
+        grab_time = time.perf_counter_ns()
+        slot = ring.acquire()
+        if slot is None:
+            ring.drop()
+            continue
+        source.retrieve(ring.arrays(slot, display_size), display_size, confidence)
+        ring.publish(slot, source.timestamp, grab_time, display_size, confidence)
+    ring.close()
+    source.close()
+
+
+class CameraProcess:
+    """
+    Runs a camera source in a separate process, so that grabbing and retrieving never compete
+    with the GUI for the GIL.
+
+    The camera process writes each frame into a FrameRing in shared memory, created by this
+    process, and settings are sent to it over a pipe. Frames are read from the ring without
+    copying, through a SharedFramePool.
+
+    Attributes:
+        info (dict): The camera info sent by the process: width, height, fps, display_width,
+            display_height and the initial video_settings.
+        ring (FrameRing): The current ring.
+        slots (int): The number of ring slots.
+
+    Methods:
+        start(): Starts the process and creates the ring.
+        send(kind, payload): Sends a control message (see camera_main).
+        reopen(settings): Reopens the camera and returns the ring for its new resolution.
+        stop(): Stops the process.
+    """
+    def __init__(self, source_factory: Callable[[], object], settings: dict, slots: int=6,
+                 timeout: float=30.0):
+        self.source_factory = source_factory
+        self.settings = settings
+        self.slots = slots
+        self.timeout = timeout
+        self.info: dict = {}
+        self.ring: Optional[FrameRing] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = self._context.Lock()
+        self._conn = None
+        self._process = None
+
+    def start(self) -> FrameRing:
+        """
+        Starts the camera process and waits for the camera to open.
+
+        Returns:
+            FrameRing: The ring the frames are published to.
+        Raises:
+            RuntimeError: If the camera failed to open or did not respond in time.
+        """
+        self._conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(target=camera_main, name="CameraProcess", daemon=True,
+                                              args=(self.source_factory, self.settings, child_conn, self._lock))
+        self._process.start()
+        child_conn.close()
+        return self._create_ring()
+
+    def _create_ring(self) -> FrameRing:
+        """
+        Waits for the camera info, creates a ring for it and hands it to the camera process.
+        """
+        if not self._conn.poll(self.timeout):
+            raise RuntimeError("The camera process did not respond")
+        kind, payload = self._conn.recv()
+        if kind == "error":
+            raise RuntimeError(payload)
+        self.info = payload
+        layout = frame_layout(self.info["width"], self.info["height"],
+                              self.info["display_width"], self.info["display_height"])
+        self.ring = FrameRing(layout, self.slots, self._lock)
+        self.send("ring", (self.ring.name, self.slots))
+        return self.ring
+
+    def send(self, kind: str, payload=None):
+        """
+        Sends a control message to the camera process (see camera_main).
+        """
+        self._conn.send((kind, payload))
+
+    def reopen(self, settings: dict) -> FrameRing:
+        """
+        Reopens the camera with new settings.
+
+        The previous ring is left to the caller to close once its frames are released.
+
+        Returns:
+            FrameRing: The ring for the new resolution.
+        Raises:
+            RuntimeError: If the camera failed to reopen.
+        """
+        self.settings = settings
+        self.send("reopen", settings)
+        return self._create_ring()
+
+    def stop(self):
+        """
+        Stops the camera process and waits for it to close the camera.
+        """
+        if self._process is None:
+            return
+        try:
+            self.send("stop")
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(self.timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+        self._process = None
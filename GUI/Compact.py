@@ -0,0 +1,167 @@
+import argparse
+import cv2
+import json
+import numpy as np
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from Storage import arrays_identical, load_compact_array, save_compact_array
+from typing import List, Optional, Tuple
+
+
+def find_captures(root: Path) -> List[Path]:
+    """
+    Finds all capture folders below a root folder.
+
+    A capture folder is any folder containing the metadata written by ZEDCameraApp.save_metadata.
+
+    Args:
+        root (Path): The folder to search, e.g. a subject folder or a folder of subject folders.
+    Returns:
+        List[Path]: The capture folders, sorted.
+    """
+    folders = {path.parent for pattern in ("metadata.json", "metadata.txt") for path in root.rglob(pattern)}
+    return sorted(folders)
+
+
+def _is_duplicate_metadata(path: Path) -> bool:
+    """
+    Checks whether a metadata.txt file duplicates the metadata.json next to it.
+    """
+    json_path = path.with_suffix(".json")
+    if path.name != "metadata.txt" or not json_path.exists():
+        return False
+    try:
+        with path.open() as text_file, json_path.open() as json_file:
+            return json.load(text_file) == json.load(json_file)
+    except ValueError:
+        return False
+
+
+def _compact_png(source: Path, target: Path, level: int) -> Path:
+    """
+    Re-encodes a PNG at the given compression level and verifies the decoded pixels.
+    """
+    image = cv2.imread(str(source), cv2.IMREAD_UNCHANGED)
+    temp = target.with_name(target.name + ".tmp.png")
+    if image is None or not cv2.imwrite(str(temp), image, [cv2.IMWRITE_PNG_COMPRESSION, level]):
+        raise RuntimeError(f"Could not re-encode {source}")
+    if not np.array_equal(cv2.imread(str(temp), cv2.IMREAD_UNCHANGED), image):
+        temp.unlink()
+        raise RuntimeError(f"Verification failed for {source}")
+    return temp
+
+
+def _compact_npy(source: Path, target: Path) -> Path:
+    """
+    Converts a .npy array to a compact .npz file and verifies it is bit-identical.
+    """
+    array = np.load(source)
+    temp = target.with_name(target.name + ".tmp")
+    save_compact_array(temp, array)
+    if not arrays_identical(load_compact_array(temp), array):
+        temp.unlink()
+        raise RuntimeError(f"Verification failed for {source}")
+    return temp
+
+
+def compact_capture(capture: str, output: Optional[str]=None, level: int=9) -> Tuple[str, int, int]:
+    """
+    Recompresses the files of a single capture folder.
+
+    PNGs are re-encoded at the given compression level, .npy arrays are converted to compact .npz
+    files (see Storage.save_compact_array) and a metadata.txt identical to metadata.json is dropped.
+    Every output is written to a temporary file and verified against the source before it replaces
+    the source (in place) or is moved into the output folder. Sources are only deleted in place.
+
+    Args:
+        capture (str): The capture folder.
+        output (str, optional): The folder to write the compacted capture to. Defaults to None,
+            which rewrites the capture in place.
+        level (int, optional): The PNG compression level (0-9). Defaults to 9.
+    Returns:
+        Tuple[str, int, int]: The capture folder, and its size in bytes before and after compaction.
+    Raises:
+        RuntimeError: If a file cannot be re-encoded or fails verification; the source is kept.
+    """
+    source_dir = Path(capture)
+    target_dir = Path(output) if output is not None else source_dir
+    target_dir.mkdir(parents=True, exist_ok=True)
+    in_place = target_dir == source_dir
+    bytes_before = bytes_after = 0
+
+    for source in sorted(source_dir.iterdir()):
+        if not source.is_file() or ".tmp" in source.suffixes:
+            continue
+        bytes_before += source.stat().st_size
+        if _is_duplicate_metadata(source):
+            if in_place:
+                source.unlink()
+            continue
+
+        if source.suffix == ".png":
+            target = target_dir / source.name
+            temp = _compact_png(source, target, level)
+        elif source.suffix == ".npy":
+            target = (target_dir / source.name).with_suffix(".npz")
+            temp = _compact_npy(source, target)
+        else:
+            target = target_dir / source.name
+            if not in_place:
+                shutil.copy2(source, target)
+            bytes_after += target.stat().st_size
+            continue
+
+        os.replace(temp, target)
+        if in_place and target != source:
+            source.unlink()
+        bytes_after += target.stat().st_size
+    return str(source_dir), bytes_before, bytes_after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompress and compact existing capture folders.")
+    parser.add_argument("roots", type=Path, nargs="+", help="Subject folders (or folders of subject folders)")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Write compacted captures into this folder instead of in place")
+    parser.add_argument("--level", type=int, default=9, help="PNG compression level (0-9)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    args = parser.parse_args()
+
+    jobs = []
+    for root in args.roots:
+        for capture in find_captures(root):
+            output = None
+            if args.output is not None:
+                output = str(args.output / root.name / capture.relative_to(root))
+            jobs.append((str(capture), output))
+
+    total_before = total_after = failures = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(compact_capture, capture, output, args.level): capture
+                   for capture, output in jobs}
+        for future in as_completed(futures):
+            try:
+                capture, before, after = future.result()
+            except Exception as e:
+                # A corrupt capture (cv2.error, ValueError, ...) must not end the whole run
+                failures += 1
+                print(f"Failed {futures[future]}: {type(e).__name__}: {e}")
+                continue
+            total_before += before
+            total_after += after
+            print(f"{capture}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+    elapsed = time.perf_counter() - start
+
+    saved = total_before - total_after
+    percent = 100 * saved / total_before if total_before else 0.0
+    print(f"Compacted {len(jobs) - failures} captures ({failures} failed) in {elapsed:.1f} s")
+    print(f"Saved {saved / 1e6:.1f} MB of {total_before / 1e6:.1f} MB ({percent:.1f}%), "
+          f"{total_before / 1e6 / max(elapsed, 1e-9):.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
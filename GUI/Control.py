@@ -0,0 +1,166 @@
+import json
+import socketserver
+import threading
+import time
+from PySide6.QtCore import QObject, Signal
+from typing import Optional, Tuple
+
+
+class ControlRequest:
+    """
+    A command received by the control server, answered on the GUI thread with reply or error.
+
+    Attributes:
+        command (str): The command name.
+        params (dict): The other fields of the request.
+        received (int): time.perf_counter_ns() when the request was read from the socket.
+        cancelled (bool): Whether the client stopped waiting for the reply.
+    """
+    def __init__(self, command: str, params: dict):
+        self.command = command
+        self.params = params
+        self.received = time.perf_counter_ns()
+        self.cancelled = False
+        self._response: Optional[dict] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    def reply(self, response: dict) -> bool:
+        """
+        Answers the request.
+
+        Args:
+            response (dict): The response fields; "ok": True is added if missing.
+        Returns:
+            bool: False if the client already stopped waiting.
+        """
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._response = {"ok": True, **response}
+        self._event.set()
+        return True
+
+    def error(self, message: str) -> bool:
+        """
+        Answers the request with an error message.
+        """
+        return self.reply({"ok": False, "error": message})
+
+    def wait(self, timeout: float) -> Optional[dict]:
+        """
+        Waits for the reply. Cancels the request if it is not answered in time.
+
+        Returns:
+            dict: The response, or None if the request timed out.
+        """
+        self._event.wait(timeout)
+        with self._lock:
+            if self._response is None:
+                self.cancelled = True
+            return self._response
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class ControlServer(QObject):
+    """
+    Serves a JSON control API on a local TCP socket, for automating captures from a rig controller.
+
+    Each line a client sends is a JSON object with a "command" field and the command's parameters.
+    Each request is answered with one JSON line, "ok" being false with an "error" message if the
+    command failed. An "id" field in the request is copied to the response. Requests are read on
+    server threads and handed to the GUI thread through request_received, as only the GUI thread
+    may touch the camera and the widgets; the client is answered once the GUI calls reply.
+
+        {"command": "capture"}
+        {"ok": true, "capture": {...}, "trigger_to_grab_ms": 21.4}
+
+    Attributes:
+        request_received (Signal): Signal emitted with each ControlRequest, to be answered on the GUI thread.
+        host (str): The address to listen on. Only local clients can connect to the default.
+        port (int): The port to listen on.
+        timeout (float): Seconds a request waits for its reply before the client is sent an error.
+
+    Methods:
+        start(): Starts the server thread.
+        stop(): Stops the server.
+    """
+    request_received = Signal(object)
+
+    def __init__(self, host: str="127.0.0.1", port: int=8765, timeout: float=5.0):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._server: Optional[_TCPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """
+        The address the server is bound to.
+        """
+        return self._server.server_address[:2]
+
+    def start(self):
+        """
+        Starts the server thread.
+
+        Raises:
+            OSError: If the server cannot bind to the address.
+        """
+        self._server = _TCPServer((self.host, self.port), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ControlServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the server. Connected clients are disconnected when the application exits.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def handle_line(self, line: bytes) -> dict:
+        """
+        Parses a request line, hands it to the GUI thread and waits for the response.
+        """
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"Invalid JSON: {e}"}
+        if not isinstance(message, dict) or not isinstance(message.get("command"), str):
+            return {"ok": False, "error": "Requests must be objects with a command"}
+        request_id = message.pop("id", None)
+        request = ControlRequest(message.pop("command"), message)
+        self.request_received.emit(request)
+        response = request.wait(self.timeout)
+        if response is None:
+            response = {"ok": False, "error": f"No reply within {self.timeout:g} s"}
+        if request_id is not None:
+            response = {"id": request_id, **response}
+        return response
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    for line in self.rfile:
+                        if not line.strip():
+                            continue
+                        response = server.handle_line(line)
+                        self.wfile.write(json.dumps(response).encode() + b"\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
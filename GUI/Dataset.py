@@ -0,0 +1,296 @@
+import cv2
+import json
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from Storage import decode_depth, load_compact_array, load_sparse_array, read_sensor_log
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+
+class CaptureRecord:
+    """
+    A single capture saved by ZEDCameraApp.save_images.
+
+    Nothing is read from disk when a record is created; the metadata and each product are loaded
+    on first access. Depth and point cloud arrays are opened memory-mapped, or decompressed if
+    the capture was compacted with Compact.py or saved sparsely.
+
+    Attributes:
+        path (Path): The capture folder, named "{subject}_{name}_{counter}".
+        subject (str): The subject name.
+        name (str): The image name.
+        counter (int): The image counter.
+
+    Methods:
+        metadata: The parsed metadata.json (or metadata.txt) of the capture.
+        rgb(): Returns the RGB image.
+        depth_image(): Returns the depth visualization image.
+        depth(): Returns the raw depth map.
+        cloud(): Returns the XYZRGBA point cloud.
+        confidence(): Returns the confidence map, if it was saved.
+        sensors(): Returns the IMU samples around the capture, if they were logged.
+        valid_mask(confidence_threshold): Returns the pixels with a valid depth and enough confidence.
+        load(products, materialize): Returns several products at once.
+    """
+    PRODUCTS = ("rgb", "depth_image", "depth", "cloud", "confidence", "sensors")
+
+    def __init__(self, path: Path, subject: str, name: str, counter: int):
+        self.path = path
+        self.subject = subject
+        self.name = name
+        self.counter = counter
+        self._metadata: Optional[dict] = None
+
+    def __repr__(self) -> str:
+        return f"CaptureRecord({self.path.name!r})"
+
+    @property
+    def filename(self) -> str:
+        """
+        The "{subject}_{name}_{counter}" base name shared by the capture's files.
+        """
+        return self.path.name
+
+    @property
+    def metadata(self) -> dict:
+        """
+        The capture metadata, read on first access.
+        """
+        if self._metadata is None:
+            metadata_file = self.path / "metadata.json"
+            if not metadata_file.exists():
+                metadata_file = self.path / "metadata.txt"
+            with metadata_file.open() as file:
+                self._metadata = json.load(file)
+        return self._metadata
+
+    def rgb(self) -> np.ndarray:
+        """
+        Returns the RGB image in BGRA format, as saved by OpenCV.
+        """
+        return cv2.imread(str(self.path / f"RGB_{self.filename}.png"), cv2.IMREAD_UNCHANGED)
+
+    def depth_image(self) -> np.ndarray:
+        """
+        Returns the depth visualization image in BGRA format.
+        """
+        return cv2.imread(str(self.path / f"DEPTH_{self.filename}.png"), cv2.IMREAD_UNCHANGED)
+
+    def _load_array(self, prefix: str) -> np.ndarray:
+        """
+        Loads a raw array, memory-mapped from .npy or decompressed from a sparse or compacted .npz.
+        """
+        path = self.path / f"{prefix}_{self.filename}.npy"
+        if path.exists():
+            return np.load(path, mmap_mode="r")
+        sparse_path = path.with_suffix(".sparse.npz")
+        if sparse_path.exists():
+            return load_sparse_array(sparse_path)
+        return load_compact_array(path.with_suffix(".npz"))
+
+    def depth(self) -> np.ndarray:
+        """
+        Returns the raw (H x W) float32 depth map, memory-mapped read-only if saved as .npy.
+
+        Depth saved as uint16 millimeters (a DEPTH16 PNG or a uint16 array) is converted back to
+        float32 coordinate units, with NaN for invalid pixels.
+        """
+        png_path = self.path / f"DEPTH16_{self.filename}.png"
+        depth = cv2.imread(str(png_path), cv2.IMREAD_UNCHANGED) if png_path.exists() else self._load_array("DEPTH")
+        if depth.dtype == np.uint16:
+            return decode_depth(depth, float(_get_field(self.metadata, "image_data.depth_scale") or 1.0))
+        return depth
+
+    def cloud(self) -> np.ndarray:
+        """
+        Returns the raw (H x W x 4) float32 XYZRGBA point cloud, memory-mapped read-only if saved as .npy.
+        """
+        return self._load_array("CLOUD")
+
+    def confidence(self) -> Optional[np.ndarray]:
+        """
+        Returns the (H x W) uint8 confidence map, or None if it was not saved.
+
+        Values range from 1 (most confident) to 100, with 0 where the confidence is undefined.
+        """
+        path = self.path / f"CONFIDENCE_{self.filename}.png"
+        if not path.exists():
+            return None
+        return cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+
+    def sensors(self) -> Optional[np.ndarray]:
+        """
+        Returns the sensor samples around the capture from the session's sensor log.
+
+        The samples are memory-mapped read-only from the log in the subject folder. Their motion is
+        summarized in the "sensors" section of the metadata.
+
+        Returns:
+            np.ndarray: The samples as a structured array of Storage.SENSOR_DTYPE, or None if the
+                capture has no sensor window or its log is missing.
+        """
+        window = self.metadata.get("sensors")
+        if window is None or "log" not in window:
+            return None
+        log_path = self.path.parent / window["log"]
+        if not log_path.exists():
+            return None
+        start = window["log_index"]
+        return read_sensor_log(log_path)[start:start + window["samples"]]
+
+    def valid_mask(self, confidence_threshold: int=100) -> np.ndarray:
+        """
+        Returns the pixels with a valid depth measure and a confidence within the threshold.
+
+        This re-applies the camera's confidence threshold to a saved capture. Pixels above the
+        threshold were already removed at capture time, so only lower thresholds have an effect.
+
+        Args:
+            confidence_threshold (int, optional): Keep pixels with a confidence value up to this
+                threshold (1-100), like the runtime parameter. Defaults to 100.
+        Returns:
+            np.ndarray: The (H x W) boolean mask.
+        Raises:
+            FileNotFoundError: If a threshold below 100 is given and no confidence map was saved.
+        """
+        mask = np.isfinite(self.depth())
+        if confidence_threshold < 100:
+            confidence = self.confidence()
+            if confidence is None:
+                raise FileNotFoundError(f"{self.filename} has no confidence map")
+            mask &= (confidence > 0) & (confidence <= confidence_threshold)
+        return mask
+
+    def load(self, products: Sequence[str]=PRODUCTS, materialize: bool=False) -> Dict[str, np.ndarray]:
+        """
+        Loads several products of the capture.
+
+        Args:
+            products (Sequence[str], optional): The products to load, from PRODUCTS. Defaults to all.
+            materialize (bool, optional): Read memory-mapped arrays fully into memory. Defaults to False.
+        Returns:
+            Dict[str, np.ndarray]: The loaded products by name.
+        Raises:
+            ValueError: If a product name is unknown.
+        """
+        loaded = {}
+        for product in products:
+            if product not in self.PRODUCTS:
+                raise ValueError(f"Unknown capture product: {product}")
+            data = getattr(self, product)()
+            loaded[product] = np.array(data) if materialize and isinstance(data, np.memmap) else data
+        return loaded
+
+
+def _get_field(metadata: dict, key: str) -> Any:
+    """
+    Returns a metadata field by dotted key (e.g. "image_data.description"), or None if missing.
+    """
+    value = metadata
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+class CaptureDataset:
+    """
+    A lazy reader for the captures of a subject folder.
+
+    Captures are enumerated from the "{subject}_{name}_{counter}" folders written by
+    ZEDCameraApp.save_images. Iterating yields CaptureRecord objects without loading any data;
+    iter_loaded additionally loads products, optionally prefetching them in a thread pool.
+
+    Attributes:
+        root (Path): The subject folder.
+        subject (str): The subject name (the name of the subject folder).
+        names (set): Only include these image names, or None for all.
+        counters (set): Only include these counters, or None for all.
+        filters (Dict[str, Any]): Metadata filters by dotted key. A value is either compared for
+            equality with the (string) metadata field or called with it as a predicate.
+
+    Methods:
+        __iter__(): Yields the matching capture records.
+        iter_loaded(products, workers, prefetch): Yields records with their loaded products.
+    """
+    def __init__(self, root: Path, names: Optional[Iterable[str]]=None, counters: Optional[Iterable[int]]=None,
+                 filters: Optional[Dict[str, Any]]=None):
+        self.root = Path(root)
+        self.subject = self.root.name
+        self.names = set(names) if names is not None else None
+        self.counters = set(counters) if counters is not None else None
+        self.filters = filters or {}
+
+    def _parse(self, folder: Path) -> Optional[CaptureRecord]:
+        """
+        Creates a record from a capture folder, or returns None if the folder is not a capture.
+        """
+        prefix = f"{self.subject}_"
+        if not folder.is_dir() or not folder.name.startswith(prefix):
+            return None
+        name, _, counter = folder.name[len(prefix):].rpartition("_")
+        if not name or not counter.isdigit():
+            return None
+        return CaptureRecord(folder, self.subject, name, int(counter))
+
+    def _matches(self, record: CaptureRecord) -> bool:
+        """
+        Checks a record against the name, counter and metadata filters.
+        """
+        if self.names is not None and record.name not in self.names:
+            return False
+        if self.counters is not None and record.counter not in self.counters:
+            return False
+        for key, expected in self.filters.items():
+            value = _get_field(record.metadata, key)
+            if callable(expected):
+                if not expected(value):
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        """
+        Yields the matching capture records, ordered by name and counter.
+        """
+        records = (self._parse(folder) for folder in self.root.iterdir())
+        records = sorted((record for record in records if record is not None),
+                         key=lambda record: (record.name, record.counter))
+        for record in records:
+            if self._matches(record):
+                yield record
+
+    def iter_loaded(self, products: Sequence[str]=CaptureRecord.PRODUCTS, workers: int=0,
+                    prefetch: int=4) -> Iterator[tuple]:
+        """
+        Yields the matching records together with their loaded products.
+
+        With workers > 0, products are read and decoded in a thread pool, keeping up to prefetch
+        records in flight ahead of the consumer; memory-mapped arrays are then read fully into
+        memory on the worker threads. Records are always yielded in order.
+
+        Args:
+            products (Sequence[str], optional): The products to load. Defaults to all.
+            workers (int, optional): The number of loader threads; 0 loads on the calling thread.
+            prefetch (int, optional): The number of records loaded ahead. Defaults to 4.
+        Yields:
+            Tuple[CaptureRecord, Dict[str, np.ndarray]]: Each record and its loaded products.
+        """
+        if workers <= 0:
+            for record in self:
+                yield record, record.load(products)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for record in self:
+                pending.append((record, executor.submit(record.load, products, True)))
+                if len(pending) > prefetch:
+                    done_record, future = pending.popleft()
+                    yield done_record, future.result()
+            while pending:
+                done_record, future = pending.popleft()
+                yield done_record, future.result()
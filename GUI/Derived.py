@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from PySide6.QtCore import QObject, Signal
+from Trace import tracer
+from Utils import normal_map, sobel_filter
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def sobel_product(depth_image: np.ndarray) -> np.ndarray:
+    """
+    Sobel edge map of the depth visualization.
+    """
+    return sobel_filter(depth_image)
+
+
+def hole_mask_product(depth: np.ndarray) -> np.ndarray:
+    """
+    Mask of the pixels without a valid depth measure (255 where invalid).
+    """
+    return np.where(np.isfinite(depth), 0, 255).astype(np.uint8)
+
+
+def normals_product(cloud: np.ndarray) -> np.ndarray:
+    """
+    Color-coded surface normal map of the point cloud.
+    """
+    return normal_map(cloud)[:, :, :3]
+
+
+# Derived products by name: (file prefix, generator, names of the frame arrays it needs).
+# Generators must be module-level functions so they can run in worker processes.
+DERIVED_PRODUCTS: Dict[str, Tuple[str, Callable[..., np.ndarray], Tuple[str, ...]]] = {
+    "Sobel": ("SOBEL", sobel_product, ("depth_image",)),
+    "Hole Mask": ("HOLES", hole_mask_product, ("depth",)),
+    "Normals": ("NORMALS", normals_product, ("cloud",)),
+}
+
+
+def run_product(name: str, inputs: Dict[str, np.ndarray], path: str) -> Tuple[str, str, float]:
+    """
+    Computes a derived product and writes it to disk. Runs in a worker process.
+
+    uint8 results are written as PNG files, everything else as NumPy array files (.npy).
+
+    Args:
+        name (str): The name of the product in DERIVED_PRODUCTS.
+        inputs (Dict[str, np.ndarray]): The frame arrays the product needs.
+        path (str): The output path without suffix.
+    Returns:
+        Tuple[str, str, float]: The product name, the written file and the time taken in seconds.
+    """
+    start = time.perf_counter()
+    _, generator, input_names = DERIVED_PRODUCTS[name]
+    result = generator(*(inputs[input_name] for input_name in input_names))
+    if result.dtype == np.uint8:
+        output = Path(path).with_suffix(".png")
+        cv2.imwrite(str(output), result)
+    else:
+        output = Path(path).with_suffix(".npy")
+        np.save(output, result)
+    return name, str(output), time.perf_counter() - start
+
+
+class DerivedProductStage(QObject):
+    """
+    Generates derived products of captures in a process pool.
+
+    The frame arrays are passed to the workers directly, so saved files are never read back,
+    and the GUI thread only submits work. Each finished product is reported with the time it took.
+
+    Attributes:
+        product_finished (Signal): Signal emitted with the product name, output file and seconds taken.
+        product_failed (Signal): Signal emitted with the product name and the error message.
+
+    Methods:
+        required_inputs(products): Returns the frame arrays needed by a set of products.
+        submit(products, inputs, save_folder, filename): Queues products of a capture.
+        shutdown(): Waits for queued products and stops the workers.
+    """
+    product_finished = Signal(str, str, float)
+    product_failed = Signal(str, str)
+
+    def __init__(self, workers: Optional[int]=None):
+        super().__init__()
+        self._workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def required_inputs(products: List[str]) -> List[str]:
+        """
+        Returns the names of the frame arrays needed by a set of products.
+
+        Args:
+            products (List[str]): Names of products in DERIVED_PRODUCTS.
+        Returns:
+            List[str]: The needed frame array names, without duplicates.
+        """
+        names = []
+        for product in products:
+            for input_name in DERIVED_PRODUCTS[product][2]:
+                if input_name not in names:
+                    names.append(input_name)
+        return names
+
+    def submit(self, products: List[str], inputs: Dict[str, np.ndarray], save_folder: Path, filename: str):
+        """
+        Queues the derived products of a capture.
+
+        The inputs must not be modified afterwards; pass copies of any buffers that are reused.
+
+        Args:
+            products (List[str]): Names of products in DERIVED_PRODUCTS.
+            inputs (Dict[str, np.ndarray]): The frame arrays, by name.
+            save_folder (Path): The capture folder to write the products into.
+            filename (str): The "{subject}_{name}_{counter}" base name of the capture.
+        """
+        if not products:
+            return
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+        for product in products:
+            prefix, _, input_names = DERIVED_PRODUCTS[product]
+            product_inputs = {name: inputs[name] for name in input_names}
+            path = str(save_folder / f"{prefix}_{filename}")
+            future = self._executor.submit(run_product, product, product_inputs, path)
+            future.add_done_callback(lambda future, product=product: self._report(product, future))
+
+    def _report(self, product: str, future: Future):
+        """
+        Reports a finished product. Called from the executor's thread.
+        """
+        try:
+            name, output, seconds = future.result()
+        except Exception as e:
+            self.product_failed.emit(product, str(e))
+            return
+        tracer.instant(f"{name} finished", "derived", seconds=seconds)
+        self.product_finished.emit(name, output, seconds)
+
+    def shutdown(self):
+        """
+        Waits for the queued products to be written and stops the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
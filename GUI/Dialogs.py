@@ -1,6 +1,8 @@
+import html
 from PySide6.QtWidgets import QGridLayout, QLabel, QLineEdit, QVBoxLayout, QComboBox, QDialog, QDialogButtonBox, QSlider, QCheckBox, QWidget
 from PySide6.QtCore import Signal, QTimer, Qt
 import pyzed.sl as sl
+from Derived import DERIVED_PRODUCTS
 from typing import Dict, Union
 
 
@@ -34,34 +36,54 @@ class MessageDialog(QDialog):
         self.setLayout(layout)
 
 
-class AutoCloseDialog(MessageDialog):
+class Toast(QLabel):
     """
-    A dialog that automatically closes after a specified duration.
+    A non-modal notification shown over the bottom of its parent window, hidden after a duration.
 
-    Args:
-        message (str): The message to be displayed in the dialog.
-        title (str, optional): The title of the dialog. Defaults to None.
-        duration (int, optional): The duration in milliseconds before the dialog closes automatically. Defaults to 3000 ms (3 seconds).
-    """
-    def __init__(self, message: str, title: str=None, duration: int=3000):
-        super().__init__(message, title)
-        QTimer.singleShot(duration, self.close)
-
-
-class ImageSavedDialog(AutoCloseDialog):
-    """
-    A dialog that indicates images have been saved.
-
-    This dialog automatically closes after a certain period of time.
+    Unlike a dialog shown with exec(), showing a toast does not start a nested event loop, so the
+    frame loop and key presses keep being handled while it is visible. A new message replaces the
+    one shown. The toast ignores the mouse, so it never covers a control.
 
-    Attributes:
-        None
+    Args:
+        parent (QWidget): The window to show the toast over.
 
     Methods:
-        __init__(): Initializes the dialog with a message indicating images have been saved.
+        show_message(message, title, duration, error): Shows a message for a duration.
     """
-    def __init__(self):
-        super().__init__("Images Saved")
+    STYLE = "background-color: rgba(40, 40, 40, 220); color: white; border-radius: 6px; padding: 8px;"
+    ERROR_STYLE = "background-color: rgba(150, 30, 30, 230); color: white; border-radius: 6px; padding: 8px;"
+
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAlignment(Qt.AlignCenter)
+        self.setWordWrap(True)
+        self.setTextFormat(Qt.RichText)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.hide)
+        self.hide()
+
+    def show_message(self, message: str, title: str=None, duration: int=3000, error: bool=False):
+        """
+        Shows a message, replacing the one shown.
+
+        Args:
+            message (str): The message to be displayed.
+            title (str, optional): A bold heading above the message. Defaults to None.
+            duration (int, optional): The duration in milliseconds before the toast hides. Defaults to 3000 ms.
+            error (bool, optional): Whether to highlight the message as an error. Defaults to False.
+        """
+        text = html.escape(message)
+        self.setText(text if title is None else f"<b>{html.escape(title)}</b><br>{text}")
+        self.setStyleSheet(self.ERROR_STYLE if error else self.STYLE)
+        parent = self.parentWidget()
+        self.setFixedWidth(min(480, parent.width() - 40))
+        self.adjustSize()
+        self.move((parent.width() - self.width()) // 2, parent.height() - self.height() - 40)
+        self.raise_()
+        self.show()
+        self._timer.start(duration)
 
 
 class CameraSettingsDialog(QDialog):
@@ -186,7 +208,7 @@ class CameraSettingsDialog(QDialog):
             settings_changed: Signal emitted with the updated initialization parameters
 
         Displays:
-            AutoCloseDialog: Dialog indicating that the camera settings have been updated
+            Toast: Notification that the camera settings have been updated
         """
         mappings = {
             "2K": sl.RESOLUTION.HD2K,
@@ -280,7 +302,7 @@ class RunTimeParamDialog(QDialog):
             settings_changed: Signal emitted with the updated initialization parameters
 
         Displays:
-            AutoCloseDialog: Dialog indicating that the camera settings have been updated
+            Toast: Notification that the camera settings have been updated
         """
         self.params = sl.RuntimeParameters()
         self.params.enable_fill_mode = self.fill_mode_combo.currentText() == "True"
@@ -320,9 +342,13 @@ class VideoSettingsDialog(QDialog):
     It also includes options for enabling or disabling automatic adjustments for white balance, 
     gain, and exposure.
 
+    Changes are emitted live as the sliders and checkboxes move, so the camera preview reflects
+    them immediately. Cancelling the dialog emits the settings it was opened with.
+
     Attributes:
         settings_changed (Signal): Signal emitted when the settings are changed.
         video_settings (dict): Dictionary to store the current video settings.
+        initial_settings (dict): The video settings the dialog was opened with.
         
     Methods:
         update_label(sender, label): Updates the text of a QLabel with the value of the corresponding slider.
@@ -331,6 +357,7 @@ class VideoSettingsDialog(QDialog):
         toggle_auto_exposure(): Toggles the auto exposure setting.
         apply_settings(): Applies the current settings from the sliders and checkboxes to the video settings.
         reset_settings(): Resets the video settings to their default values.
+        reject(): Restores the initial video settings and closes the dialog.
 
     Static Methods:
         get_default_settings(): Returns a dictionary of video settings with default values.
@@ -356,6 +383,8 @@ class VideoSettingsDialog(QDialog):
         for key, value in video_settings.items():
             if key in mapping:
                 self.video_settings[mapping[key]] = value
+        # Settings the dialog was opened with, restored if the dialog is cancelled
+        self.initial_settings = dict(self.video_settings)
 
         # Brightness
         brightness_label = QLabel("Brightness:")
@@ -448,13 +477,20 @@ class VideoSettingsDialog(QDialog):
             self.gain_auto_checkbox.setChecked(True)
             self.exposure_auto_checkbox.setChecked(True)
 
+        # Apply changes live while the sliders move
+        for slider in (self.brightness_slider, self.contrast_slider, self.hue_slider,
+                       self.saturation_slider, self.sharpness_slider, self.gamma_slider,
+                       self.white_balance_slider, self.gain_slider, self.exposure_slider):
+            slider.valueChanged.connect(self.apply_settings)
+        for checkbox in (self.white_balance_auto_checkbox, self.gain_auto_checkbox,
+                         self.exposure_auto_checkbox):
+            checkbox.stateChanged.connect(self.apply_settings)
+
         # Button Box
-        QBtn = QDialogButtonBox.Apply | QDialogButtonBox.Cancel | QDialogButtonBox.Reset
+        QBtn = QDialogButtonBox.Ok | QDialogButtonBox.Cancel | QDialogButtonBox.Reset
         self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.accepted.connect(self.accept)
         self.buttonBox.rejected.connect(self.reject)
-        apply_button = self.buttonBox.button(QDialogButtonBox.Apply)
-        if apply_button:
-            apply_button.clicked.connect(self.apply_settings)
         reset_button = self.buttonBox.button(QDialogButtonBox.Reset)
         if reset_button:
             reset_button.clicked.connect(self.reset_settings)
@@ -595,6 +631,16 @@ class VideoSettingsDialog(QDialog):
         self.gain_auto_checkbox.setChecked(default_settings[sl.VIDEO_SETTINGS.GAIN] == -1)
         self.exposure_auto_checkbox.setChecked(default_settings[sl.VIDEO_SETTINGS.EXPOSURE] == -1)
 
+    def reject(self):
+        """
+        Restore the video settings the dialog was opened with and close the dialog.
+
+        Emits:
+            settings_changed (dict): Signal emitted with the initial video settings.
+        """
+        self.settings_changed.emit(dict(self.initial_settings))
+        super().reject()
+
     @staticmethod
     def get_default_settings() -> Dict[sl.VIDEO_SETTINGS, float]:
         """
@@ -651,4 +697,291 @@ class VideoSettingsDialog(QDialog):
             sl.VIDEO_SETTINGS.EXPOSURE: "Exposure"
         }
 
-        
\ No newline at end of file
+
+class SaveOptionsDialog(QDialog):
+    """
+    A dialog for choosing which additional products are saved with each capture.
+
+    Attributes:
+        settings_changed (Signal): Signal emitted with the updated save options.
+        options (dict): The current save options.
+    Methods:
+        __init__(options: dict):
+            Initializes the dialog with the given save options.
+        apply_settings():
+            Applies the settings from the dialog to the save options and emits the settings_changed signal.
+    Static Methods:
+        get_default_options(): Returns a dictionary of save options with default values.
+    """
+    settings_changed = Signal(dict)
+
+    def __init__(self, options: dict):
+        super().__init__()
+        self.setWindowTitle("Save Options")
+        self.options = dict(options)
+
+        # Point Cloud Export
+        cloud_export_label = QLabel("Point Cloud Export:")
+        self.cloud_export_combo = QComboBox()
+        self.cloud_export_combo.addItems(["None", "PLY", "PCD"])
+        self.cloud_export_combo.setCurrentText(options["cloud_export"])
+
+        # Voxel Size
+        voxel_size_label = QLabel("Export Voxel Size:")
+        self.voxel_size_box = QLineEdit(f"{options['voxel_size']}")
+
+        # Depth Format
+        depth_format_label = QLabel("Depth Format:")
+        self.depth_format_combo = QComboBox()
+        self.depth_format_combo.addItems(["Float32", "16-bit PNG", "16-bit Array"])
+        self.depth_format_combo.setCurrentText(options["depth_format"])
+
+        # Confidence Map and Sparse Depth
+        self.confidence_checkbox = QCheckBox("Save Confidence Map")
+        self.confidence_checkbox.setChecked(options["confidence"])
+        self.sparse_depth_checkbox = QCheckBox("Store Depth and Point Cloud Sparsely")
+        self.sparse_depth_checkbox.setChecked(options["sparse_depth"])
+
+        # Derived Products
+        derived_label = QLabel("Derived Products:")
+        self.derived_checkboxes = {}
+        for product in DERIVED_PRODUCTS:
+            checkbox = QCheckBox(product)
+            checkbox.setChecked(product in options["derived_products"])
+            self.derived_checkboxes[product] = checkbox
+
+        # Apply Settings Button
+        QBtn = QDialogButtonBox.Apply | QDialogButtonBox.Cancel
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.rejected.connect(self.reject)
+        apply_button = self.buttonBox.button(QDialogButtonBox.Apply)
+        if apply_button:
+            apply_button.clicked.connect(self.apply_settings)
+
+        # Layout
+        layout = QVBoxLayout()
+        main_layout = QGridLayout()
+        main_layout.addWidget(cloud_export_label, 0, 0)
+        main_layout.addWidget(self.cloud_export_combo, 0, 1)
+        main_layout.addWidget(voxel_size_label, 1, 0)
+        main_layout.addWidget(self.voxel_size_box, 1, 1)
+        main_layout.addWidget(depth_format_label, 2, 0)
+        main_layout.addWidget(self.depth_format_combo, 2, 1)
+        main_layout.addWidget(self.confidence_checkbox, 3, 1)
+        main_layout.addWidget(self.sparse_depth_checkbox, 4, 1)
+        main_layout.addWidget(derived_label, 5, 0)
+        for row, checkbox in enumerate(self.derived_checkboxes.values(), start=5):
+            main_layout.addWidget(checkbox, row, 1)
+        layout.addLayout(main_layout)
+        layout.addWidget(self.buttonBox)
+        self.setLayout(layout)
+
+    def apply_settings(self):
+        """
+        Apply the settings from the GUI to the save options.
+
+        Emits:
+            settings_changed: Signal emitted with the updated save options.
+        """
+        self.options["cloud_export"] = self.cloud_export_combo.currentText()
+        self.options["voxel_size"] = float(self.voxel_size_box.text())
+        self.options["depth_format"] = self.depth_format_combo.currentText()
+        self.options["confidence"] = self.confidence_checkbox.isChecked()
+        self.options["sparse_depth"] = self.sparse_depth_checkbox.isChecked()
+        self.options["derived_products"] = [product for product, checkbox in self.derived_checkboxes.items()
+                                            if checkbox.isChecked()]
+        self.settings_changed.emit(self.options)
+
+    @staticmethod
+    def get_default_options() -> dict:
+        """
+        Returns a dictionary of save options with default values.
+
+        Returns:
+            dict: Dictionary containing the default save options.
+        """
+        return {
+            "cloud_export": "None",
+            "voxel_size": 0.0,
+            "depth_format": "Float32",
+            "confidence": False,
+            "sparse_depth": False,
+            "derived_products": []
+        }
+
+
+class StreamSettingsDialog(QDialog):
+    """
+    A dialog for configuring the live preview stream served to other machines.
+
+    Attributes:
+        settings_changed (Signal): Signal emitted with the updated stream settings.
+        settings (dict): The current stream settings.
+    Methods:
+        __init__(settings: dict):
+            Initializes the dialog with the given stream settings.
+        apply_settings():
+            Applies the settings from the dialog and emits the settings_changed signal.
+    Static Methods:
+        get_default_settings(): Returns a dictionary of stream settings with default values.
+    """
+    settings_changed = Signal(dict)
+
+    def __init__(self, settings: dict):
+        super().__init__()
+        self.setWindowTitle("Stream Settings")
+        self.settings = dict(settings)
+
+        # Enable Streaming
+        self.enabled_checkbox = QCheckBox("Stream Preview")
+        self.enabled_checkbox.setChecked(settings["enabled"])
+
+        # Port
+        port_label = QLabel("Port:")
+        self.port_box = QLineEdit(f"{settings['port']}")
+
+        # Width
+        width_label = QLabel("Width (px):")
+        self.width_box = QLineEdit(f"{settings['width']}")
+
+        # JPEG Quality
+        quality_label = QLabel("JPEG Quality:")
+        self.quality_box = QLineEdit(f"{settings['quality']}")
+
+        # Apply Settings Button
+        QBtn = QDialogButtonBox.Apply | QDialogButtonBox.Cancel
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.rejected.connect(self.reject)
+        apply_button = self.buttonBox.button(QDialogButtonBox.Apply)
+        if apply_button:
+            apply_button.clicked.connect(self.apply_settings)
+
+        # Layout
+        layout = QVBoxLayout()
+        main_layout = QGridLayout()
+        main_layout.addWidget(self.enabled_checkbox, 0, 0, 1, 2)
+        main_layout.addWidget(port_label, 1, 0)
+        main_layout.addWidget(self.port_box, 1, 1)
+        main_layout.addWidget(width_label, 2, 0)
+        main_layout.addWidget(self.width_box, 2, 1)
+        main_layout.addWidget(quality_label, 3, 0)
+        main_layout.addWidget(self.quality_box, 3, 1)
+        layout.addLayout(main_layout)
+        layout.addWidget(self.buttonBox)
+        self.setLayout(layout)
+
+    def apply_settings(self):
+        """
+        Apply the settings from the GUI to the stream settings.
+
+        Emits:
+            settings_changed: Signal emitted with the updated stream settings.
+        """
+        self.settings["enabled"] = self.enabled_checkbox.isChecked()
+        self.settings["port"] = int(self.port_box.text())
+        self.settings["width"] = max(16, int(self.width_box.text()))
+        self.settings["quality"] = min(100, max(0, int(self.quality_box.text())))
+        self.settings_changed.emit(self.settings)
+
+    @staticmethod
+    def get_default_settings() -> dict:
+        """
+        Returns a dictionary of stream settings with default values.
+
+        Returns:
+            dict: Dictionary containing the default stream settings.
+        """
+        return {
+            "enabled": False,
+            "port": 8080,
+            "width": 640,
+            "quality": 70
+        }
+
+
+class AutoCaptureDialog(QDialog):
+    """
+    A dialog for configuring automatic capture when the scene becomes stable.
+
+    Attributes:
+        settings_changed (Signal): Signal emitted with the updated auto capture settings.
+        settings (dict): The current auto capture settings.
+    Methods:
+        __init__(settings: dict):
+            Initializes the dialog with the given auto capture settings.
+        apply_settings():
+            Applies the settings from the dialog and emits the settings_changed signal.
+    Static Methods:
+        get_default_settings(): Returns a dictionary of auto capture settings with default values.
+    """
+    settings_changed = Signal(dict)
+
+    def __init__(self, settings: dict):
+        super().__init__()
+        self.setWindowTitle("Auto Capture Settings")
+        self.settings = dict(settings)
+
+        # Stable Time
+        stable_time_label = QLabel("Stable Time (s):")
+        self.stable_time_box = QLineEdit(f"{settings['stable_time']}")
+
+        # Cooldown
+        cooldown_label = QLabel("Cooldown (s):")
+        self.cooldown_box = QLineEdit(f"{settings['cooldown']}")
+
+        # Thresholds
+        still_threshold_label = QLabel("Still Threshold:")
+        self.still_threshold_box = QLineEdit(f"{settings['still_threshold']}")
+        change_threshold_label = QLabel("Change Threshold:")
+        self.change_threshold_box = QLineEdit(f"{settings['change_threshold']}")
+
+        # Apply Settings Button
+        QBtn = QDialogButtonBox.Apply | QDialogButtonBox.Cancel
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.rejected.connect(self.reject)
+        apply_button = self.buttonBox.button(QDialogButtonBox.Apply)
+        if apply_button:
+            apply_button.clicked.connect(self.apply_settings)
+
+        # Layout
+        layout = QVBoxLayout()
+        main_layout = QGridLayout()
+        main_layout.addWidget(stable_time_label, 0, 0)
+        main_layout.addWidget(self.stable_time_box, 0, 1)
+        main_layout.addWidget(cooldown_label, 1, 0)
+        main_layout.addWidget(self.cooldown_box, 1, 1)
+        main_layout.addWidget(still_threshold_label, 2, 0)
+        main_layout.addWidget(self.still_threshold_box, 2, 1)
+        main_layout.addWidget(change_threshold_label, 3, 0)
+        main_layout.addWidget(self.change_threshold_box, 3, 1)
+        layout.addLayout(main_layout)
+        layout.addWidget(self.buttonBox)
+        self.setLayout(layout)
+
+    def apply_settings(self):
+        """
+        Apply the settings from the GUI to the auto capture settings.
+
+        Emits:
+            settings_changed: Signal emitted with the updated auto capture settings.
+        """
+        self.settings["stable_time"] = float(self.stable_time_box.text())
+        self.settings["cooldown"] = float(self.cooldown_box.text())
+        self.settings["still_threshold"] = float(self.still_threshold_box.text())
+        self.settings["change_threshold"] = float(self.change_threshold_box.text())
+        self.settings_changed.emit(self.settings)
+
+    @staticmethod
+    def get_default_settings() -> dict:
+        """
+        Returns a dictionary of auto capture settings with default values.
+
+        Returns:
+            dict: Dictionary containing the default auto capture settings.
+        """
+        return {
+            "stable_time": 1.5,
+            "cooldown": 3.0,
+            "still_threshold": 1.5,
+            "change_threshold": 6.0
+        }
@@ -0,0 +1,203 @@
+import os
+import shutil
+import time
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+# Upper bounds of the bytes per pixel of each saved file. PNG output is bounded by the raw size.
+RGB_BYTES = 4
+DEPTH_IMAGE_BYTES = 4
+DEPTH_BYTES = {"Float32": 4, "16-bit PNG": 2, "16-bit Array": 2}
+CLOUD_BYTES = 16
+CONFIDENCE_BYTES = 1
+SPARSE_MASK_BYTES = 1 / 8
+CLOUD_EXPORT_BYTES = {"None": 0, "PLY": 15, "PCD": 16}
+DERIVED_BYTES = {"Sobel": 1, "Hole Mask": 1, "Normals": 3}
+# Headers, metadata files and file system slack per capture
+FIXED_BYTES = 64 * 1024
+# Size of the synced file written to measure the write bandwidth of a volume
+PROBE_BYTES = 8 * 1024 ** 2
+PROBE_CHUNK_BYTES = 1024 ** 2
+PROBE_NAME = ".write_probe"
+
+
+class DiskStatus(NamedTuple):
+    """
+    The capacity of the volume holding the subject folder.
+
+    Attributes:
+        free_bytes (int): The free space on the volume.
+        required_bytes (int): The worst-case size of the next capture, including the reserve.
+        remaining_captures (int): The number of captures that still fit, at the expected size.
+        seconds_to_full (float): The projected time until the disk is full at the current capture
+            pace, or None before the pace is known.
+        bandwidth (float): The measured write bandwidth in bytes per second, or None before the first probe.
+        fits (bool): Whether the next capture is guaranteed to fit.
+        low (bool): Whether few captures remain.
+    """
+    free_bytes: int
+    required_bytes: int
+    remaining_captures: int
+    seconds_to_full: Optional[float]
+    bandwidth: Optional[float]
+    fits: bool
+    low: bool
+
+
+class DiskMonitor:
+    """
+    Tracks the disk space and write bandwidth used by captures.
+
+    The worst-case size of a capture is computed from the resolution and save options and is used
+    to refuse captures that might not fit, so a capture never fails halfway through its files.
+    The projections use the measured sizes of recent captures instead, which are usually smaller
+    thanks to PNG compression, together with the capture pace.
+
+    The write bandwidth is measured separately by probe, which times a synced write of a small file
+    to the volume, so it does not depend on the time captures spend encoding their files.
+
+    Attributes:
+        reserve_bytes (int): Free space always left on the volume.
+        warn_captures (int): Report the disk as low below this many remaining captures.
+        smoothing (float): Weight of the newest measurement in the running averages (0-1).
+        probe_interval (float): Minimum seconds between two bandwidth probes.
+
+    Methods:
+        estimate_capture_bytes(width, height, options): Returns the worst-case size of a capture.
+        folder_bytes(folder): Returns the total size of the files in a folder.
+        record_save(bytes_written): Records a finished capture.
+        probe(folder): Measures the write bandwidth of the volume holding a folder.
+        status(folder, estimated_bytes): Returns the capacity of the volume holding a folder.
+    """
+    def __init__(self, reserve_bytes: int=512 * 1024 ** 2, warn_captures: int=20, smoothing: float=0.3,
+                 probe_interval: float=60.0):
+        self.reserve_bytes = reserve_bytes
+        self.warn_captures = warn_captures
+        self.smoothing = smoothing
+        self.probe_interval = probe_interval
+        self._capture_bytes: Optional[float] = None
+        self._bandwidth: Optional[float] = None
+        self._save_times = deque(maxlen=20)
+        self._last_probe: Optional[float] = None
+        self._probe_data: Optional[bytes] = None
+
+    @staticmethod
+    def estimate_capture_bytes(width: int, height: int, options: dict) -> int:
+        """
+        Returns the worst-case size of a capture, including derived products written in the background.
+
+        Args:
+            width (int): The image width.
+            height (int): The image height.
+            options (dict): The save options (see SaveOptionsDialog.get_default_options).
+        Returns:
+            int: The size in bytes.
+        """
+        per_pixel = RGB_BYTES + DEPTH_IMAGE_BYTES + DEPTH_BYTES[options["depth_format"]] + CLOUD_BYTES
+        if options["sparse_depth"]:
+            per_pixel += 2 * SPARSE_MASK_BYTES
+        if options["confidence"]:
+            per_pixel += CONFIDENCE_BYTES
+        per_pixel += CLOUD_EXPORT_BYTES[options["cloud_export"]]
+        per_pixel += sum(DERIVED_BYTES.get(product, 4) for product in options["derived_products"])
+        return int(width * height * per_pixel) + FIXED_BYTES
+
+    @staticmethod
+    def folder_bytes(folder: Path) -> int:
+        """
+        Returns the total size of the files directly inside a folder.
+        """
+        return sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+
+    def record_save(self, bytes_written: int):
+        """
+        Records a finished capture, updating the running average of its size and the capture pace.
+
+        Args:
+            bytes_written (int): The size of the saved files.
+        """
+        self._capture_bytes = self._average(self._capture_bytes, bytes_written)
+        self._save_times.append(time.monotonic())
+
+    def probe(self, folder: Path, force: bool=False) -> Optional[float]:
+        """
+        Measures the write bandwidth of the volume holding a folder, at most once per probe_interval.
+
+        A file of PROBE_BYTES random bytes, which file system compression cannot shrink, is written
+        to the folder, synced to the disk and deleted. Runs on the save thread, between captures.
+
+        Args:
+            folder (Path): An existing folder on the volume.
+            force (bool, optional): Probe even if the last probe was less than probe_interval ago.
+                Defaults to False.
+        Returns:
+            float: The measured bandwidth in bytes per second, or None if no probe was due or it failed.
+        """
+        now = time.monotonic()
+        if not force and self._last_probe is not None and now - self._last_probe < self.probe_interval:
+            return None
+        self._last_probe = now
+        if self._probe_data is None:
+            self._probe_data = os.urandom(PROBE_CHUNK_BYTES)
+        path = Path(folder) / PROBE_NAME
+        try:
+            start = time.perf_counter()
+            with open(path, "wb") as file:
+                for _ in range(PROBE_BYTES // PROBE_CHUNK_BYTES):
+                    file.write(self._probe_data)
+                file.flush()
+                os.fsync(file.fileno())
+            seconds = time.perf_counter() - start
+        except OSError:
+            return None
+        finally:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        bandwidth = PROBE_BYTES / max(seconds, 1e-6)
+        self._bandwidth = self._average(self._bandwidth, bandwidth)
+        return bandwidth
+
+    def _average(self, average: Optional[float], value: float) -> float:
+        return value if average is None else (1 - self.smoothing) * average + self.smoothing * value
+
+    def status(self, folder: Path, estimated_bytes: int) -> DiskStatus:
+        """
+        Returns the capacity of the volume holding a folder.
+
+        Args:
+            folder (Path): The save folder; it does not need to exist yet.
+            estimated_bytes (int): The worst-case size of a capture, from estimate_capture_bytes.
+        Returns:
+            DiskStatus: The capacity and projections.
+        """
+        existing = Path(folder)
+        while not existing.exists() and existing != existing.parent:
+            existing = existing.parent
+        free_bytes = shutil.disk_usage(existing).free
+        required_bytes = estimated_bytes + self.reserve_bytes
+
+        capture_bytes = self._capture_bytes or estimated_bytes
+        remaining_captures = max(0, int((free_bytes - self.reserve_bytes) // capture_bytes))
+        seconds_to_full = None
+        if len(self._save_times) >= 2:
+            pace = (self._save_times[-1] - self._save_times[0]) / (len(self._save_times) - 1)
+            seconds_to_full = remaining_captures * pace
+        return DiskStatus(free_bytes, required_bytes, remaining_captures, seconds_to_full, self._bandwidth,
+                          fits=free_bytes >= required_bytes, low=remaining_captures < self.warn_captures)
+
+
+def format_status(status: DiskStatus) -> str:
+    """
+    Formats a disk status for the status bar, e.g. "Disk: 120.5 GB free, ~2400 captures, ~6 h 20 min, 180 MB/s".
+    """
+    parts = [f"Disk: {status.free_bytes / 1e9:.1f} GB free", f"~{status.remaining_captures} captures"]
+    if status.seconds_to_full is not None:
+        hours, minutes = divmod(int(status.seconds_to_full // 60), 60)
+        parts.append(f"~{hours} h {minutes} min" if hours else f"~{minutes} min")
+    if status.bandwidth is not None:
+        parts.append(f"{status.bandwidth / 1e6:.0f} MB/s")
+    return ", ".join(parts)
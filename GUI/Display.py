@@ -0,0 +1,189 @@
+import numpy as np
+import pyzed.sl as sl
+from Trace import tracer
+from Utils import BufferPool, normal_map, sobel_filter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+class DisplaySources:
+    """
+    The SDK products available to display processors, retrieved at display resolution on demand.
+
+    Each product is retrieved at most once per grab, and only when a processor asks for it.
+
+    Sources:
+        - image: The left RGB image (BGRA).
+        - depth_image: The SDK depth visualization (BGRA).
+        - display_cloud: The XYZ point cloud.
+
+    Methods:
+        get(names, timestamp): Returns the requested products of the grab with the given timestamp.
+        resize(display_size): Changes the resolution the products are retrieved at.
+    """
+    def __init__(self, zed: sl.Camera, display_size: sl.Resolution):
+        self.zed = zed
+        self.resize(display_size)
+
+    def resize(self, display_size: sl.Resolution):
+        """
+        Reallocates the products for a new display resolution.
+
+        Args:
+            display_size (sl.Resolution): The resolution to retrieve the products at.
+        """
+        self.display_size = display_size
+        width, height = display_size.width, display_size.height
+        self._sources = {
+            "image": (sl.Mat(width, height, sl.MAT_TYPE.U8_C4), self._retrieve_view(sl.VIEW.LEFT)),
+            "depth_image": (sl.Mat(width, height, sl.MAT_TYPE.U8_C4), self._retrieve_view(sl.VIEW.DEPTH)),
+            "display_cloud": (sl.Mat(width, height, sl.MAT_TYPE.F32_C4), self._retrieve_measure(sl.MEASURE.XYZ)),
+        }
+        self._timestamps: Dict[str, int] = {}
+
+    def _retrieve_view(self, view: sl.VIEW) -> Callable[[sl.Mat], None]:
+        return lambda mat: self.zed.retrieve_image(mat, view, sl.MEM.CPU, self.display_size)
+
+    def _retrieve_measure(self, measure: sl.MEASURE) -> Callable[[sl.Mat], None]:
+        return lambda mat: self.zed.retrieve_measure(mat, measure, sl.MEM.CPU, self.display_size)
+
+    def get(self, names: Iterable[str], timestamp: int) -> Dict[str, np.ndarray]:
+        """
+        Returns the requested products, retrieving those not yet retrieved for this grab.
+
+        Args:
+            names (Iterable[str]): The product names.
+            timestamp (int): The timestamp of the current grab, in nanoseconds.
+        Returns:
+            Dict[str, np.ndarray]: Views of the products by name, valid until the next retrieval.
+        """
+        products = {}
+        for name in names:
+            mat, retrieve = self._sources[name]
+            if self._timestamps.get(name) != timestamp:
+                with tracer.span(f"retrieve {name}", "retrieve"):
+                    retrieve(mat)
+                self._timestamps[name] = timestamp
+            products[name] = mat.get_data(deep_copy=False)
+        return products
+
+
+class DisplayProcessor:
+    """
+    Base class of display modes.
+
+    A processor declares the SDK products it requires and the display parameters it depends on.
+    Its output is cached by frame timestamp and parameters, so repainting or switching back to a
+    mode within the same frame never recomputes it.
+
+    Attributes:
+        requires (Tuple[str, ...]): The DisplaySources products the processor needs.
+        colormap (bool): Whether the preview should apply a colormap to the output.
+        expensive (bool): Whether the mode may be suspended when the frame loop is overloaded.
+
+    Methods:
+        parameters(params): Returns the values of the display parameters the output depends on.
+        compute(inputs, params, pool): Computes the output image.
+        output(timestamp, sources, params, pool): Returns the cached or newly computed output.
+        invalidate(): Drops the cached output.
+    """
+    requires: Tuple[str, ...] = ()
+    colormap = False
+    expensive = False
+
+    def __init__(self):
+        self._key = None
+        self._output: Optional[np.ndarray] = None
+
+    def parameters(self, params: dict) -> tuple:
+        """
+        Returns the values of the display parameters the output depends on.
+        """
+        return ()
+
+    def compute(self, inputs: Dict[str, np.ndarray], params: dict, pool: BufferPool) -> np.ndarray:
+        """
+        Computes the output image from the required products.
+        """
+        raise NotImplementedError
+
+    def output(self, timestamp: int, sources: Callable[[Iterable[str]], Dict[str, np.ndarray]],
+               params: dict, pool: BufferPool) -> np.ndarray:
+        """
+        Returns the output for a frame, computing it only if the frame or parameters changed.
+
+        Args:
+            timestamp (int): The timestamp of the frame, in nanoseconds.
+            sources (Callable): Returns the required products by name when called with their names.
+            params (dict): The current display parameters.
+            pool (BufferPool): Pool providing intermediate and output buffers.
+        Returns:
+            np.ndarray: The BGRA or grayscale image to display.
+        Raises:
+            ValueError: If a display parameter is invalid.
+        """
+        key = (timestamp, self.parameters(params))
+        if key != self._key:
+            self._output = self.compute(sources(self.requires), params, pool)
+            self._key = key
+        return self._output
+
+    def invalidate(self):
+        """
+        Drops the cached output, which may be a view of a source that is being reallocated.
+        """
+        self._key = None
+        self._output = None
+
+
+class ViewProcessor(DisplayProcessor):
+    """
+    Displays an SDK product as is.
+    """
+    def __init__(self, source: str, colormap: bool=False):
+        super().__init__()
+        self.requires = (source,)
+        self.colormap = colormap
+
+    def compute(self, inputs: Dict[str, np.ndarray], params: dict, pool: BufferPool) -> np.ndarray:
+        return inputs[self.requires[0]]
+
+
+class SobelProcessor(DisplayProcessor):
+    """
+    Displays the Sobel gradient magnitude of the depth visualization.
+    """
+    requires = ("depth_image",)
+    expensive = True
+
+    def parameters(self, params: dict) -> tuple:
+        return (float(params["sobel_power"]),)
+
+    def compute(self, inputs: Dict[str, np.ndarray], params: dict, pool: BufferPool) -> np.ndarray:
+        return sobel_filter(inputs["depth_image"], power=float(params["sobel_power"]), pool=pool)
+
+
+class NormalsProcessor(DisplayProcessor):
+    """
+    Displays the color-coded surface normals of the point cloud.
+    """
+    requires = ("display_cloud",)
+    expensive = True
+
+    def compute(self, inputs: Dict[str, np.ndarray], params: dict, pool: BufferPool) -> np.ndarray:
+        return normal_map(inputs["display_cloud"], pool=pool)
+
+
+def create_display_processors() -> Dict[str, DisplayProcessor]:
+    """
+    Creates the display processors, keyed by the display format name shown in the GUI.
+
+    Returns:
+        Dict[str, DisplayProcessor]: The display processors, in display order.
+    """
+    return {
+        "RGB": ViewProcessor("image"),
+        "Depth": ViewProcessor("depth_image"),
+        "Depth Color": ViewProcessor("depth_image", colormap=True),
+        "Sobel": SobelProcessor(),
+        "Normals": NormalsProcessor(),
+    }
@@ -0,0 +1,242 @@
+import argparse
+import numpy as np
+from pathlib import Path
+from Storage import load_sparse_array
+from typing import BinaryIO, Iterator, List, Tuple
+
+
+# Binary record layout shared by the PLY and PCD writers
+PLY_DTYPE = np.dtype([("x", "<f4"), ("y", "<f4"), ("z", "<f4"),
+                      ("red", "u1"), ("green", "u1"), ("blue", "u1")])
+PCD_DTYPE = np.dtype([("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("rgb", "<u4")])
+
+# Voxel indices are packed into one int64 key, 21 bits per axis, when they fit
+VOXEL_BITS = 21
+VOXEL_OFFSET = 1 << (VOXEL_BITS - 1)
+# Voxel indices beyond this cannot be computed exactly from float coordinates
+MAX_VOXEL_INDEX = 1 << 52
+
+
+def iter_valid_points(point_cloud: np.ndarray, chunk_rows: int=64) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yields the valid points of an organized XYZRGBA point cloud in chunks of rows.
+
+    Only one chunk of valid points is held in memory at a time, so the point cloud can be a
+    memory-mapped array.
+
+    Args:
+        point_cloud (np.ndarray): The (H x W x 4) float32 XYZRGBA point cloud.
+        chunk_rows (int, optional): The number of rows per chunk. Defaults to 64.
+    Yields:
+        Tuple[np.ndarray, np.ndarray]: The (N x 3) float32 XYZ coordinates and (N x 4) uint8 RGBA
+        colors of the valid points in the chunk.
+    """
+    for start in range(0, point_cloud.shape[0], chunk_rows):
+        chunk = np.asarray(point_cloud[start:start + chunk_rows]).reshape(-1, 4)
+        valid = np.isfinite(chunk[:, 2])
+        points = chunk[valid]
+        if points.size == 0:
+            continue
+        # The color channel holds the RGBA bytes reinterpreted as a float
+        colors = np.ascontiguousarray(points[:, 3]).view(np.uint8).reshape(-1, 4)
+        yield points[:, :3], colors
+
+
+def _sum_by_index(index: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """
+    Sums the rows of values that share the same index.
+    """
+    return np.stack([np.bincount(index, weights=column, minlength=size) for column in values.T], axis=1)
+
+
+def _unique_voxels(index: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the unique rows of (N x 3) voxel indices in lexicographic order, with the inverse and counts.
+
+    Indices within 21 bits per axis are packed into one int64 key, which is much faster to sort;
+    otherwise, e.g. for voxels far smaller than the extent of the cloud, the rows are compared.
+    """
+    if index.min() >= -VOXEL_OFFSET and index.max() < VOXEL_OFFSET:
+        shifted = index + VOXEL_OFFSET
+        key = (shifted[:, 0] << (2 * VOXEL_BITS)) | (shifted[:, 1] << VOXEL_BITS) | shifted[:, 2]
+        _, first, inverse, count = np.unique(key, return_index=True, return_inverse=True, return_counts=True)
+        return index[first], inverse.reshape(-1), count
+    unique, inverse, count = np.unique(index, axis=0, return_inverse=True, return_counts=True)
+    return unique, inverse.reshape(-1), count
+
+
+def voxel_downsample(point_cloud: np.ndarray, voxel_size: float, chunk_rows: int=64) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Downsamples a point cloud to the centroid and mean color of the points in each voxel.
+
+    Points are reduced per chunk and the partial sums are merged at the end, so memory use scales
+    with the number of occupied voxels rather than the number of points.
+
+    Args:
+        point_cloud (np.ndarray): The (H x W x 4) float32 XYZRGBA point cloud.
+        voxel_size (float): The voxel edge length, in coordinate units.
+        chunk_rows (int, optional): The number of rows per chunk. Defaults to 64.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (M x 3) float32 voxel centroids and (M x 4) uint8 colors.
+    Raises:
+        ValueError: If the voxel size is not positive, or so small that the voxel indices of the
+            points cannot be computed.
+    """
+    if not voxel_size > 0:
+        raise ValueError(f"Voxel size must be positive, got {voxel_size}")
+    keys, sums, counts = [], [], []
+    for points, colors in iter_valid_points(point_cloud, chunk_rows):
+        scaled = np.floor(points / voxel_size)
+        if not np.all(np.abs(scaled) < MAX_VOXEL_INDEX):
+            raise ValueError(f"Voxel size {voxel_size} is too small for the extent of the point cloud")
+        unique, inverse, count = _unique_voxels(scaled.astype(np.int64))
+        values = np.hstack([points.astype(np.float64), colors.astype(np.float64)])
+        keys.append(unique)
+        sums.append(_sum_by_index(inverse, values, len(unique)))
+        counts.append(count)
+    if not keys:
+        return np.empty((0, 3), np.float32), np.empty((0, 4), np.uint8)
+
+    # Merge the partial sums of voxels that appear in several chunks
+    unique, inverse, _ = _unique_voxels(np.concatenate(keys))
+    total = _sum_by_index(inverse, np.concatenate(sums), len(unique))
+    count = np.bincount(inverse, weights=np.concatenate(counts))
+    mean = total / count[:, None]
+    return mean[:, :3].astype(np.float32), np.round(mean[:, 3:]).astype(np.uint8)
+
+
+def _write_ply_header(file: BinaryIO, count: int):
+    """
+    Writes a binary little-endian PLY header for XYZRGB vertices.
+    """
+    header = (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        f"element vertex {count}\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        "property uchar red\n"
+        "property uchar green\n"
+        "property uchar blue\n"
+        "end_header\n"
+    )
+    file.write(header.encode("ascii"))
+
+
+def _write_pcd_header(file: BinaryIO, count: int):
+    """
+    Writes a binary PCD header for XYZRGB points.
+    """
+    header = (
+        "# .PCD v0.7 - Point Cloud Data file format\n"
+        "VERSION 0.7\n"
+        "FIELDS x y z rgb\n"
+        "SIZE 4 4 4 4\n"
+        "TYPE F F F U\n"
+        "COUNT 1 1 1 1\n"
+        f"WIDTH {count}\n"
+        "HEIGHT 1\n"
+        "VIEWPOINT 0 0 0 1 0 0 0\n"
+        f"POINTS {count}\n"
+        "DATA binary\n"
+    )
+    file.write(header.encode("ascii"))
+
+
+def _write_records(file: BinaryIO, points: np.ndarray, colors: np.ndarray, pcd: bool):
+    """
+    Writes points in the PLY or PCD binary record layout.
+    """
+    records = np.empty(len(points), dtype=PCD_DTYPE if pcd else PLY_DTYPE)
+    records["x"], records["y"], records["z"] = points[:, 0], points[:, 1], points[:, 2]
+    colors = colors.astype(np.uint32)
+    if pcd:
+        records["rgb"] = (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+    else:
+        records["red"], records["green"], records["blue"] = colors[:, 0], colors[:, 1], colors[:, 2]
+    file.write(records.tobytes())
+
+
+def export_point_cloud(point_cloud: np.ndarray, path: Path, voxel_size: float=0.0, chunk_rows: int=64) -> int:
+    """
+    Writes the valid points of an organized point cloud to a binary PLY or PCD file.
+
+    Without downsampling, the valid points are counted in a first pass and streamed to the file in
+    chunks in a second pass, so no full copy of the point cloud is made.
+
+    Args:
+        point_cloud (np.ndarray): The (H x W x 4) float32 XYZRGBA point cloud.
+        path (Path): The output file; the format is chosen from its suffix (.ply or .pcd).
+        voxel_size (float, optional): Voxel edge length for downsampling, in coordinate units.
+            Defaults to 0.0 (no downsampling).
+        chunk_rows (int, optional): The number of rows per chunk. Defaults to 64.
+    Returns:
+        int: The number of points written.
+    Raises:
+        ValueError: If the file suffix is not .ply or .pcd, or the voxel size is too small for the
+            point cloud (see voxel_downsample).
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in (".ply", ".pcd"):
+        raise ValueError(f"Unsupported point cloud format: {path.suffix}")
+    pcd = suffix == ".pcd"
+    write_header = _write_pcd_header if pcd else _write_ply_header
+
+    if voxel_size > 0:
+        points, colors = voxel_downsample(point_cloud, voxel_size, chunk_rows)
+        with path.open("wb") as file:
+            write_header(file, len(points))
+            _write_records(file, points, colors, pcd)
+        return len(points)
+
+    count = 0
+    for start in range(0, point_cloud.shape[0], chunk_rows):
+        count += int(np.count_nonzero(np.isfinite(point_cloud[start:start + chunk_rows, :, 2])))
+    with path.open("wb") as file:
+        write_header(file, count)
+        for points, colors in iter_valid_points(point_cloud, chunk_rows):
+            _write_records(file, points, colors, pcd)
+    return count
+
+
+def convert_clouds(folder: Path, fmt: str="ply", voxel_size: float=0.0, overwrite: bool=False) -> List[Path]:
+    """
+    Converts every CLOUD_*.npy and CLOUD_*.sparse.npz file below a folder to PLY or PCD.
+
+    .npy arrays are memory-mapped, so converting does not load whole point clouds into memory.
+    The output is written next to each source file.
+
+    Args:
+        folder (Path): The subject folder (or any folder) to search.
+        fmt (str, optional): The output format, "ply" or "pcd". Defaults to "ply".
+        voxel_size (float, optional): Voxel edge length for downsampling. Defaults to 0.0.
+        overwrite (bool, optional): Overwrite existing output files. Defaults to False.
+    Returns:
+        List[Path]: The files that were written.
+    """
+    written = []
+    sources = list(Path(folder).rglob("CLOUD_*.npy")) + list(Path(folder).rglob("CLOUD_*.sparse.npz"))
+    for source in sorted(sources):
+        sparse = source.name.endswith(".sparse.npz")
+        stem = source.name[:-len(".sparse.npz")] if sparse else source.stem
+        target = source.with_name(f"{stem}.{fmt}")
+        if target.exists() and not overwrite:
+            continue
+        point_cloud = load_sparse_array(source) if sparse else np.load(source, mmap_mode="r")
+        export_point_cloud(point_cloud, target, voxel_size)
+        written.append(target)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert captured point clouds to PLY or PCD.")
+    parser.add_argument("folder", type=Path, help="Folder to search for CLOUD_* point clouds")
+    parser.add_argument("--format", choices=["ply", "pcd"], default="ply", help="Output format")
+    parser.add_argument("--voxel-size", type=float, default=0.0,
+                        help="Voxel size for downsampling, in coordinate units (0 to disable)")
+    parser.add_argument("--overwrite", action="store_true", help="Overwrite existing output files")
+    args = parser.parse_args()
+    for path in convert_clouds(args.folder, args.format, args.voxel_size, args.overwrite):
+        print(f"Wrote {path}")
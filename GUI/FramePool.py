@@ -0,0 +1,184 @@
+import numpy as np
+import threading
+import pyzed.sl as sl
+from contextlib import contextmanager
+from Trace import tracer
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class FrameSet:
+    """
+    The full-resolution products of a single grab from the ZED camera.
+
+    All Mats in a frame set and its timestamp are always written together by retrieve, so a
+    frame set is a consistent snapshot of one grab.
+
+    Attributes:
+        rgb_image (sl.Mat): The left RGB image.
+        depth_map_image (sl.Mat): The SDK depth visualization.
+        depth_map_zed (sl.Mat): The raw depth measure.
+        point_cloud_zed (sl.Mat): The XYZRGBA point cloud.
+        confidence_map (sl.Mat): The depth confidence measure, lower is more confident (1-100).
+        has_confidence (bool): Whether the confidence map was retrieved for this grab.
+        timestamp (sl.Timestamp): The image timestamp of the grab.
+        grab_time (int): time.perf_counter_ns() when the grab returned, set by the frame loop.
+        claims (int): The number of active claims; a claimed frame set is never written to.
+    """
+    # Array names used by consumers of frame sets, mapped to the Mat attributes
+    ARRAYS = {
+        "rgb": "rgb_image",
+        "depth_image": "depth_map_image",
+        "depth": "depth_map_zed",
+        "cloud": "point_cloud_zed",
+        "confidence": "confidence_map",
+    }
+
+    def __init__(self, resolution: sl.Resolution):
+        width, height = resolution.width, resolution.height
+        self.rgb_image = sl.Mat(width, height, sl.MAT_TYPE.U8_C4)
+        self.depth_map_image = sl.Mat(width, height, sl.MAT_TYPE.U8_C4)
+        self.depth_map_zed = sl.Mat(width, height, sl.MAT_TYPE.F32_C1)
+        self.point_cloud_zed = sl.Mat(width, height, sl.MAT_TYPE.F32_C4)
+        self.confidence_map = sl.Mat(width, height, sl.MAT_TYPE.F32_C1)
+        self.has_confidence = False
+        self.timestamp: Optional[sl.Timestamp] = None
+        self.grab_time = 0
+        self.claims = 0
+
+    def retrieve(self, zed: sl.Camera, resolution: sl.Resolution, confidence: bool=False):
+        """
+        Retrieves the products of the last grab into this frame set.
+
+        Args:
+            zed (sl.Camera): The camera that was grabbed.
+            resolution (sl.Resolution): The resolution to retrieve the images at.
+            confidence (bool, optional): Also retrieve the confidence map. Defaults to False.
+        """
+        with tracer.span("retrieve_image LEFT", "retrieve"):
+            zed.retrieve_image(self.rgb_image, sl.VIEW.LEFT, sl.MEM.CPU, resolution)
+        with tracer.span("retrieve_image DEPTH", "retrieve"):
+            zed.retrieve_image(self.depth_map_image, sl.VIEW.DEPTH, sl.MEM.CPU, resolution)
+        with tracer.span("retrieve_measure DEPTH", "retrieve"):
+            zed.retrieve_measure(self.depth_map_zed, sl.MEASURE.DEPTH)
+        with tracer.span("retrieve_measure XYZRGBA", "retrieve"):
+            zed.retrieve_measure(self.point_cloud_zed, sl.MEASURE.XYZRGBA)
+        if confidence:
+            with tracer.span("retrieve_measure CONFIDENCE", "retrieve"):
+                zed.retrieve_measure(self.confidence_map, sl.MEASURE.CONFIDENCE)
+        self.has_confidence = confidence
+        self.timestamp = zed.get_timestamp(sl.TIME_REFERENCE.IMAGE)
+
+    def get_arrays(self, names: Iterable[str], deep_copy: bool=False) -> Dict[str, np.ndarray]:
+        """
+        Returns the data of several Mats as NumPy arrays.
+
+        Args:
+            names (Iterable[str]): Array names from ARRAYS.
+            deep_copy (bool, optional): Copy the data instead of returning views. Copies stay valid
+                after the frame set is released. Defaults to False.
+        Returns:
+            Dict[str, np.ndarray]: The arrays by name.
+        """
+        return {name: getattr(self, self.ARRAYS[name]).get_data(deep_copy=deep_copy) for name in names}
+
+
+class FramePool:
+    """
+    A small pool of preallocated frame sets shared by the frame loop and captures.
+
+    The frame loop acquires a free frame set, retrieves a grab into it and publishes it as the
+    latest frame. Captures claim the latest frame set, which keeps the frame loop from writing
+    into it until the claim is released. Frame sets are swapped rather than copied.
+
+    Attributes:
+        frame_sets (List[FrameSet]): The preallocated frame sets.
+        latest (FrameSet): The most recently published frame set, or None.
+
+    Methods:
+        acquire(): Returns a frame set that is free to be written to.
+        publish(frame_set): Marks a frame set as the latest frame.
+        claim_latest(): Claims the latest frame set until it is released.
+        release(frame_set): Releases a claim on a frame set.
+        claim(): Context manager claiming the latest frame set.
+        resize(resolution): Reallocates the frame sets for a new resolution.
+    """
+    def __init__(self, resolution: sl.Resolution, size: int=3):
+        self._lock = threading.Lock()
+        self._size = size
+        self.frame_sets: List[FrameSet] = []
+        self.latest: Optional[FrameSet] = None
+        self.resize(resolution)
+
+    def resize(self, resolution: sl.Resolution):
+        """
+        Reallocates all frame sets for a new resolution.
+
+        Frame sets that are currently claimed stay valid for their holders.
+
+        Args:
+            resolution (sl.Resolution): The new image resolution.
+        """
+        with self._lock:
+            self.frame_sets = [FrameSet(resolution) for _ in range(self._size)]
+            self.latest = None
+
+    def acquire(self) -> Optional[FrameSet]:
+        """
+        Returns a frame set that is neither the latest frame nor claimed.
+
+        Returns:
+            FrameSet: A writable frame set, or None if every other frame set is claimed.
+        """
+        with self._lock:
+            for frame_set in self.frame_sets:
+                if frame_set is not self.latest and frame_set.claims == 0:
+                    return frame_set
+        return None
+
+    def publish(self, frame_set: FrameSet):
+        """
+        Marks a frame set as the latest frame.
+
+        Args:
+            frame_set (FrameSet): A frame set returned by acquire and filled by retrieve.
+        """
+        with self._lock:
+            self.latest = frame_set
+
+    def claim_latest(self) -> Optional[FrameSet]:
+        """
+        Claims the latest frame set until it is released with release.
+
+        Returns:
+            FrameSet: The latest frame set, or None if no frame has been published yet.
+        """
+        with self._lock:
+            frame_set = self.latest
+            if frame_set is not None:
+                frame_set.claims += 1
+        return frame_set
+
+    def release(self, frame_set: FrameSet):
+        """
+        Releases a claim on a frame set.
+
+        Args:
+            frame_set (FrameSet): A frame set returned by claim_latest.
+        """
+        with self._lock:
+            frame_set.claims -= 1
+
+    @contextmanager
+    def claim(self) -> Iterator[Optional[FrameSet]]:
+        """
+        Claims the latest frame set for the duration of the context.
+
+        Yields:
+            FrameSet: The latest frame set, or None if no frame has been published yet.
+        """
+        frame_set = self.claim_latest()
+        try:
+            yield frame_set
+        finally:
+            if frame_set is not None:
+                self.release(frame_set)
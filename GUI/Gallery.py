@@ -0,0 +1,248 @@
+import cv2
+import hashlib
+import numpy as np
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from PySide6.QtWidgets import QDialog, QDialogButtonBox, QListView, QListWidget, QListWidgetItem, QPushButton, QVBoxLayout
+from PySide6.QtCore import QSize, Qt, Signal
+from PySide6.QtGui import QIcon, QImage, QPixmap
+from Dataset import CaptureDataset, CaptureRecord
+from Dialogs import MessageDialog
+from typing import Dict, Optional
+
+
+class ThumbnailCache:
+    """
+    A bounded LRU cache of image thumbnails, kept in memory and persisted to disk.
+
+    Thumbnails are keyed by the source path, modification time and size, so a changed file
+    gets a new thumbnail and stale entries simply age out. The disk cache is pruned to the
+    least recently used entries using the cache files' modification times, which are
+    refreshed on every hit.
+
+    Attributes:
+        cache_dir (Path): The folder the thumbnails are persisted in.
+        size (int): The longest side of a thumbnail, in pixels.
+        max_memory (int): The maximum number of thumbnails kept in memory.
+        max_disk (int): The maximum number of thumbnails kept on disk.
+
+    Methods:
+        get(path): Returns the thumbnail for an image, generating it if needed. Thread-safe.
+        prune(): Removes the least recently used thumbnails beyond max_disk from disk.
+    """
+    def __init__(self, cache_dir: Path, size: int=192, max_memory: int=256, max_disk: int=4096):
+        self.cache_dir = Path(cache_dir)
+        self.size = size
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, path: Path) -> str:
+        """
+        Returns the cache key of an image file.
+        """
+        stat = path.stat()
+        return hashlib.sha1(f"{path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|{self.size}".encode()).hexdigest()
+
+    def get(self, path: Path) -> Optional[np.ndarray]:
+        """
+        Returns the thumbnail of an image, from memory, disk, or by decoding the image.
+
+        Args:
+            path (Path): The image file.
+        Returns:
+            np.ndarray: The BGR thumbnail, or None if the image cannot be read.
+        """
+        try:
+            key = self._key(path)
+        except OSError:
+            return None
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        cache_file = self.cache_dir / f"{key}.jpg"
+        thumbnail = cv2.imread(str(cache_file)) if cache_file.exists() else None
+        if thumbnail is not None:
+            os.utime(cache_file)
+        else:
+            image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            if image is None:
+                return None
+            scale = self.size / max(image.shape[:2])
+            thumbnail = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cv2.imwrite(str(cache_file), thumbnail, [cv2.IMWRITE_JPEG_QUALITY, 85])
+
+        with self._lock:
+            self._memory[key] = thumbnail
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+        return thumbnail
+
+    def prune(self):
+        """
+        Removes the least recently used thumbnails beyond max_disk from disk.
+        """
+        if not self.cache_dir.exists():
+            return
+        files = sorted(self.cache_dir.glob("*.jpg"), key=lambda file: file.stat().st_mtime, reverse=True)
+        for file in files[self.max_disk:]:
+            file.unlink(missing_ok=True)
+
+
+class GalleryDialog(QDialog):
+    """
+    A dialog listing the captures in a subject folder with their thumbnails.
+
+    Thumbnails are generated in a background thread pool and delivered to the dialog through the
+    thumbnail_ready signal, so the dialog opens immediately. The selected capture can be deleted,
+    or deleted and redone, which asks the main window to set the name and counter to that capture.
+
+    Attributes:
+        capture_deleted (Signal): Signal emitted with the name and counter of a deleted capture.
+        redo_requested (Signal): Signal emitted with the name and counter of a capture to redo.
+        thumbnail_ready (Signal): Signal emitted from the loader threads with a thumbnail.
+        cache (ThumbnailCache): The thumbnail cache.
+        records (Dict[str, CaptureRecord]): The listed captures by folder name.
+    """
+    capture_deleted = Signal(str, int)
+    redo_requested = Signal(str, int)
+    thumbnail_ready = Signal(str, object)
+
+    def __init__(self, folder_path: Path, cache: ThumbnailCache, workers: int=4):
+        super().__init__()
+        self.setWindowTitle(f"Captures - {folder_path.name}")
+        self.resize(900, 600)
+        self.cache = cache
+        self.records: Dict[str, CaptureRecord] = {}
+        self.items: Dict[str, QListWidgetItem] = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.futures = []
+        # Set when the dialog closes; workers check it under the lock before emitting
+        self._closed = False
+        self._closed_lock = threading.Lock()
+
+        # Capture List
+        self.capture_list = QListWidget()
+        self.capture_list.setViewMode(QListView.IconMode)
+        self.capture_list.setResizeMode(QListView.Adjust)
+        self.capture_list.setIconSize(QSize(cache.size, cache.size))
+        self.capture_list.setSpacing(8)
+        self.capture_list.setUniformItemSizes(True)
+
+        # Buttons
+        self.buttonBox = QDialogButtonBox(QDialogButtonBox.Close)
+        self.buttonBox.rejected.connect(self.reject)
+        self.delete_button = QPushButton("Delete")
+        self.delete_button.clicked.connect(self.delete_selected)
+        self.redo_button = QPushButton("Redo")
+        self.redo_button.clicked.connect(self.redo_selected)
+        self.buttonBox.addButton(self.delete_button, QDialogButtonBox.ActionRole)
+        self.buttonBox.addButton(self.redo_button, QDialogButtonBox.ActionRole)
+
+        # Layout
+        layout = QVBoxLayout()
+        layout.addWidget(self.capture_list)
+        layout.addWidget(self.buttonBox)
+        self.setLayout(layout)
+
+        self.thumbnail_ready.connect(self.set_thumbnail)
+        for record in CaptureDataset(folder_path):
+            item = QListWidgetItem(f"{record.name}_{str(record.counter).zfill(2)}")
+            item.setData(Qt.UserRole, record.filename)
+            self.capture_list.addItem(item)
+            self.records[record.filename] = record
+            self.items[record.filename] = item
+            self.futures.append(self.executor.submit(self._load_thumbnail, record))
+
+    def _load_thumbnail(self, record: CaptureRecord):
+        """
+        Loads the thumbnail of a capture on a worker thread.
+        """
+        if self._closed:
+            return
+        thumbnail = self.cache.get(record.path / f"RGB_{record.filename}.png")
+        with self._closed_lock:
+            if thumbnail is not None and not self._closed:
+                self.thumbnail_ready.emit(record.filename, thumbnail)
+
+    def set_thumbnail(self, filename: str, thumbnail: np.ndarray):
+        """
+        Sets the icon of a capture once its thumbnail is ready.
+
+        Args:
+            filename (str): The capture folder name.
+            thumbnail (np.ndarray): The BGR thumbnail.
+        """
+        item = self.items.get(filename)
+        if item is None:
+            return
+        rgb = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB)
+        height, width, _ = rgb.shape
+        image = QImage(rgb.data, width, height, 3 * width, QImage.Format_RGB888)
+        item.setIcon(QIcon(QPixmap.fromImage(image)))
+
+    def selected_record(self) -> Optional[CaptureRecord]:
+        """
+        Returns the selected capture, or None if nothing is selected.
+        """
+        item = self.capture_list.currentItem()
+        return None if item is None else self.records[item.data(Qt.UserRole)]
+
+    def _delete(self, record: CaptureRecord, action: str) -> bool:
+        """
+        Deletes a capture folder after confirmation.
+        """
+        dlg = MessageDialog(f"{action} {record.filename}? Its files will be deleted.", f"{action} Capture")
+        if not dlg.exec():
+            return False
+        shutil.rmtree(record.path)
+        self.capture_list.takeItem(self.capture_list.row(self.items.pop(record.filename)))
+        del self.records[record.filename]
+        return True
+
+    def delete_selected(self):
+        """
+        Deletes the selected capture.
+
+        Emits:
+            capture_deleted: Signal emitted with the name and counter of the deleted capture.
+        """
+        record = self.selected_record()
+        if record is not None and self._delete(record, "Delete"):
+            self.capture_deleted.emit(record.name, record.counter)
+
+    def redo_selected(self):
+        """
+        Deletes the selected capture and closes the dialog so it can be captured again.
+
+        Emits:
+            redo_requested: Signal emitted with the name and counter of the capture to redo.
+        """
+        record = self.selected_record()
+        if record is not None and self._delete(record, "Redo"):
+            self.redo_requested.emit(record.name, record.counter)
+            self.accept()
+
+    def done(self, result: int):
+        """
+        Stops loading thumbnails and prunes the disk cache when the dialog closes.
+
+        Thumbnails still being loaded are finished in the background, but never emitted, as the
+        dialog may be destroyed by then. (cancel_futures would need Python 3.9.)
+        """
+        with self._closed_lock:
+            self._closed = True
+        self.thumbnail_ready.disconnect(self.set_thumbnail)
+        for future in self.futures:
+            future.cancel()
+        self.executor.shutdown(wait=False)
+        self.cache.prune()
+        super().done(result)
@@ -0,0 +1,373 @@
+import cv2
+import numpy as np
+from PySide6.QtCore import QEvent, QObject, QPointF, Qt, Signal
+from PySide6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PySide6.QtWidgets import QWidget
+from FramePool import FramePool, FrameSet
+from typing import Callable, List, Optional, Tuple
+
+
+class PointCloudIndex:
+    """
+    A nearest-valid-point index over an organized (H x W x 4) point cloud.
+
+    The index is a label map assigning every pixel the nearest pixel with a finite depth, computed
+    with a single distance transform. It is built lazily on the first query, after which each
+    lookup is a constant-time array access, even at full 2K resolution.
+
+    Attributes:
+        point_cloud (np.ndarray): The XYZRGBA point cloud (not copied).
+
+    Methods:
+        nearest(row, col): Returns the nearest pixel with a valid point.
+        point(row, col): Returns the XYZ coordinates of the nearest valid point.
+    """
+    def __init__(self, point_cloud: np.ndarray):
+        self.point_cloud = point_cloud
+        self._labels: Optional[np.ndarray] = None
+        self._valid_indices: Optional[np.ndarray] = None
+
+    def _build(self):
+        """
+        Builds the nearest-valid-pixel label map.
+        """
+        valid = np.isfinite(self.point_cloud[:, :, 2])
+        self._valid_indices = np.flatnonzero(valid)
+        if self._valid_indices.size == 0:
+            return
+        # Zero (valid) pixels are labelled in raster order, matching flatnonzero
+        invalid = (~valid).astype(np.uint8)
+        _, self._labels = cv2.distanceTransformWithLabels(
+            invalid, cv2.DIST_L2, cv2.DIST_MASK_5, labelType=cv2.DIST_LABEL_PIXEL)
+
+    def nearest(self, row: int, col: int) -> Optional[Tuple[int, int]]:
+        """
+        Returns the pixel with a valid point nearest to a pixel.
+
+        Args:
+            row (int): The pixel row.
+            col (int): The pixel column.
+        Returns:
+            Tuple[int, int]: The row and column of the nearest valid pixel, or None if the cloud
+            has no valid points.
+        """
+        if self._valid_indices is None:
+            self._build()
+        if self._valid_indices.size == 0:
+            return None
+        height, width = self.point_cloud.shape[:2]
+        row = min(max(row, 0), height - 1)
+        col = min(max(col, 0), width - 1)
+        index = self._valid_indices[self._labels[row, col] - 1]
+        return divmod(int(index), width)
+
+    def point(self, row: int, col: int) -> Optional[np.ndarray]:
+        """
+        Returns the XYZ coordinates of the valid point nearest to a pixel.
+
+        Args:
+            row (int): The pixel row.
+            col (int): The pixel column.
+        Returns:
+            np.ndarray: The XYZ coordinates, or None if the cloud has no valid points.
+        """
+        pixel = self.nearest(row, col)
+        if pixel is None:
+            return None
+        return self.point_cloud[pixel[0], pixel[1], :3].astype(np.float64)
+
+
+def polygon_area(points: np.ndarray) -> float:
+    """
+    Computes the area of a planar 3D polygon using Newell's method.
+
+    Args:
+        points (np.ndarray): The (N x 3) polygon vertices in order.
+    Returns:
+        float: The polygon area, in squared coordinate units.
+    """
+    normal = np.cross(points, np.roll(points, -1, axis=0)).sum(axis=0)
+    return 0.5 * float(np.linalg.norm(normal))
+
+
+def fit_plane(points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fits a plane to 3D points by least squares.
+
+    The normal is oriented towards the camera (the origin of the point cloud).
+
+    Args:
+        points (np.ndarray): The (N x 3) points, N >= 3.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The plane centroid and unit normal.
+    """
+    centroid = points.mean(axis=0)
+    _, _, vh = np.linalg.svd(points - centroid)
+    normal = vh[2]
+    if np.dot(normal, -centroid) < 0:
+        normal = -normal
+    return centroid, normal
+
+
+def volume_above_plane(point_cloud: np.ndarray, pixels: np.ndarray, vertices: np.ndarray) -> float:
+    """
+    Estimates the volume enclosed between a polygon's best-fit plane and the surface above it.
+
+    The plane is fitted to the polygon vertices. The heights above the plane of all valid points
+    inside the image-space polygon are averaged, weighted by depth squared to account for the
+    footprint of a pixel growing with distance, and multiplied by the polygon area.
+
+    Args:
+        point_cloud (np.ndarray): The organized (H x W x 4) point cloud.
+        pixels (np.ndarray): The (N x 2) polygon vertices as (col, row) pixel coordinates.
+        vertices (np.ndarray): The (N x 3) polygon vertices as XYZ coordinates.
+    Returns:
+        float: The volume, in cubic coordinate units.
+    """
+    col0, row0 = pixels.min(axis=0)
+    col1, row1 = pixels.max(axis=0) + 1
+    mask = np.zeros((row1 - row0, col1 - col0), dtype=np.uint8)
+    cv2.fillPoly(mask, [(pixels - (col0, row0)).astype(np.int32)], 1)
+    xyz = point_cloud[row0:row1, col0:col1, :3][mask.astype(bool)]
+    xyz = xyz[np.isfinite(xyz[:, 2])].astype(np.float64)
+    if xyz.size == 0:
+        return 0.0
+    centroid, normal = fit_plane(vertices)
+    heights = np.clip((xyz - centroid) @ normal, 0, None)
+    weights = xyz[:, 2] ** 2
+    return polygon_area(vertices) * float(np.average(heights, weights=weights))
+
+
+def draw_overlay(painter: QPainter, points: List[Tuple[float, float]], rect: Tuple[float, float, float, float], closed: bool=False):
+    """
+    Draws measurement points and the lines between them.
+
+    Args:
+        painter (QPainter): The painter to draw with.
+        points (List[Tuple[float, float]]): The points in normalized image coordinates.
+        rect (Tuple[float, float, float, float]): The x, y, width and height of the image on the widget.
+        closed (bool, optional): Close the polygon. Defaults to False.
+    """
+    x, y, width, height = rect
+    polygon = QPolygonF([QPointF(x + u * width, y + v * height) for u, v in points])
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(QPen(QColor(255, 255, 0), 2))
+    if closed:
+        painter.drawPolygon(polygon)
+    else:
+        painter.drawPolyline(polygon)
+    for point in polygon:
+        painter.drawEllipse(point, 3, 3)
+
+
+class MeasurementController(QObject):
+    """
+    Handles mouse interaction with the preview for 3D measurements on the point cloud.
+
+    When a tool is active, the latest frame set is claimed and a PointCloudIndex over its point cloud
+    is built on the first query. While a Distance, Area or Volume measurement is in progress the claim
+    is kept, so that all of its points come from the same point cloud. Otherwise, as in Point mode,
+    the claim moves to the latest frame set whenever a newer one is published. The claim is released
+    when the tools are turned off.
+
+    Modes:
+        - Off: No measurement.
+        - Point: Hover to read XYZ.
+        - Distance: Click two points to measure the distance between them.
+        - Area: Click polygon vertices, right-click to measure the polygon area.
+        - Volume: Click polygon vertices, right-click to measure the volume above the polygon's plane.
+
+    Attributes:
+        measurement_changed (Signal): Signal emitted with a text readout of the measurement.
+        overlay_changed (Signal): Signal emitted with the picked points and whether they are closed.
+        mode (str): The active measurement mode.
+        units (str): The coordinate unit label used in readouts.
+    """
+    MODES = ["Off", "Point", "Distance", "Area", "Volume"]
+
+    measurement_changed = Signal(str)
+    overlay_changed = Signal(list, bool)
+
+    def __init__(self, frame_pool: FramePool, map_position: Callable, units: str="mm"):
+        """
+        Initializes the controller.
+
+        Args:
+            frame_pool (FramePool): The frame pool providing the point clouds.
+            map_position (Callable): Maps a widget position (QPoint) to normalized image coordinates,
+                or None if the position is outside of the image.
+            units (str, optional): The coordinate unit label. Defaults to "mm".
+        """
+        super().__init__()
+        self.frame_pool = frame_pool
+        self.map_position = map_position
+        self.units = units
+        self.mode = "Off"
+        self.frame_set: Optional[FrameSet] = None
+        self.index: Optional[PointCloudIndex] = None
+        self.points: List[Tuple[float, float]] = []
+        self.pixels: List[Tuple[int, int]] = []
+        self.vertices: List[np.ndarray] = []
+
+    def set_mode(self, mode: str):
+        """
+        Sets the measurement mode, claiming or releasing the point cloud as needed.
+
+        Args:
+            mode (str): One of MODES.
+        """
+        self.mode = mode
+        self.reset()
+        if mode == "Off":
+            self._release()
+            self.measurement_changed.emit("")
+
+    def reset(self):
+        """
+        Clears the picked points and claims the latest point cloud for the next measurement.
+        """
+        self.points, self.pixels, self.vertices = [], [], []
+        self.overlay_changed.emit([], False)
+        self._claim()
+
+    def _claim(self):
+        """
+        Claims the latest point cloud in place of the claimed one. Its index is built on the first query.
+        """
+        self._release()
+        if self.mode != "Off":
+            self.frame_set = self.frame_pool.claim_latest()
+            if self.frame_set is not None:
+                self.index = PointCloudIndex(self.frame_set.point_cloud_zed.get_data(deep_copy=False))
+
+    def _outdated(self) -> bool:
+        """
+        Returns whether a newer frame set than the claimed one has been published.
+        """
+        latest = self.frame_pool.latest
+        if latest is None or latest.timestamp is None:
+            return False
+        if self.frame_set is None:
+            return True
+        return latest.timestamp.get_nanoseconds() > self.frame_set.timestamp.get_nanoseconds()
+
+    def _in_progress(self) -> bool:
+        """
+        Returns whether points of an unfinished measurement have been picked.
+        """
+        if self.mode == "Distance":
+            return len(self.points) == 1
+        return bool(self.points)
+
+    def _release(self):
+        """
+        Releases the claimed frame set and drops the index.
+        """
+        if self.frame_set is not None:
+            self.frame_pool.release(self.frame_set)
+        self.frame_set = None
+        self.index = None
+
+    def _lookup(self, position) -> Optional[Tuple[Tuple[float, float], Tuple[int, int], np.ndarray]]:
+        """
+        Looks up the nearest valid point to a widget position.
+
+        Args:
+            position (QPoint): The widget position.
+        Returns:
+            Tuple: The normalized image coordinates, the (col, row) pixel and the XYZ point of the
+            nearest valid point, or None if there is none.
+        """
+        if self.index is None or (not self._in_progress() and self._outdated()):
+            self._claim()
+            if self.index is None:
+                return None
+        normalized = self.map_position(position)
+        if normalized is None:
+            return None
+        height, width = self.index.point_cloud.shape[:2]
+        pixel = self.index.nearest(int(normalized[1] * height), int(normalized[0] * width))
+        if pixel is None:
+            return None
+        row, col = pixel
+        xyz = self.index.point_cloud[row, col, :3].astype(np.float64)
+        return ((col + 0.5) / width, (row + 0.5) / height), (col, row), xyz
+
+    def format_point(self, xyz: np.ndarray) -> str:
+        """
+        Formats XYZ coordinates for display.
+
+        Args:
+            xyz (np.ndarray): The XYZ coordinates.
+        Returns:
+            str: The formatted coordinates.
+        """
+        return f"X: {xyz[0]:.1f}  Y: {xyz[1]:.1f}  Z: {xyz[2]:.1f} {self.units}"
+
+    def eventFilter(self, watched: QWidget, event: QEvent) -> bool:
+        """
+        Handles mouse moves and clicks on the preview while a tool is active.
+        """
+        if self.mode == "Off":
+            return False
+        if event.type() == QEvent.MouseMove:
+            self._hover(event.position().toPoint())
+        elif event.type() == QEvent.MouseButtonPress:
+            if event.button() == Qt.LeftButton:
+                self._click(event.position().toPoint())
+            elif event.button() == Qt.RightButton:
+                self._finish()
+            return True
+        return False
+
+    def _hover(self, position):
+        """
+        Reports the point under the cursor and the running measurement.
+        """
+        found = self._lookup(position)
+        if found is None:
+            return
+        _, _, xyz = found
+        text = self.format_point(xyz)
+        if self.mode == "Distance" and len(self.vertices) == 1:
+            text += f"  |  Distance: {np.linalg.norm(xyz - self.vertices[0]):.1f} {self.units}"
+        self.measurement_changed.emit(text)
+
+    def _click(self, position):
+        """
+        Adds the point under the cursor to the measurement.
+        """
+        if self.mode == "Point":
+            return
+        # A new measurement uses the latest point cloud
+        if not self.points or (self.mode == "Distance" and len(self.points) == 2):
+            self.reset()
+        found = self._lookup(position)
+        if found is None:
+            return
+        normalized, pixel, xyz = found
+        self.points.append(normalized)
+        self.pixels.append(pixel)
+        self.vertices.append(xyz)
+        self.overlay_changed.emit(list(self.points), False)
+        if self.mode == "Distance" and len(self.vertices) == 2:
+            distance = np.linalg.norm(self.vertices[1] - self.vertices[0])
+            self.measurement_changed.emit(f"Distance: {distance:.1f} {self.units}")
+
+    def _finish(self):
+        """
+        Completes a polygon measurement, or clears the points for the other tools.
+        """
+        if self.mode not in ("Area", "Volume") or len(self.vertices) < 3:
+            self.reset()
+            return
+        vertices = np.array(self.vertices)
+        self.overlay_changed.emit(list(self.points), True)
+        if self.mode == "Area":
+            text = f"Area: {polygon_area(vertices):.1f} {self.units}²"
+        else:
+            volume = volume_above_plane(self.index.point_cloud, np.array(self.pixels), vertices)
+            text = f"Volume: {volume:.1f} {self.units}³"
+        self.measurement_changed.emit(text)
+        # Keep the result on screen; the next click starts a new polygon
+        self.points, self.pixels, self.vertices = [], [], []
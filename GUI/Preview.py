@@ -0,0 +1,230 @@
+import numpy as np
+from OpenGL import GL
+from PySide6.QtGui import QPainter
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
+from Measure import draw_overlay
+from typing import List, Optional, Tuple
+
+
+# GLSL 1.20 keeps the shaders compatible with OpenGL 2.1 contexts, which includes
+# software renderers such as Mesa's llvmpipe on machines without a GPU.
+VERTEX_SHADER = """
+#version 120
+attribute vec2 a_position;
+uniform vec2 u_scale;
+varying vec2 v_texcoord;
+
+void main() {
+    // Image rows are stored top-down, so flip the vertical texture coordinate
+    v_texcoord = vec2((a_position.x + 1.0) * 0.5, (1.0 - a_position.y) * 0.5);
+    gl_Position = vec4(a_position * u_scale, 0.0, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D u_texture;
+uniform int u_swizzle;
+uniform int u_colormap;
+varying vec2 v_texcoord;
+
+vec3 jet(float x) {
+    return clamp(vec3(1.5 - abs(4.0 * x - 3.0),
+                      1.5 - abs(4.0 * x - 2.0),
+                      1.5 - abs(4.0 * x - 1.0)), 0.0, 1.0);
+}
+
+void main() {
+    vec4 texel = texture2D(u_texture, v_texcoord);
+    vec3 color = u_swizzle == 1 ? texel.bgr : texel.rgb;
+    if (u_colormap == 1) {
+        color = jet(color.r);
+    }
+    gl_FragColor = vec4(color, 1.0);
+}
+"""
+
+
+class PreviewWidget(QOpenGLWidget):
+    """
+    An OpenGL widget for displaying the camera feed.
+
+    Frames are uploaded into a persistent texture with glTexSubImage2D; the texture is only
+    reallocated when the frame size or channel count changes. The BGRA to RGBA swizzle,
+    aspect-preserving scaling and the optional depth colormap are done in the shader, so no
+    per-frame QImage or QPixmap is created.
+
+    Attributes:
+        frame (np.ndarray): The most recent frame, uploaded on the next paint.
+        colormap (bool): Whether to apply a colormap to the first channel of the frame.
+        overlay_points (List[Tuple[float, float]]): Measurement points in normalized image coordinates.
+        overlay_closed (bool): Whether the measurement points form a closed polygon.
+
+    Methods:
+        set_frame(frame, colormap): Sets the frame to display and schedules a repaint.
+        set_overlay(points, closed): Sets the measurement overlay.
+        image_rect(): Returns the rectangle the image is drawn in.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.frame: Optional[np.ndarray] = None
+        self.colormap = False
+        self._dirty = False
+        self._program = 0
+        self._texture = 0
+        self._vertex_buffer = 0
+        self._texture_shape = None
+        self.overlay_points: List[Tuple[float, float]] = []
+        self.overlay_closed = False
+
+    def set_frame(self, frame: np.ndarray, colormap: bool=False):
+        """
+        Sets the frame to display and schedules a repaint.
+
+        The frame is not copied; it is uploaded to the texture during the next paint.
+
+        Args:
+            frame (np.ndarray): A BGRA (H x W x 4) or grayscale (H x W) uint8 image.
+            colormap (bool, optional): Apply a colormap to the image. Defaults to False.
+        """
+        self.frame = frame
+        self.colormap = colormap
+        self._dirty = True
+        self.update()
+
+    def set_overlay(self, points: List[Tuple[float, float]], closed: bool=False):
+        """
+        Sets the measurement points drawn over the frame.
+
+        Args:
+            points (List[Tuple[float, float]]): The points in normalized image coordinates.
+            closed (bool, optional): Close the polygon. Defaults to False.
+        """
+        self.overlay_points = points
+        self.overlay_closed = closed
+        self.update()
+
+    def image_rect(self) -> Tuple[float, float, float, float]:
+        """
+        Returns the rectangle the current frame is drawn in.
+
+        Returns:
+            Tuple[float, float, float, float]: The x, y, width and height in widget pixels, or None
+            if there is no frame.
+        """
+        if self.frame is None:
+            return None
+        height, width = self.frame.shape[:2]
+        scale_x, scale_y = self._fit_scale(width, height)
+        rect_width, rect_height = self.width() * scale_x, self.height() * scale_y
+        return ((self.width() - rect_width) / 2, (self.height() - rect_height) / 2,
+                rect_width, rect_height)
+
+    def initializeGL(self):
+        """
+        Compiles the shader program and creates the texture and vertex buffer.
+        """
+        self._program = self._create_program()
+        self._texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._texture)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+
+        quad = np.array([-1.0, -1.0, 1.0, -1.0, -1.0, 1.0, 1.0, 1.0], dtype=np.float32)
+        self._vertex_buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._vertex_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, quad.nbytes, quad, GL.GL_STATIC_DRAW)
+        GL.glClearColor(0.0, 0.0, 0.0, 1.0)
+
+    def paintGL(self):
+        """
+        Uploads the latest frame, if any, and draws it scaled to fit the widget.
+        """
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+        if self.frame is None:
+            return
+        GL.glUseProgram(self._program)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._texture)
+        if self._dirty:
+            self._upload(self.frame)
+            self._dirty = False
+
+        height, width = self.frame.shape[:2]
+        scale_x, scale_y = self._fit_scale(width, height)
+        GL.glUniform2f(GL.glGetUniformLocation(self._program, "u_scale"), scale_x, scale_y)
+        GL.glUniform1i(GL.glGetUniformLocation(self._program, "u_texture"), 0)
+        GL.glUniform1i(GL.glGetUniformLocation(self._program, "u_swizzle"), int(self.frame.ndim == 3))
+        GL.glUniform1i(GL.glGetUniformLocation(self._program, "u_colormap"), int(self.colormap))
+
+        position = GL.glGetAttribLocation(self._program, "a_position")
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._vertex_buffer)
+        GL.glEnableVertexAttribArray(position)
+        GL.glVertexAttribPointer(position, 2, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
+        GL.glDrawArrays(GL.GL_TRIANGLE_STRIP, 0, 4)
+        GL.glDisableVertexAttribArray(position)
+
+        if self.overlay_points:
+            painter = QPainter(self)
+            draw_overlay(painter, self.overlay_points, self.image_rect(), self.overlay_closed)
+            painter.end()
+
+    def _upload(self, frame: np.ndarray):
+        """
+        Uploads a frame into the persistent texture, reallocating it only if its shape changed.
+
+        Args:
+            frame (np.ndarray): A BGRA (H x W x 4) or grayscale (H x W) uint8 image.
+        """
+        frame = np.ascontiguousarray(frame)
+        height, width = frame.shape[:2]
+        pixel_format = GL.GL_RGBA if frame.ndim == 3 else GL.GL_LUMINANCE
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+        if self._texture_shape != frame.shape:
+            GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, pixel_format, width, height, 0,
+                            pixel_format, GL.GL_UNSIGNED_BYTE, None)
+            self._texture_shape = frame.shape
+        GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, 0, 0, width, height,
+                           pixel_format, GL.GL_UNSIGNED_BYTE, frame)
+
+    def _fit_scale(self, width: int, height: int) -> tuple:
+        """
+        Computes the quad scale that fits an image into the widget while keeping its aspect ratio.
+
+        Args:
+            width (int): The image width in pixels.
+            height (int): The image height in pixels.
+        Returns:
+            tuple: The horizontal and vertical scale of the quad in normalized device coordinates.
+        """
+        widget_aspect = self.width() / max(self.height(), 1)
+        image_aspect = width / max(height, 1)
+        if image_aspect > widget_aspect:
+            return 1.0, widget_aspect / image_aspect
+        return image_aspect / widget_aspect, 1.0
+
+    @staticmethod
+    def _create_program() -> int:
+        """
+        Compiles and links the preview shader program.
+
+        Returns:
+            int: The OpenGL program handle.
+        Raises:
+            RuntimeError: If a shader fails to compile or the program fails to link.
+        """
+        program = GL.glCreateProgram()
+        for source, shader_type in ((VERTEX_SHADER, GL.GL_VERTEX_SHADER),
+                                    (FRAGMENT_SHADER, GL.GL_FRAGMENT_SHADER)):
+            shader = GL.glCreateShader(shader_type)
+            GL.glShaderSource(shader, source)
+            GL.glCompileShader(shader)
+            if not GL.glGetShaderiv(shader, GL.GL_COMPILE_STATUS):
+                raise RuntimeError(GL.glGetShaderInfoLog(shader).decode())
+            GL.glAttachShader(program, shader)
+        GL.glLinkProgram(program)
+        if not GL.glGetProgramiv(program, GL.GL_LINK_STATUS):
+            raise RuntimeError(GL.glGetProgramInfoLog(program).decode())
+        return program
@@ -0,0 +1,124 @@
+from typing import Optional
+
+
+class PreviewGovernor:
+    """
+    Degrades the preview when the frame loop exceeds its time budget, and restores it with headroom.
+
+    Each tick of the frame loop is split into capture work (grabbing and retrieving the full
+    resolution data that captures are saved from) and preview work (display processing and
+    drawing). Capture work is never reduced; only the preview adapts, through these levels:
+
+        0. Full quality.
+        1. Half preview resolution.
+        2. Half resolution, every second frame previewed.
+        3. Half resolution, every third frame previewed.
+        4. As 3, with expensive display modes suspended.
+
+    The governor steps one level down after the smoothed tick time has exceeded overload x budget
+    for degrade_after seconds, and one level up after it has stayed below headroom x budget for
+    restore_after seconds. A tick whose capture work alone used the whole budget skips the preview.
+
+    Attributes:
+        budget (float): The time available per tick, in seconds.
+        overload (float): Fraction of the budget above which the loop is overloaded.
+        headroom (float): Fraction of the budget below which quality is restored.
+        degrade_after (float): Seconds of overload before degrading one level.
+        restore_after (float): Seconds of headroom before restoring one level.
+        smoothing (float): Weight of the newest tick in the smoothed tick time (0-1).
+        level (int): The current level, 0 being full quality.
+
+    Methods:
+        should_render(capture_seconds): Returns whether to draw the preview this tick.
+        record(capture_seconds, preview_seconds, now): Updates the level with a tick's timings.
+    """
+    # (description, preview resolution scale, preview every n-th frame, suspend expensive modes)
+    LEVELS = (
+        ("Full quality", 1.0, 1, False),
+        ("Half resolution", 0.5, 1, False),
+        ("Half resolution, half frame rate", 0.5, 2, False),
+        ("Half resolution, third frame rate", 0.5, 3, False),
+        ("Half resolution, third frame rate, expensive modes suspended", 0.5, 3, True),
+    )
+
+    def __init__(self, budget: float, overload: float=0.9, headroom: float=0.5, degrade_after: float=0.5,
+                 restore_after: float=3.0, smoothing: float=0.2):
+        self.budget = budget
+        self.overload = overload
+        self.headroom = headroom
+        self.degrade_after = degrade_after
+        self.restore_after = restore_after
+        self.smoothing = smoothing
+        self.level = 0
+        self.tick_seconds = 0.0
+        self._ticks = 0
+        self._overloaded_since: Optional[float] = None
+        self._idle_since: Optional[float] = None
+
+    @property
+    def description(self) -> str:
+        """
+        The description of the current level.
+        """
+        return self.LEVELS[self.level][0]
+
+    @property
+    def scale(self) -> float:
+        """
+        The preview resolution scale of the current level.
+        """
+        return self.LEVELS[self.level][1]
+
+    @property
+    def suspend_expensive(self) -> bool:
+        """
+        Whether expensive display modes are suspended at the current level.
+        """
+        return self.LEVELS[self.level][3]
+
+    def should_render(self, capture_seconds: float) -> bool:
+        """
+        Returns whether to draw the preview this tick.
+
+        Args:
+            capture_seconds (float): The time the capture work of this tick took.
+        """
+        self._ticks += 1
+        if capture_seconds >= self.budget:
+            return False
+        return self._ticks % self.LEVELS[self.level][2] == 0
+
+    def record(self, capture_seconds: float, preview_seconds: float, now: float) -> bool:
+        """
+        Updates the smoothed tick time and changes the level if needed.
+
+        Args:
+            capture_seconds (float): The time the capture work of the tick took.
+            preview_seconds (float): The time the preview work of the tick took (0 if skipped).
+            now (float): The current monotonic time, in seconds.
+        Returns:
+            bool: True if the level changed.
+        """
+        tick = capture_seconds + preview_seconds
+        self.tick_seconds = (1 - self.smoothing) * self.tick_seconds + self.smoothing * tick
+
+        if self.tick_seconds > self.overload * self.budget:
+            self._idle_since = None
+            if self._overloaded_since is None:
+                self._overloaded_since = now
+            if now - self._overloaded_since >= self.degrade_after and self.level < len(self.LEVELS) - 1:
+                self.level += 1
+                self._overloaded_since = now
+                return True
+        elif self.tick_seconds < self.headroom * self.budget:
+            self._overloaded_since = None
+            if self._idle_since is None:
+                self._idle_since = now
+            if now - self._idle_since >= self.restore_after and self.level > 0:
+                self.level -= 1
+                self._idle_since = now
+                return True
+        else:
+            self._overloaded_since = None
+            self._idle_since = None
+        return False
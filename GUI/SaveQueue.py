@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+from pathlib import Path
+from PySide6.QtCore import QObject, Signal
+from Trace import tracer
+from typing import Callable, Optional
+
+
+class SaveQueue(QObject):
+    """
+    Writes captures on a background thread, in the order they were taken.
+
+    The GUI thread only claims the frame set of a capture and snapshots what the capture needs
+    (file names, save options, metadata) into a write function, so the frame loop keeps running
+    while the files are written. The write function keeps its frame set claimed until it returns.
+    At most max_pending captures are queued or being written, so captures faster than the disk
+    cannot claim every frame set; submit refuses captures beyond that.
+
+    Attributes:
+        save_finished (Signal): Signal emitted with the capture folder, the capture source and the
+            seconds taken to write it.
+        save_failed (Signal): Signal emitted with the capture folder, the capture source and the
+            error message.
+        max_pending (int): The maximum number of captures queued or being written.
+        idle_task (Callable[[Path], None]): Called on the save thread with the capture folder after a
+            capture is written and reported, when no other capture is queued. Not included in the
+            reported write time.
+
+    Methods:
+        submit(folder, write, source): Queues a capture.
+        wait(): Waits until all queued captures are written.
+        shutdown(): Writes the queued captures and stops the thread.
+    """
+    save_finished = Signal(str, str, float)
+    save_failed = Signal(str, str, str)
+
+    def __init__(self, max_pending: int=2):
+        super().__init__()
+        self.max_pending = max_pending
+        self.idle_task: Optional[Callable[[Path], None]] = None
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of captures queued or being written.
+        """
+        with self._lock:
+            return self._pending
+
+    @property
+    def full(self) -> bool:
+        """
+        Whether submit would refuse another capture.
+        """
+        return self.pending >= self.max_pending
+
+    def submit(self, folder: Path, write: Callable[[], None], source: str="manual") -> bool:
+        """
+        Queues a capture to be written on the save thread.
+
+        Args:
+            folder (Path): The capture folder, reported with the result.
+            write (Callable[[], None]): Writes the capture and releases its frame set.
+            source (str, optional): What triggered the capture, reported with the result.
+                Defaults to "manual".
+        Returns:
+            bool: False if max_pending captures are already pending; write is then not called.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="SaveQueue", daemon=True)
+            self._thread.start()
+        self._queue.put((Path(folder), write, source))
+        return True
+
+    def _run(self):
+        """
+        Writes queued captures until a None job is received.
+        """
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            folder, write, source = job
+            start = time.perf_counter()
+            try:
+                with tracer.span("save_capture", "save", folder=folder.name, source=source):
+                    write()
+            except Exception as e:
+                error = str(e)
+            else:
+                error = None
+            with self._lock:
+                self._pending -= 1
+            self._queue.task_done()
+            if error is None:
+                self.save_finished.emit(str(folder), source, time.perf_counter() - start)
+            else:
+                self.save_failed.emit(str(folder), source, error)
+            if self.idle_task is not None and self._queue.empty():
+                try:
+                    self.idle_task(folder)
+                except Exception as e:
+                    print(f"Save thread idle task failed: {e}")
+
+    def wait(self):
+        """
+        Blocks until all queued captures are written.
+        """
+        self._queue.join()
+
+    def shutdown(self):
+        """
+        Writes the queued captures and stops the save thread.
+        """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
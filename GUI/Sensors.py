@@ -0,0 +1,176 @@
+import numpy as np
+import pyzed.sl as sl
+import threading
+import time
+from pathlib import Path
+from Storage import SENSOR_DTYPE, write_log_header
+from typing import BinaryIO, Optional, Tuple
+
+
+def summarize_window(samples: np.ndarray, timestamp: int) -> dict:
+    """
+    Summarizes the motion in a sensor window, e.g. to reject captures taken while the rig moved.
+
+    Args:
+        samples (np.ndarray): The samples of the window.
+        timestamp (int): The image timestamp of the capture, in ns.
+    Returns:
+        dict: The number of samples, the window bounds relative to the image in ms, the peak angular
+            velocity in deg/s and the peak deviation of the acceleration magnitude from its median in m/s^2.
+    """
+    acceleration = np.linalg.norm(samples["acceleration"], axis=1)
+    return {
+        "samples": int(len(samples)),
+        "start_ms": float((samples["timestamp"][0] - timestamp) / 1e6),
+        "end_ms": float((samples["timestamp"][-1] - timestamp) / 1e6),
+        "max_angular_velocity": float(np.linalg.norm(samples["angular_velocity"], axis=1).max()),
+        "max_acceleration_deviation": float(np.abs(acceleration - np.median(acceleration)).max()),
+    }
+
+
+class SensorLogger:
+    """
+    Polls the camera's IMU, magnetometer and barometer at full rate on a background thread.
+
+    Samples go into a preallocated ring holding the last few seconds, from which the window around
+    a capture can be read. While a log is open, the samples are also appended to a compact binary
+    log (see Storage.read_sensor_log) in batches, each sample numbered by its index in the log.
+
+    Attributes:
+        zed (sl.Camera): The open camera.
+        capacity (int): The number of samples kept in the ring.
+        poll_interval (float): Seconds to sleep between polls; well below the IMU period.
+        log_path (Path): The open log file, or None.
+
+    Methods:
+        start(): Starts polling.
+        stop(): Stops polling and closes the log.
+        open_log(path): Starts a new log file.
+        window(timestamp, before, after): Returns the samples around a timestamp and their log index.
+    """
+    def __init__(self, zed: sl.Camera, capacity: int=8192, poll_interval: float=0.0005, flush_every: int=256):
+        self.zed = zed
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.flush_every = flush_every
+        self.log_path: Optional[Path] = None
+        self._ring = np.zeros(capacity, dtype=SENSOR_DTYPE)
+        self._count = 0
+        self._flushed = 0
+        self._log_start = 0
+        self._log: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Starts polling the sensors on a background thread.
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._poll_loop, name="SensorLogger", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops polling, writes the remaining samples and closes the log.
+        """
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._close_log()
+
+    def open_log(self, path: Path):
+        """
+        Closes the current log and starts appending new samples to a new log file.
+
+        Args:
+            path (Path): The log file to create.
+        """
+        with self._lock:
+            self._close_log()
+            self._log = open(path, "wb")
+            write_log_header(self._log)
+            self.log_path = Path(path)
+            self._flushed = self._log_start = self._count
+
+    def _close_log(self):
+        """
+        Writes the pending samples and closes the log. Called with the lock held.
+        """
+        if self._log is not None:
+            self._flush()
+            self._log.close()
+            self._log = None
+            self.log_path = None
+
+    def _flush(self):
+        """
+        Appends the samples not yet written to the log. Called with the lock held.
+        """
+        if self._log is None:
+            return
+        # Samples overwritten before they could be written are lost
+        start = max(self._flushed, self._count - self.capacity)
+        while start < self._count:
+            index = start % self.capacity
+            end = min(self._count, start + self.capacity - index)
+            self._log.write(self._ring[index:index + end - start].tobytes())
+            start = end
+        self._log.flush()
+        self._flushed = self._count
+
+    def _poll_loop(self):
+        """
+        Reads each new IMU sample into the ring until stopped.
+        """
+        data = sl.SensorsData()
+        last_timestamp = 0
+        while self._running:
+            if self.zed.get_sensors_data(data, sl.TIME_REFERENCE.CURRENT) == sl.ERROR_CODE.SUCCESS:
+                imu = data.get_imu_data()
+                timestamp = imu.timestamp.get_nanoseconds()
+                if timestamp != last_timestamp and timestamp != 0:
+                    last_timestamp = timestamp
+                    with self._lock:
+                        sample = self._ring[self._count % self.capacity]
+                        sample["timestamp"] = timestamp
+                        sample["acceleration"] = imu.get_linear_acceleration()
+                        sample["angular_velocity"] = imu.get_angular_velocity()
+                        sample["orientation"] = imu.get_pose().get_orientation().get()
+                        sample["magnetic_field"] = data.get_magnetometer_data().get_magnetic_field_calibrated()
+                        sample["pressure"] = data.get_barometer_data().pressure
+                        self._count += 1
+                        if self._count - self._flushed >= self.flush_every:
+                            self._flush()
+            time.sleep(self.poll_interval)
+
+    def window(self, timestamp: int, before: float=0.5, after: float=0.1) -> Tuple[np.ndarray, Optional[int]]:
+        """
+        Returns the samples in the ring around a timestamp, and writes pending samples to the log.
+
+        Samples after the timestamp are only those received so far.
+
+        Args:
+            timestamp (int): The image timestamp, in ns.
+            before (float, optional): Seconds before the timestamp. Defaults to 0.5.
+            after (float, optional): Seconds after the timestamp. Defaults to 0.1.
+        Returns:
+            Tuple[np.ndarray, Optional[int]]: A copy of the samples, and the index of the first of
+                them in the log, or None if no log is open.
+        """
+        with self._lock:
+            self._flush()
+            count = min(self._count, self.capacity)
+            first = self._count - count
+            indices = np.arange(first, self._count) % self.capacity
+            times = self._ring["timestamp"][indices]
+            start, end = np.searchsorted(times, [timestamp - int(before * 1e9), timestamp + int(after * 1e9)],
+                                         side="left")
+            samples = self._ring[indices[start:end]]
+            log_index = first + start - self._log_start if self._log is not None else None
+        if log_index is not None and log_index < 0:
+            samples, log_index = samples[-log_index:], 0
+        return samples, log_index
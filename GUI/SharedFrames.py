@@ -0,0 +1,458 @@
+import numpy as np
+import threading
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Fields of the header row of each slot
+SEQUENCE, TIMESTAMP, GRAB_TIME, CLAIMS, DISPLAY_WIDTH, DISPLAY_HEIGHT, HAS_CONFIDENCE = range(7)
+# Fields of the global header row
+LATEST, PUBLISHED, DROPPED = range(3)
+HEADER_FIELDS = 8
+# Sequence number of a slot that is being written
+WRITING = -1
+# Alignment of the arrays in shared memory, in bytes
+ALIGNMENT = 64
+
+
+def frame_layout(width: int, height: int, display_width: int, display_height: int) -> Dict[str, Tuple[tuple, str]]:
+    """
+    Returns the arrays of a frame slot: the FrameSet arrays at full resolution, and the display
+    products (see Display.DisplaySources) at up to the display resolution.
+
+    Args:
+        width (int): The image width.
+        height (int): The image height.
+        display_width (int): The largest display width.
+        display_height (int): The largest display height.
+    Returns:
+        Dict[str, Tuple[tuple, str]]: The shape and dtype of each array, by name.
+    """
+    return {
+        "rgb": ((height, width, 4), "u1"),
+        "depth_image": ((height, width, 4), "u1"),
+        "depth": ((height, width), "<f4"),
+        "cloud": ((height, width, 4), "<f4"),
+        "confidence": ((height, width), "<f4"),
+        "display_image": ((display_height, display_width, 4), "u1"),
+        "display_depth_image": ((display_height, display_width, 4), "u1"),
+        "display_cloud": ((display_height, display_width, 4), "<f4"),
+    }
+
+
+# Display products by DisplaySources name, and the slot arrays holding them
+DISPLAY_ARRAYS = {
+    "image": "display_image",
+    "depth_image": "display_depth_image",
+    "display_cloud": "display_cloud",
+}
+
+
+class FrameRing:
+    """
+    A ring of frame slots in shared memory, written by the camera process and read by the GUI.
+
+    Slots are handed over like the frame sets of a FramePool. The writer acquires a slot that is
+    neither the latest frame nor claimed, fills it and publishes it as the latest frame with an
+    increasing sequence number. Readers claim the latest slot, which keeps the writer out of it
+    until it is released, and read its arrays in place without copying. Slot selection, claims
+    and publishing are done under a lock shared by both processes; the arrays themselves are
+    written and read without it.
+
+    The process that creates the ring owns the shared memory and must unlink it with close.
+
+    Attributes:
+        layout (Dict[str, Tuple[tuple, str]]): The arrays of each slot (see frame_layout).
+        slots (int): The number of slots.
+        name (str): The name of the shared memory block, for attaching from another process.
+        header (np.ndarray): The global header row followed by one header row per slot.
+
+    Methods:
+        arrays(slot, display_size): Returns views of the arrays of a slot.
+        acquire(): Returns a slot that is free to be written to.
+        publish(slot, timestamp, grab_time, display_size, has_confidence): Marks a slot as the latest frame.
+        drop(): Counts a frame that was dropped because no slot was free.
+        claim_slot(): Claims the latest slot.
+        release_slot(slot): Releases a claim on a slot.
+        close(): Detaches from the shared memory, unlinking it if this process created it.
+    """
+    def __init__(self, layout: Dict[str, Tuple[tuple, str]], slots: int, lock, name: Optional[str]=None):
+        self.layout = layout
+        self.slots = slots
+        self._lock = lock
+        self._owner = name is None
+        header_bytes = (slots + 1) * HEADER_FIELDS * 8
+        self._arrays: Dict[str, Tuple[int, tuple, np.dtype]] = {}
+        offset = 0
+        for key, (shape, dtype) in layout.items():
+            dtype = np.dtype(dtype)
+            self._arrays[key] = (offset, tuple(shape), dtype)
+            offset += -(-int(np.prod(shape)) * dtype.itemsize // ALIGNMENT) * ALIGNMENT
+        self._slot_bytes = offset
+        self._data_offset = -(-header_bytes // ALIGNMENT) * ALIGNMENT
+        size = self._data_offset + slots * self._slot_bytes
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self.header = np.ndarray((slots + 1, HEADER_FIELDS), dtype=np.int64, buffer=self._shm.buf)
+        if self._owner:
+            self.header[:] = 0
+            self.header[0, LATEST] = -1
+
+    def arrays(self, slot: int, display_size: Optional[Tuple[int, int]]=None) -> Dict[str, np.ndarray]:
+        """
+        Returns views of the arrays of a slot.
+
+        The display products are views of the leading part of their arrays, shaped for the
+        display size the slot was (or is being) written at.
+
+        Args:
+            slot (int): The slot index.
+            display_size (Tuple[int, int], optional): The (width, height) of the display products.
+                Defaults to the size recorded in the slot header.
+        Returns:
+            Dict[str, np.ndarray]: The arrays by name.
+        """
+        if display_size is None:
+            display_size = (int(self.header[slot + 1, DISPLAY_WIDTH]), int(self.header[slot + 1, DISPLAY_HEIGHT]))
+        base = self._data_offset + slot * self._slot_bytes
+        views = {}
+        for key, (offset, shape, dtype) in self._arrays.items():
+            if key in DISPLAY_ARRAYS.values():
+                width, height = display_size
+                shape = (min(height, shape[0]), min(width, shape[1])) + shape[2:]
+            views[key] = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=base + offset)
+        return views
+
+    def acquire(self) -> Optional[int]:
+        """
+        Returns a slot that is neither the latest frame nor claimed, and marks it as being written.
+
+        Returns:
+            int: The slot index, or None if every other slot is claimed.
+        """
+        with self._lock:
+            latest = self.header[0, LATEST]
+            for slot in range(self.slots):
+                row = self.header[slot + 1]
+                if slot != latest and row[CLAIMS] == 0:
+                    row[SEQUENCE] = WRITING
+                    return slot
+        return None
+
+    def publish(self, slot: int, timestamp: int, grab_time: int, display_size: Tuple[int, int],
+                has_confidence: bool):
+        """
+        Marks a written slot as the latest frame.
+
+        Args:
+            slot (int): A slot returned by acquire.
+            timestamp (int): The image timestamp, in ns.
+            grab_time (int): time.perf_counter_ns() when the grab returned, for latency measurements.
+            display_size (Tuple[int, int]): The (width, height) the display products were written at.
+            has_confidence (bool): Whether the confidence map was written.
+        """
+        with self._lock:
+            row = self.header[slot + 1]
+            self.header[0, PUBLISHED] += 1
+            row[SEQUENCE] = self.header[0, PUBLISHED]
+            row[TIMESTAMP] = timestamp
+            row[GRAB_TIME] = grab_time
+            row[DISPLAY_WIDTH], row[DISPLAY_HEIGHT] = display_size
+            row[HAS_CONFIDENCE] = has_confidence
+            self.header[0, LATEST] = slot
+
+    def drop(self):
+        """
+        Counts a grabbed frame that was dropped because no slot was free.
+        """
+        with self._lock:
+            self.header[0, DROPPED] += 1
+
+    @property
+    def published(self) -> int:
+        """
+        The sequence number of the latest frame, 0 before the first.
+        """
+        return int(self.header[0, PUBLISHED])
+
+    def claim_slot(self) -> Optional[int]:
+        """
+        Claims the latest slot until it is released with release_slot.
+
+        Returns:
+            int: The slot index, or None if no frame has been published yet.
+        """
+        with self._lock:
+            slot = int(self.header[0, LATEST])
+            if slot < 0:
+                return None
+            self.header[slot + 1, CLAIMS] += 1
+        return slot
+
+    def release_slot(self, slot: int):
+        """
+        Releases a claim on a slot.
+        """
+        with self._lock:
+            self.header[slot + 1, CLAIMS] -= 1
+
+    def claimed(self) -> int:
+        """
+        Returns the number of active claims on all slots.
+        """
+        with self._lock:
+            return int(self.header[1:, CLAIMS].sum())
+
+    def close(self):
+        """
+        Detaches from the shared memory, and unlinks it if this process created the ring.
+
+        No views of the arrays may be used afterwards.
+        """
+        self.header = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views are still referenced; the memory is unmapped once they are collected
+            pass
+        if self._owner:
+            self._shm.unlink()
+
+
+class FrameTimestamp:
+    """
+    The image timestamp of a shared frame, with the accessors of sl.Timestamp used by the GUI.
+    """
+    __slots__ = ("nanoseconds",)
+
+    def __init__(self, nanoseconds: int):
+        self.nanoseconds = nanoseconds
+
+    def get_nanoseconds(self) -> int:
+        return self.nanoseconds
+
+    def get_milliseconds(self) -> int:
+        return self.nanoseconds // 1000000
+
+
+class _MatView:
+    """
+    An array of a shared frame, with the get_data accessor of sl.Mat used by the GUI.
+    """
+    __slots__ = ("_frame_set", "_name")
+
+    def __init__(self, frame_set: "SharedFrameSet", name: str):
+        self._frame_set = frame_set
+        self._name = name
+
+    def get_data(self, deep_copy: bool=False) -> np.ndarray:
+        array = self._frame_set.arrays[self._name]
+        return array.copy() if deep_copy else array
+
+
+class SharedFrameSet:
+    """
+    A frame slot of a FrameRing, presented like a FrameSet so that captures, measurements and
+    derived products work unchanged. The Mat attributes return views into shared memory.
+
+    Attributes:
+        ring (FrameRing): The ring holding the slot.
+        slot (int): The slot index.
+        arrays (Dict[str, np.ndarray]): Views of the slot arrays, by frame_layout name.
+        timestamp (FrameTimestamp): The image timestamp of the frame in the slot.
+        grab_time (int): time.perf_counter_ns() when the camera process grabbed the frame.
+        has_confidence (bool): Whether the confidence map was retrieved for this frame.
+    """
+    ARRAYS = {
+        "rgb": "rgb_image",
+        "depth_image": "depth_map_image",
+        "depth": "depth_map_zed",
+        "cloud": "point_cloud_zed",
+        "confidence": "confidence_map",
+    }
+
+    def __init__(self, ring: FrameRing, slot: int):
+        self.ring = ring
+        self.slot = slot
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.timestamp: Optional[FrameTimestamp] = None
+        self.grab_time = 0
+        self.has_confidence = False
+        for name, attribute in self.ARRAYS.items():
+            setattr(self, attribute, _MatView(self, name))
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reads the header of the slot and updates the views. Called when the slot is claimed.
+        """
+        row = self.ring.header[self.slot + 1]
+        self.timestamp = FrameTimestamp(int(row[TIMESTAMP]))
+        self.grab_time = int(row[GRAB_TIME])
+        self.has_confidence = bool(row[HAS_CONFIDENCE])
+        self.arrays = self.ring.arrays(self.slot)
+
+    def get_arrays(self, names: Iterable[str], deep_copy: bool=False) -> Dict[str, np.ndarray]:
+        """
+        Returns several arrays of the frame, as FrameSet.get_arrays.
+        """
+        return {name: self.arrays[name].copy() if deep_copy else self.arrays[name] for name in names}
+
+    def display(self, name: str) -> np.ndarray:
+        """
+        Returns a display product of the frame, by DisplaySources name.
+        """
+        return self.arrays[DISPLAY_ARRAYS[name]]
+
+
+class SharedFramePool:
+    """
+    The reading side of a FrameRing, with the claiming interface of FramePool.
+
+    Attributes:
+        ring (FrameRing): The attached ring.
+        frame_sets (List[SharedFrameSet]): One frame set per slot.
+
+    Methods:
+        claim_latest(): Claims the latest frame until it is released.
+        release(frame_set): Releases a claim.
+        claim(): Context manager claiming the latest frame.
+        resize(ring): Switches to a new ring, e.g. after the camera was reopened.
+    """
+    def __init__(self, ring: FrameRing):
+        self._lock = threading.Lock()
+        self._retired: List[FrameRing] = []
+        self.ring: Optional[FrameRing] = None
+        self.resize(ring)
+
+    def resize(self, ring: FrameRing):
+        """
+        Switches to a new ring. The previous ring is closed once all of its claims are released.
+
+        Args:
+            ring (FrameRing): The new ring.
+        """
+        with self._lock:
+            if self.ring is not None:
+                self._retired.append(self.ring)
+            self.ring = ring
+            self.frame_sets = [SharedFrameSet(ring, slot) for slot in range(ring.slots)]
+            self._close_retired()
+
+    def _close_retired(self):
+        """
+        Closes retired rings without claims. Called with the lock held.
+        """
+        for ring in list(self._retired):
+            if ring.claimed() == 0:
+                ring.close()
+                self._retired.remove(ring)
+
+    @property
+    def latest(self) -> Optional[SharedFrameSet]:
+        """
+        The latest published frame, or None before the first. Claim it before reading its arrays.
+        """
+        slot = int(self.ring.header[0, LATEST])
+        if slot < 0:
+            return None
+        frame_set = self.frame_sets[slot]
+        frame_set.timestamp = FrameTimestamp(int(self.ring.header[slot + 1, TIMESTAMP]))
+        return frame_set
+
+    def claim_latest(self) -> Optional[SharedFrameSet]:
+        """
+        Claims the latest frame until it is released with release.
+
+        Returns:
+            SharedFrameSet: The latest frame, or None if no frame has been published yet.
+        """
+        with self._lock:
+            slot = self.ring.claim_slot()
+            if slot is None:
+                return None
+            frame_set = self.frame_sets[slot]
+            frame_set.refresh()
+        return frame_set
+
+    def release(self, frame_set: SharedFrameSet):
+        """
+        Releases a claim on a frame, on the ring it was claimed from.
+        """
+        with self._lock:
+            frame_set.ring.release_slot(frame_set.slot)
+            if self._retired:
+                self._close_retired()
+
+    @contextmanager
+    def claim(self) -> Iterator[Optional[SharedFrameSet]]:
+        """
+        Claims the latest frame for the duration of the context.
+        """
+        frame_set = self.claim_latest()
+        try:
+            yield frame_set
+        finally:
+            if frame_set is not None:
+                self.release(frame_set)
+
+    def close(self):
+        """
+        Detaches from all rings, unlinking those created by this process.
+        """
+        with self._lock:
+            for ring in self._retired + [self.ring]:
+                ring.close()
+            self._retired = []
+
+
+class SharedDisplaySources:
+    """
+    The display products of the shown shared frame, with the interface of Display.DisplaySources.
+
+    The camera process retrieves every display product with each frame, so get only returns
+    views of the frame shown with show, which stays claimed until the next one is shown.
+
+    Attributes:
+        pool (SharedFramePool): The pool the shown frames are claimed from.
+        display_size (sl.Resolution): The resolution the products are requested at.
+        frame_set (SharedFrameSet): The shown frame, or None before the first.
+
+    Methods:
+        show(frame_set): Shows a claimed frame, releasing the previous one.
+        get(names, timestamp): Returns the requested products of the shown frame.
+        resize(display_size): Asks the camera process for products at a new resolution.
+    """
+    def __init__(self, pool: SharedFramePool, display_size, request_size: Callable[[Tuple[int, int]], None]):
+        self.pool = pool
+        self.display_size = display_size
+        self.frame_set: Optional[SharedFrameSet] = None
+        self._request_size = request_size
+
+    def show(self, frame_set: SharedFrameSet):
+        """
+        Shows a frame, taking over its claim. The previously shown frame is released.
+        """
+        if self.frame_set is not None:
+            self.pool.release(self.frame_set)
+        self.frame_set = frame_set
+
+    def get(self, names: Iterable[str], timestamp: int) -> Dict[str, np.ndarray]:
+        """
+        Returns the requested products of the shown frame. The timestamp is that of the shown frame.
+        """
+        return {name: self.frame_set.display(name) for name in names}
+
+    def resize(self, display_size):
+        """
+        Asks the camera process for products at a new resolution. Frames already published keep
+        the resolution they were written at.
+
+        Args:
+            display_size (sl.Resolution): The resolution to retrieve the products at.
+        """
+        self.display_size = display_size
+        self._request_size((display_size.width, display_size.height))
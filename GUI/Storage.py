@@ -0,0 +1,181 @@
+import json
+import numpy as np
+import struct
+from pathlib import Path
+from typing import BinaryIO, Union
+
+
+def save_compact_array(path: Union[Path, str], array: np.ndarray):
+    """
+    Saves an array to a compressed .npz file in a losslessly round-trippable form.
+
+    The bytes of each element are shuffled into separate planes before deflate compression, so the
+    slowly varying high bytes of float data compress together. On synthetic 2K depth maps and
+    point clouds this makes the files about a fifth smaller than compressing the raw elements.
+
+    Args:
+        path (Union[Path, str]): The output file. Written as given, without adding a suffix.
+        array (np.ndarray): The array to save.
+    """
+    array = np.ascontiguousarray(array)
+    # Copied, as a transposed view would be saved in Fortran order, i.e. unshuffled
+    shuffled = np.ascontiguousarray(array.reshape(-1).view(np.uint8).reshape(-1, array.dtype.itemsize).T)
+    with open(path, "wb") as file:
+        np.savez_compressed(file, data=shuffled, shape=np.array(array.shape), dtype=np.array(array.dtype.str))
+
+
+def load_compact_array(path: Union[Path, str]) -> np.ndarray:
+    """
+    Loads an array saved by save_compact_array.
+
+    Args:
+        path (Union[Path, str]): The .npz file.
+    Returns:
+        np.ndarray: The array, bit-identical to the one that was saved.
+    """
+    with np.load(path) as archive:
+        dtype = np.dtype(str(archive["dtype"]))
+        shape = tuple(archive["shape"])
+        data = np.ascontiguousarray(archive["data"].T)
+    return data.view(dtype).reshape(shape)
+
+
+def arrays_identical(a: np.ndarray, b: np.ndarray) -> bool:
+    """
+    Checks whether two arrays are bit-identical, including the payload of NaN values.
+
+    Args:
+        a (np.ndarray): The first array.
+        b (np.ndarray): The second array.
+    Returns:
+        bool: True if the arrays have the same dtype, shape and bytes.
+    """
+    if a is None or b is None or a.dtype != b.dtype or a.shape != b.shape:
+        return False
+    return np.array_equal(np.ascontiguousarray(a).view(np.uint8), np.ascontiguousarray(b).view(np.uint8))
+
+
+def save_sparse_array(path: Union[Path, str], array: np.ndarray, valid: np.ndarray):
+    """
+    Saves the valid pixels of an image-shaped array apart from the others, to a compressed .npz file.
+
+    The file holds a bit-packed (H x W) validity mask, the valid elements in row-major order and the
+    elements of the invalid pixels in row-major order. The invalid pixels of depth maps and point
+    clouds hold a few repeated codes (NaN, +inf and -inf) that compress to almost nothing once
+    separated from the valid ones, while any other data they carry, such as the color of a point
+    without depth, is kept. The array can be restored exactly by load_sparse_array.
+
+    Args:
+        path (Union[Path, str]): The output file. Written as given, without adding a suffix.
+        array (np.ndarray): The (H x W) or (H x W x C) array to save.
+        valid (np.ndarray): The (H x W) boolean mask of the pixels to store apart.
+    """
+    with open(path, "wb") as file:
+        np.savez_compressed(file, mask=np.packbits(valid), values=array[valid], invalid=array[~valid],
+                            shape=np.array(array.shape))
+
+
+def load_sparse_array(path: Union[Path, str]) -> np.ndarray:
+    """
+    Loads an array saved by save_sparse_array.
+
+    Files saved before the invalid pixels were stored hold only the valid pixels; their invalid
+    pixels are filled with NaN, so the +inf and -inf depth codes and the color of points without
+    depth are lost.
+
+    Args:
+        path (Union[Path, str]): The .npz file.
+    Returns:
+        np.ndarray: The dense array, bit-identical to the one that was saved.
+    """
+    with np.load(path) as archive:
+        shape = tuple(archive["shape"])
+        values = archive["values"]
+        invalid = archive["invalid"] if "invalid" in archive.files else np.nan
+        valid = np.unpackbits(archive["mask"], count=shape[0] * shape[1]).view(bool).reshape(shape[:2])
+    array = np.empty(shape, dtype=values.dtype)
+    array[valid] = values
+    array[~valid] = invalid
+    return array
+
+
+def encode_depth_mm(depth: np.ndarray, millimeters_per_unit: float=1.0) -> np.ndarray:
+    """
+    Encodes a float depth map as uint16 millimeters, with 0 marking invalid pixels.
+
+    Depths are rounded to the nearest millimeter. Pixels without a finite depth, or outside the
+    representable 1-65535 mm range, are stored as 0.
+
+    Args:
+        depth (np.ndarray): The (H x W) float32 depth map in coordinate units.
+        millimeters_per_unit (float, optional): Millimeters per coordinate unit. Defaults to 1.0.
+    Returns:
+        np.ndarray: The (H x W) uint16 depth map.
+    """
+    millimeters = np.multiply(depth, millimeters_per_unit, dtype=np.float32)
+    with np.errstate(invalid="ignore"):
+        valid = (millimeters >= 0.5) & (millimeters < 65535.5)
+    encoded = np.zeros(depth.shape, dtype=np.uint16)
+    np.rint(millimeters, out=millimeters)
+    encoded[valid] = millimeters[valid]
+    return encoded
+
+
+def decode_depth(encoded: np.ndarray, scale: float=1.0) -> np.ndarray:
+    """
+    Decodes a uint16 depth map written by encode_depth_mm, with NaN for invalid pixels.
+
+    Args:
+        encoded (np.ndarray): The (H x W) uint16 depth map.
+        scale (float, optional): Coordinate units per stored step (1 / millimeters_per_unit). Defaults to 1.0.
+    Returns:
+        np.ndarray: The (H x W) float32 depth map in coordinate units.
+    """
+    depth = np.multiply(encoded, scale, dtype=np.float32)
+    depth[encoded == 0] = np.nan
+    return depth
+
+
+# One sensor sample: the IMU reading with the latest magnetometer and barometer readings
+SENSOR_DTYPE = np.dtype([
+    ("timestamp", "<i8"),              # IMU timestamp, ns
+    ("acceleration", "<f4", (3,)),     # m/s^2
+    ("angular_velocity", "<f4", (3,)),  # deg/s
+    ("orientation", "<f4", (4,)),      # quaternion (x, y, z, w)
+    ("magnetic_field", "<f4", (3,)),   # uT
+    ("pressure", "<f4"),               # hPa
+])
+LOG_MAGIC = b"ZEDSENS1"
+
+
+def write_log_header(file: BinaryIO):
+    """
+    Writes the header of a sensor log: the magic bytes and the JSON description of a sample.
+    """
+    header = json.dumps({"dtype": SENSOR_DTYPE.descr}).encode()
+    file.write(LOG_MAGIC + struct.pack("<I", len(header)) + header)
+
+
+def read_sensor_log(path: Union[Path, str], mmap: bool=True) -> np.ndarray:
+    """
+    Reads a sensor log written by Sensors.SensorLogger.
+
+    Args:
+        path (Union[Path, str]): The .bin log file.
+        mmap (bool, optional): Memory-map the samples instead of reading them. Defaults to True.
+    Returns:
+        np.ndarray: The samples as a structured array of SENSOR_DTYPE.
+    Raises:
+        ValueError: If the file is not a sensor log.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"{path} is not a sensor log")
+        header_length, = struct.unpack("<I", file.read(4))
+        header = json.loads(file.read(header_length))
+    dtype = np.dtype([tuple(field) for field in header["dtype"]])
+    offset = len(LOG_MAGIC) + 4 + header_length
+    if mmap:
+        count = (Path(path).stat().st_size - offset) // dtype.itemsize
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+    return np.fromfile(path, dtype=dtype, offset=offset)
@@ -0,0 +1,213 @@
+import cv2
+import numpy as np
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Trace import tracer
+from typing import Optional, Tuple
+
+
+PAGE = b"""<!DOCTYPE html>
+<html>
+<head><title>ZED Camera Preview</title></head>
+<body style="margin:0;background:#000"><img src="/stream.mjpg" style="width:100%"></body>
+</html>
+"""
+
+
+class PreviewStreamer:
+    """
+    Serves the camera preview to other machines as an MJPEG stream over HTTP.
+
+    Frames are offered by the frame loop with publish. A single encoder thread resizes and encodes
+    each accepted frame once, and every client is sent the most recent encoded frame when it is
+    ready for one. A slow client therefore skips frames instead of buffering them, and frames are
+    dropped at the source while the encoder is busy or nobody is watching.
+
+    Endpoints:
+        - /: A page showing the stream.
+        - /stream.mjpg: The multipart MJPEG stream.
+        - /snapshot.jpg: The most recent frame.
+
+    Attributes:
+        host (str): The address to listen on.
+        port (int): The port to listen on.
+        width (int): The width of the streamed frames, in pixels.
+        quality (int): The JPEG quality (0-100).
+
+    Methods:
+        start(): Starts the server and encoder threads.
+        stop(): Stops the server and disconnects all clients.
+        publish(frame, colormap): Offers a frame for streaming.
+        clients: The number of connected stream clients.
+    """
+    def __init__(self, host: str="0.0.0.0", port: int=8080, width: int=640, quality: int=70):
+        self.host = host
+        self.port = port
+        self.width = width
+        self.quality = quality
+        self._condition = threading.Condition()
+        self._jpeg: Optional[bytes] = None
+        self._sequence = 0
+        self._clients = 0
+        self._running = False
+        self._encoding = False
+        self._staged: Optional[np.ndarray] = None
+        self._staged_colormap = False
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._threads = []
+
+    @property
+    def clients(self) -> int:
+        """
+        The number of connected stream clients.
+        """
+        return self._clients
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """
+        The address the server is bound to.
+        """
+        return self._server.server_address[:2]
+
+    def start(self):
+        """
+        Starts the HTTP server and the encoder thread.
+
+        Raises:
+            OSError: If the server cannot bind to the address.
+        """
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, name="PreviewStreamServer", daemon=True),
+            threading.Thread(target=self._encode_loop, name="PreviewStreamEncoder", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stops the server and encoder threads and disconnects all clients.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def publish(self, frame: np.ndarray, colormap: bool=False):
+        """
+        Offers a frame for streaming. Returns immediately.
+
+        The frame is dropped if nobody is watching or the previous frame is still being encoded.
+        Otherwise it is resized into a staging image, so the caller may reuse the frame's buffer.
+
+        Args:
+            frame (np.ndarray): A BGRA (H x W x 4) or grayscale (H x W) uint8 image.
+            colormap (bool, optional): Apply a colormap to the image. Defaults to False.
+        """
+        if self._clients == 0 or self._encoding or not self._running:
+            return
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        self._staged = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        self._staged_colormap = colormap
+        with self._condition:
+            self._encoding = True
+            self._condition.notify_all()
+
+    def _encode_loop(self):
+        """
+        Encodes staged frames to JPEG and hands them to the clients.
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._encoding or not self._running)
+                if not self._running:
+                    return
+            with tracer.span("encode_jpeg", "stream"):
+                image = self._staged
+                if image.ndim == 3:
+                    image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+                if self._staged_colormap:
+                    gray = image if image.ndim == 2 else image[:, :, 0]
+                    image = cv2.applyColorMap(np.ascontiguousarray(gray), cv2.COLORMAP_JET)
+                ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            with self._condition:
+                if ok:
+                    self._jpeg = jpeg.tobytes()
+                    self._sequence += 1
+                self._encoding = False
+                self._condition.notify_all()
+
+    def _next_frame(self, last_sequence: int) -> Tuple[Optional[bytes], int]:
+        """
+        Waits for a frame newer than last_sequence.
+
+        Returns:
+            Tuple[Optional[bytes], int]: The JPEG and its sequence number, or None if the server stopped.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence != last_sequence or not self._running)
+            if not self._running:
+                return None, last_sequence
+            return self._jpeg, self._sequence
+
+    def _make_handler(self):
+        streamer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/":
+                    self._send(200, "text/html", PAGE)
+                elif self.path == "/snapshot.jpg":
+                    if streamer._jpeg is None:
+                        self._send(503, "text/plain", b"No frame yet")
+                    else:
+                        self._send(200, "image/jpeg", streamer._jpeg)
+                elif self.path == "/stream.mjpg":
+                    self._stream()
+                else:
+                    self._send(404, "text/plain", b"Not found")
+
+            def _send(self, status: int, content_type: str, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.end_headers()
+                with streamer._condition:
+                    streamer._clients += 1
+                sequence = 0
+                try:
+                    while True:
+                        jpeg, sequence = streamer._next_frame(sequence)
+                        if jpeg is None:
+                            return
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+                        self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with streamer._condition:
+                        streamer._clients -= 1
+
+        return Handler
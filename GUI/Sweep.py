@@ -0,0 +1,235 @@
+import cv2
+import itertools
+import json
+import numpy as np
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Runtime parameters a sweep can vary, with their types. They apply from the next grab.
+RUNTIME_PARAMETERS = {
+    "enable_fill_mode": bool,
+    "confidence_threshold": int,
+    "texture_confidence_threshold": int,
+}
+
+
+def expand_grid(grid: Dict[str, list]) -> List[dict]:
+    """
+    Returns every combination of the values of a settings grid.
+
+    The last setting varies fastest, so settings that take effect instantly (runtime parameters)
+    are best listed last: consecutive steps then mostly differ in them and need no settling.
+
+    Args:
+        grid (Dict[str, list]): The values of each setting.
+    Returns:
+        List[dict]: One dict of settings per combination.
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def load_sweep(path: Union[Path, str], known_settings: Iterable[str]) -> Tuple[List[dict], dict]:
+    """
+    Reads the steps of a sweep from a JSON file.
+
+    The file holds an explicit list of steps, a grid expanded to every combination, or both, in
+    which case the grid steps follow the listed steps. It may also hold SettleDetector arguments:
+
+        {"grid": {"Exposure": [30, 60, 90], "confidence_threshold": [50, 100]},
+         "steps": [{"Exposure": -1, "Gain": -1}],
+         "settle": {"tolerance": 1.0, "max_frames": 90}}
+
+    Args:
+        path (Union[Path, str]): The sweep file.
+        known_settings (Iterable[str]): The setting names that may be used.
+    Returns:
+        Tuple[List[dict], dict]: The steps, and the SettleDetector arguments.
+    Raises:
+        ValueError: If the file has no steps or uses an unknown setting.
+    """
+    with open(path) as file:
+        sweep = json.load(file)
+    steps = list(sweep.get("steps", [])) + expand_grid(sweep.get("grid", {}))
+    if not steps:
+        raise ValueError(f"{path} defines no steps")
+    known_settings = set(known_settings)
+    for step in steps:
+        unknown = set(step) - known_settings
+        if unknown:
+            raise ValueError(f"Unknown settings in {path}: {', '.join(sorted(unknown))}")
+    return steps, dict(sweep.get("settle", {}))
+
+
+class SettleDetector:
+    """
+    Detects when the image has settled after the camera settings changed.
+
+    Auto exposure, gain and white balance take several frames to converge, and even manual
+    changes reach the image a few frames late. Each frame is reduced to a tiny thumbnail and
+    summarized by the mean and standard deviation of its color channels.
+
+    Frames that still show the old settings are stable too, so convergence only counts once some
+    statistic moved more than min_change away from the image before the change: the last frame
+    seen before reset, or the first frame after it if no frame was ever seen. The image has then settled
+    once every statistic stayed within tolerance over the last window frames since the change,
+    but not before min_frames frames. After max_frames frames the wait is given up, e.g. in a
+    moving scene or for a change that does not visibly alter the image.
+
+    Attributes:
+        size (Tuple[int, int]): The (width, height) of the thumbnails.
+        min_frames (int): Frames always waited after a change.
+        max_frames (int): Frames after which the wait is given up.
+        window (int): Consecutive frames whose statistics must agree.
+        tolerance (float): Maximum spread of each statistic over the window, in gray levels.
+        min_change (float): Change of a statistic from the image before the change that shows the
+            new settings reached the image, in gray levels.
+        frames (int): Frames seen since the last reset.
+        changed (bool): Whether the image moved away from the image before the change.
+        converged (bool): Whether the statistics converged, rather than max_frames being reached.
+
+    Methods:
+        reset(): Starts waiting for a new change to settle, from the last frame seen.
+        update(frame): Feeds a frame and returns whether the image has settled.
+    """
+    def __init__(self, size: Tuple[int, int]=(64, 36), min_frames: int=2, max_frames: int=90,
+                 window: int=3, tolerance: float=1.0, min_change: float=3.0):
+        self.size = size
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+        self.window = window
+        self.tolerance = tolerance
+        self.min_change = min_change
+        width, height = size
+        self._small = np.empty((height, width, 4), dtype=np.uint8)
+        self._stats = deque(maxlen=window)
+        self._baseline: Optional[np.ndarray] = None
+        self.reset()
+
+    def reset(self):
+        """
+        Starts waiting for a new change to settle. The last frame seen is the image before the change;
+        if no frame was seen since the previous reset, the image before that change is kept.
+        """
+        if self._stats:
+            self._baseline = self._stats[-1]
+        self._stats.clear()
+        self.frames = 0
+        self.changed = False
+        self.converged = False
+
+    def update(self, frame: np.ndarray) -> bool:
+        """
+        Feeds a frame and returns whether the image has settled.
+
+        Args:
+            frame (np.ndarray): A BGRA image at any resolution.
+        Returns:
+            bool: True once the image has settled or max_frames is reached.
+        """
+        self.frames += 1
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        mean, std = cv2.meanStdDev(self._small)
+        stats = np.concatenate([mean[:3, 0], std[:3, 0]])
+        if self._baseline is None:
+            self._baseline = stats
+        elif not self.changed and np.any(np.abs(stats - self._baseline) > self.min_change):
+            # Only frames showing the new settings count towards convergence
+            self.changed = True
+            self._stats.clear()
+        self._stats.append(stats)
+        if self.changed and len(self._stats) == self.window and self.frames >= self.min_frames:
+            stats = np.array(self._stats)
+            if np.all(stats.max(axis=0) - stats.min(axis=0) <= self.tolerance):
+                self.converged = True
+                return True
+        return self.frames >= self.max_frames
+
+
+class ParameterSweep:
+    """
+    Steps through a list of camera settings, waiting at each step only until the image has settled.
+
+    A step that changes only settings in instant_settings (runtime parameters, which apply from the
+    next grab) is ready on its first frame. Any other step waits for the settle detector.
+
+    Attributes:
+        steps (List[dict]): The settings of each step.
+        detector (SettleDetector): Decides when a step has settled.
+        instant_settings (Iterable[str]): Settings that need no settling.
+        index (int): The index of the current step, -1 before the first.
+        changed (List[str]): The settings changed by the current step.
+
+    Methods:
+        advance(): Moves to the next step and returns its settings, or None when done.
+        update(frame): Feeds a frame of the current step and returns whether it is ready to capture.
+        describe(): Returns the current step for the capture metadata.
+    """
+    def __init__(self, steps: List[dict], detector: SettleDetector,
+                 instant_settings: Iterable[str]=tuple(RUNTIME_PARAMETERS)):
+        self.steps = steps
+        self.detector = detector
+        self.instant_settings = set(instant_settings)
+        self.index = -1
+        self.changed: List[str] = []
+        self._ready = False
+        self._settled = False
+
+    @property
+    def current(self) -> Optional[dict]:
+        """
+        The settings of the current step, or None outside the sweep.
+        """
+        return self.steps[self.index] if 0 <= self.index < len(self.steps) else None
+
+    def advance(self) -> Optional[dict]:
+        """
+        Moves to the next step.
+
+        Returns:
+            dict: The settings of the new step, or None if the sweep is done.
+        """
+        previous = self.current or {}
+        self.index += 1
+        settings = self.current
+        if settings is None:
+            return None
+        self.changed = [key for key, value in settings.items() if previous.get(key) != value]
+        self.detector.reset()
+        self._ready = self._settled = False
+        return settings
+
+    def update(self, frame: np.ndarray) -> bool:
+        """
+        Feeds a frame grabbed after the current step was applied.
+
+        The frames waited and whether the image settled (rather than the wait being given up) are
+        recorded by describe.
+
+        Args:
+            frame (np.ndarray): A BGRA image at any resolution.
+        Returns:
+            bool: True once the step is ready to capture; stays True until the next advance.
+        """
+        if not self._ready:
+            if self.index > 0 and set(self.changed) <= self.instant_settings:
+                self._ready = self._settled = True
+            else:
+                self._ready = self.detector.update(frame)
+                self._settled = self.detector.converged
+        return self._ready
+
+    def describe(self) -> dict:
+        """
+        Returns the current step for the capture metadata.
+        """
+        return {
+            "step": self.index + 1,
+            "steps": len(self.steps),
+            "settings": dict(self.current),
+            "changed": list(self.changed),
+            "frames_waited": self.detector.frames,
+            "settled": self._settled,
+        }
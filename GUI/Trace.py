@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Union
+
+
+class _Span:
+    """
+    Records one complete event when its context exits.
+    """
+    __slots__ = ("_tracer", "_name", "_category", "_args", "_start")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: dict):
+        self._tracer = tracer
+        self._name = name
+        self._category = category
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self._tracer._record("X", self._name, self._category, self._start, self._args, dur=end - self._start)
+        return False
+
+
+class Tracer:
+    """
+    An opt-in recorder of timed spans, exported as Chrome Trace Event JSON.
+
+    Spans are recorded with the native ID of the thread they ran on, so overlapping work on the
+    GUI thread and worker threads lines up in Perfetto or chrome://tracing. Events are kept in a
+    bounded buffer that drops the oldest events. While disabled, span returns a shared no-op
+    context manager, so instrumented code pays only for one method call.
+
+    Attributes:
+        enabled (bool): Whether spans are recorded.
+        max_events (int): The maximum number of events kept in memory.
+
+    Methods:
+        enable(): Starts recording, clearing earlier events.
+        disable(): Stops recording, keeping the recorded events.
+        span(name, category, **args): Context manager timing a span.
+        instant(name, category, **args): Records an instant event.
+        save(path): Writes the recorded events as Chrome Trace Event JSON.
+    """
+    _NULL_SPAN = nullcontext()
+
+    def __init__(self, max_events: int=200000):
+        self.enabled = False
+        self.max_events = max_events
+        self._events = deque(maxlen=max_events)
+        self._thread_names: Dict[int, str] = {}
+        self._origin = time.perf_counter_ns()
+
+    def enable(self):
+        """
+        Starts recording, clearing earlier events.
+        """
+        self._events = deque(maxlen=self.max_events)
+        self._thread_names = {}
+        self._origin = time.perf_counter_ns()
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stops recording. The recorded events are kept until the next enable.
+        """
+        self.enabled = False
+
+    def span(self, name: str, category: str="app", **args):
+        """
+        Returns a context manager recording the time spent in its body.
+
+        Args:
+            name (str): The span name shown in the trace viewer.
+            category (str, optional): The event category. Defaults to "app".
+            **args: Extra values shown with the event.
+        """
+        if not self.enabled:
+            return self._NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def instant(self, name: str, category: str="app", **args):
+        """
+        Records an instant event, e.g. a trigger or a finished background task.
+        """
+        if self.enabled:
+            self._record("i", name, category, time.perf_counter_ns(), args, s="t")
+
+    def _record(self, phase: str, name: str, category: str, start: int, args: dict, **fields):
+        """
+        Appends an event for the current thread. deque.append is atomic, so no lock is needed.
+        """
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        event = {"name": name, "cat": category, "ph": phase, "ts": (start - self._origin) / 1000,
+                 "pid": os.getpid(), "tid": tid}
+        if "dur" in fields:
+            fields["dur"] /= 1000
+        event.update(fields)
+        if args:
+            event["args"] = args
+        self._events.append(event)
+
+    def save(self, path: Union[Path, str]) -> int:
+        """
+        Writes the recorded events as Chrome Trace Event JSON.
+
+        Args:
+            path (Union[Path, str]): The output .json file.
+        Returns:
+            int: The number of events written.
+        """
+        events = list(self._events)
+        metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                    for tid, name in list(self._thread_names.items())]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, file)
+        return len(events)
+
+
+# The tracer shared by the application and its worker threads
+tracer = Tracer()
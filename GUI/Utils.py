@@ -1,16 +1,57 @@
 import cv2
 import numpy as np
 import pyzed.sl as sl
-from typing import Union
+from typing import Dict, Optional, Tuple, Union
 
 
-def sobel_filter(img: np.ndarray, ksize: int=3, power: float=1.0) -> np.ndarray:
+class BufferPool:
+    """
+    A pool of named, preallocated NumPy buffers.
+
+    Buffers are allocated the first time they are requested and reused on every later request
+    with the same shape and dtype, so a steady-state frame loop does not allocate new arrays.
+
+    Methods:
+        get(name, shape, dtype): Returns the buffer for a name, allocating it if needed.
+        clear(): Releases all buffers.
+    """
+    def __init__(self):
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype: np.dtype=np.uint8) -> np.ndarray:
+        """
+        Returns the buffer registered under a name, (re)allocating it if its shape or dtype changed.
+
+        Parameters:
+            name (str): The name of the buffer.
+            shape (Tuple[int, ...]): The shape of the buffer.
+            dtype (np.dtype): The data type of the buffer. Default is np.uint8.
+        Returns:
+            np.ndarray: The buffer. Its contents are whatever was last written to it.
+        """
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+        return buffer
+
+    def clear(self):
+        """
+        Releases all buffers in the pool.
+        """
+        self._buffers.clear()
+
+
+def sobel_filter(img: np.ndarray, ksize: int=3, power: float=1.0, pool: Optional[BufferPool]=None) -> np.ndarray:
     """
     Applies the Sobel filter to an input image to detect edges.
 
     Parameters:
         img (np.ndarray): Input image in BGR format.
         ksize (int): Size of the extended Sobel kernel; it must be an odd number. Default is 3.
+        power (float): Power applied to the normalized gradient magnitude. Default is 1.0.
+        pool (BufferPool, optional): Pool providing the intermediate and output buffers. If given,
+            the returned array is owned by the pool and overwritten by the next call.
     Returns:
         np.ndarray: Output image with edges detected, normalized to the range [0, 255].
     Raises:
@@ -18,15 +59,78 @@ def sobel_filter(img: np.ndarray, ksize: int=3, power: float=1.0) -> np.ndarray:
     """
     if ksize % 2 == 0:
         raise ValueError("Kernel size must be an odd number")
-    
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=ksize)
-    sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=ksize)
-    sobel = np.sqrt(sobelx ** 2 + sobely ** 2)
-    sobel_norm = (255 * ((sobel/ sobel.max()) ** power)).astype(np.uint8)
+    if pool is None:
+        pool = BufferPool()
+
+    shape = img.shape[:2]
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=pool.get("sobel_gray", shape))
+    sobelx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, dst=pool.get("sobel_x", shape, np.float32), ksize=ksize)
+    sobely = cv2.Sobel(gray, cv2.CV_32F, 0, 1, dst=pool.get("sobel_y", shape, np.float32), ksize=ksize)
+    # Reuse the x gradient buffer for the magnitude
+    sobel = cv2.magnitude(sobelx, sobely, magnitude=sobelx)
+    sobel_max = float(sobel.max())
+    if sobel_max > 0:
+        np.multiply(sobel, 1.0 / sobel_max, out=sobel)
+    if power != 1.0:
+        np.power(sobel, power, out=sobel)
+    np.multiply(sobel, 255, out=sobel)
+    sobel_norm = pool.get("sobel", shape)
+    np.copyto(sobel_norm, sobel, casting="unsafe")
     return sobel_norm
 
 
+def normal_map(point_cloud: np.ndarray, pool: Optional[BufferPool]=None) -> np.ndarray:
+    """
+    Computes a color-coded surface normal map from an organized point cloud.
+
+    Normals are the cross product of the horizontal and vertical Sobel gradients of the XYZ
+    coordinates, computed with vectorized filters. They are shown in a viewer frame (x right,
+    y up, z towards the camera) mapped to RGB as (n + 1) / 2, assuming the default IMAGE
+    coordinate system of the ZED SDK. Pixels without a valid point are shown in neutral gray.
+
+    Parameters:
+        point_cloud (np.ndarray): The (H x W x 4) float32 XYZ or XYZRGBA point cloud.
+        pool (BufferPool, optional): Pool providing the intermediate and output buffers. If given,
+            the returned array is owned by the pool and overwritten by the next call.
+    Returns:
+        np.ndarray: The (H x W x 4) uint8 normal map in BGRA format.
+    """
+    if pool is None:
+        pool = BufferPool()
+    height, width = point_cloud.shape[:2]
+    dx = cv2.Sobel(point_cloud, cv2.CV_32F, 1, 0, dst=pool.get("normals_dx", (height, width, 4), np.float32), ksize=3)
+    dy = cv2.Sobel(point_cloud, cv2.CV_32F, 0, 1, dst=pool.get("normals_dy", (height, width, 4), np.float32), ksize=3)
+    normals = pool.get("normals", (height, width, 3), np.float32)
+    temp = pool.get("normals_temp", (height, width), np.float32)
+
+    # normal = dy x dx, which points towards the camera
+    for axis, (a, b) in enumerate(((1, 2), (2, 0), (0, 1))):
+        np.multiply(dy[:, :, a], dx[:, :, b], out=normals[:, :, axis])
+        np.multiply(dy[:, :, b], dx[:, :, a], out=temp)
+        np.subtract(normals[:, :, axis], temp, out=normals[:, :, axis])
+    square = pool.get("normals_square", (height, width), np.float32)
+    np.multiply(normals[:, :, 0], normals[:, :, 0], out=temp)
+    for axis in (1, 2):
+        np.multiply(normals[:, :, axis], normals[:, :, axis], out=square)
+        temp += square
+    np.sqrt(temp, out=temp)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(normals, temp[:, :, None], out=normals)
+    # Zero the normals of invalid points, with a pooled mask as np.nan_to_num allocates its own
+    invalid = pool.get("normals_invalid", (height, width, 3), np.bool_)
+    np.isfinite(normals, out=invalid)
+    np.logical_not(invalid, out=invalid)
+    np.copyto(normals, 0.0, where=invalid)
+
+    # Flip y and z into the viewer frame and map [-1, 1] to [0, 255]
+    normals *= np.array([127.5, -127.5, -127.5], dtype=np.float32)
+    normals += 127.5
+    output = pool.get("normals_bgra", (height, width, 4))
+    np.copyto(output[:, :, 2::-1], normals, casting="unsafe")
+    output[:, :, 3] = 255
+    return output
+
+
 def param2dict(param: Union[sl.InitParameters, sl.RuntimeParameters]) -> dict:
     """
     Converts a ZED SDK parameter object to a dictionary.
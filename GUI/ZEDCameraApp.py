@@ -1,22 +1,59 @@
+import argparse
+import statistics
 import sys
 import numpy as np
 import pyzed.sl as sl
 import cv2
 import json
-from PySide6.QtWidgets import QApplication, QComboBox, QFileDialog, QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QLineEdit, QToolBar, QHBoxLayout
+import time
+from collections import deque
+from functools import partial
+from datetime import datetime
+from PySide6.QtWidgets import QApplication, QCheckBox, QComboBox, QFileDialog, QMainWindow, QLabel, QPushButton, QVBoxLayout, QWidget, QLineEdit, QToolBar, QHBoxLayout
 from PySide6.QtCore import QTimer, Qt, Slot
-from PySide6.QtGui import QImage, QPixmap, QAction
+from PySide6.QtGui import QImage, QPainter, QPixmap, QAction
 from pathlib import Path
-from Dialogs import CameraSettingsDialog, ImageSavedDialog, RunTimeParamDialog, AutoCloseDialog, VideoSettingsDialog
-from Utils import sobel_filter, param2dict
-from typing import Dict
+from Dialogs import CameraSettingsDialog, RunTimeParamDialog, Toast, VideoSettingsDialog, SaveOptionsDialog, StreamSettingsDialog, AutoCaptureDialog
+from AutoCapture import StabilityDetector
+from CameraProcess import CameraProcess
+from Control import ControlRequest, ControlServer
+from Derived import DerivedProductStage
+from DiskMonitor import DiskMonitor, format_status
+from Export import export_point_cloud
+from Gallery import GalleryDialog, ThumbnailCache
+from FramePool import FramePool, FrameSet
+from Measure import MeasurementController, draw_overlay
+from Display import DisplaySources, create_display_processors
+from QoS import PreviewGovernor
+from SaveQueue import SaveQueue
+from Sensors import SensorLogger, summarize_window
+from SharedFrames import SharedDisplaySources, SharedFramePool
+from Stream import PreviewStreamer
+from Storage import encode_depth_mm, save_sparse_array
+from Sweep import RUNTIME_PARAMETERS, ParameterSweep, SettleDetector, load_sweep
+from Trace import tracer
+from Utils import BufferPool, param2dict
+from ZEDSource import ZEDSource, init_to_dict
+from typing import Dict, List, Optional, Tuple
+
+# The OpenGL preview is optional; fall back to a QLabel if PyOpenGL is unavailable
+try:
+    from Preview import PreviewWidget
+except ImportError:
+    PreviewWidget = None
 
 
 class ZEDCameraApp(QMainWindow):
     """
     A GUI application for viewing and saving images and depth maps from a ZED camera.
+
+    Args:
+        camera_process (bool, optional): Run the camera in a separate process that publishes frames
+            to shared memory (see CameraProcess), instead of grabbing on the GUI thread. Defaults to False.
+        control_port (int, optional): Serve the control API (see ControlServer) on this local port.
+            Defaults to None, for no control API.
     """
-    def __init__(self):
+    def __init__(self, camera_process: bool=False, control_port: Optional[int]=None):
         super().__init__()
         self.setWindowTitle("ZED Camera Viewer")
         self.setGeometry(100, 100, 400, 300)
@@ -33,41 +70,117 @@ class ZEDCameraApp(QMainWindow):
         self.init.depth_minimum_distance = 500
         self.init.depth_maximum_distance = 20000
         
-        # Depth estimation turns on positional tracking, set as static
-        tracking_params = sl.PositionalTrackingParameters()
-        tracking_params.set_as_static = True
-
-        # Open the ZED camera
-        if self.zed.open(self.init) != sl.ERROR_CODE.SUCCESS:
-            print("Failed to open ZED camera")
-            sys.exit(1)
-
-        # Enable Positional tracking (static)
-        if self.zed.enable_positional_tracking(tracking_params) != sl.ERROR_CODE.SUCCESS:
-            print("Failed to enable positional tracking")
-            sys.exit(1)
-
         # Set runtime parameters
         self.runtime_params = sl.RuntimeParameters(enable_fill_mode=False)
-        camera_info = self.zed.get_camera_information()
-        self.image_size = camera_info.camera_configuration.resolution
-        self.display_size = camera_info.camera_configuration.resolution
-        self.display_size.width //= 2
-        self.display_size.height //= 2
-
-        # Prepare Mat objects for displaying images
-        self.image_zed = sl.Mat(self.display_size.width, self.display_size.height, sl.MAT_TYPE.U8_C4)
-        self.depth_image_zed = sl.Mat(self.display_size.width, self.display_size.height, sl.MAT_TYPE.U8_C4)
-        # For Raw depth data
-        self.depth_map_zed = sl.Mat()
-        self.point_cloud_zed = sl.Mat()
-
-        # Mat objects for saving images
-        self.rgb_image = sl.Mat(self.image_size.width, self.image_size.height, sl.MAT_TYPE.U8_C4)
-        self.depth_map_image = sl.Mat(self.image_size.width, self.image_size.height, sl.MAT_TYPE.U8_C4)
+
+        # Captures are written on a background thread
+        self.save_queue = SaveQueue()
+
+        # Camera owned by a separate process, or None if the GUI grabs itself
+        self.camera_process: Optional[CameraProcess] = None
+        # IMU, magnetometer and barometer polled in the background; only available without a camera process
+        self.sensor_logger: Optional[SensorLogger] = None
+
+        if camera_process:
+            # The camera process keeps a frame slot per possible claim: the latest frame, the one
+            # being written, the displayed frame, a measurement and each pending save
+            self.camera_process = CameraProcess(ZEDSource, self.get_camera_process_settings(),
+                                                slots=4 + self.save_queue.max_pending)
+            try:
+                ring = self.camera_process.start()
+            except RuntimeError as e:
+                print(e)
+                sys.exit(1)
+        else:
+            # Depth estimation turns on positional tracking, set as static
+            tracking_params = sl.PositionalTrackingParameters()
+            tracking_params.set_as_static = True
+
+            # Open the ZED camera
+            if self.zed.open(self.init) != sl.ERROR_CODE.SUCCESS:
+                print("Failed to open ZED camera")
+                sys.exit(1)
+
+            # Enable Positional tracking (static)
+            if self.zed.enable_positional_tracking(tracking_params) != sl.ERROR_CODE.SUCCESS:
+                print("Failed to enable positional tracking")
+                sys.exit(1)
+
+            # Poll the IMU, magnetometer and barometer in the background; logged per subject folder
+            self.sensor_logger = SensorLogger(self.zed)
+            self.sensor_logger.start()
+
+        # Video settings: last applied snapshot and writes waiting for the next frame
+        self.video_settings: Dict[sl.VIDEO_SETTINGS, float] = {}
+        self.pending_video_settings: Dict[sl.VIDEO_SETTINGS, float] = {}
+
+        # Thumbnails for the capture gallery, kept between openings
+        self.thumbnail_cache = ThumbnailCache(Path.home() / ".cache" / "zed-gui" / "thumbnails")
+
+        # Additional products saved with each capture
+        self.save_options = SaveOptionsDialog.get_default_options()
+
+        # Derived products are generated in worker processes after each save
+        self.derived_stage = DerivedProductStage()
+
+        # Disk space and write bandwidth of captures
+        self.disk_monitor = DiskMonitor()
+
+        # Automatic capture when the scene becomes stable after a change
+        self.auto_capture_settings = AutoCaptureDialog.get_default_settings()
+        self.stability_detector = StabilityDetector(**self.auto_capture_settings)
+
+        # Optional MJPEG stream of the preview for other machines
+        self.stream_settings = StreamSettingsDialog.get_default_settings()
+        self.streamer: Optional[PreviewStreamer] = None
+
+        # Parameter sweep in progress, and the settings to restore when it ends
+        self.sweep: Optional[ParameterSweep] = None
+        self.sweep_restore: Tuple[Dict[str, float], dict] = ({}, {})
+
+        if self.camera_process is not None:
+            info = self.camera_process.info
+            self.image_size = sl.Resolution(info["width"], info["height"])
+            self.display_size = sl.Resolution(info["display_width"], info["display_height"])
+            fps = info["fps"]
+        else:
+            camera_info = self.zed.get_camera_information()
+            self.image_size = camera_info.camera_configuration.resolution
+            self.display_size = camera_info.camera_configuration.resolution
+            self.display_size.width //= 2
+            self.display_size.height //= 2
+            fps = camera_info.camera_configuration.fps
+
+        # Degrades the preview when the frame loop overruns the camera frame period
+        self.governor = PreviewGovernor(budget=1 / max(fps, 1))
+        self.display_processors = create_display_processors()
+        self.display_timestamp = None
+
+        if self.camera_process is not None:
+            # Frames are read in place from the camera process's shared memory ring
+            self.frame_pool = SharedFramePool(ring)
+            self.display_sources = SharedDisplaySources(
+                self.frame_pool, self.display_size, lambda size: self.camera_process.send("display_size", size))
+            self.camera_process.send("confidence", self.save_options["confidence"])
+        else:
+            # Display modes and the display resolution products they are computed from
+            self.display_sources = DisplaySources(self.zed, self.display_size)
+            # Full resolution images and raw depth data for saving, one set per grab. Besides the latest
+            # and the one being retrieved into, frame sets may be claimed by measurements and pending saves.
+            self.frame_pool = FramePool(self.image_size, size=3 + self.save_queue.max_pending)
+
+        # Preallocated buffers for display processing, reused every frame
+        self.buffer_pool = BufferPool()
+        self.qt_image: QImage = None
+        self.qt_image_buffer: np.ndarray = None
+        self.qt_pixmap = QPixmap()
 
         # GUI Elements - Image Display and save button
         self.image_label = QLabel("Camera Feed")
+        self.preview_widget = None
+        if PreviewWidget is not None:
+            self.preview_widget = PreviewWidget()
+            self.preview_widget.setMinimumSize(self.display_size.width, self.display_size.height)
         self.save_image_button = QPushButton("Save Image and Depth Map")
         self.save_image_button.setFixedHeight(self.save_image_button.sizeHint().height() * 2)
         
@@ -86,6 +199,39 @@ class ZEDCameraApp(QMainWindow):
         runtime_params_action = QAction("Runtime...", self)
         runtime_params_action.triggered.connect(self.open_runtime_params)
         settings_menu.addAction(runtime_params_action)
+        # Save Options Dialog
+        save_options_action = QAction("Save...", self)
+        save_options_action.triggered.connect(self.open_save_options)
+        settings_menu.addAction(save_options_action)
+        # Stream Settings Dialog
+        stream_settings_action = QAction("Stream...", self)
+        stream_settings_action.triggered.connect(self.open_stream_settings)
+        settings_menu.addAction(stream_settings_action)
+        # Auto Capture Settings Dialog
+        auto_capture_action = QAction("Auto Capture...", self)
+        auto_capture_action.triggered.connect(self.open_auto_capture_settings)
+        settings_menu.addAction(auto_capture_action)
+        captures_menu = menu.addMenu("&Captures")
+        # Capture Gallery Dialog
+        gallery_action = QAction("Gallery...", self)
+        gallery_action.triggered.connect(self.open_gallery)
+        captures_menu.addAction(gallery_action)
+        # Parameter Sweep
+        sweep_action = QAction("Run Sweep...", self)
+        sweep_action.triggered.connect(self.start_sweep)
+        captures_menu.addAction(sweep_action)
+        stop_sweep_action = QAction("Stop Sweep", self)
+        stop_sweep_action.triggered.connect(lambda: self.finish_sweep("Sweep stopped"))
+        captures_menu.addAction(stop_sweep_action)
+        debug_menu = menu.addMenu("&Debug")
+        # Timeline Tracing
+        self.trace_action = QAction("Record Trace", self)
+        self.trace_action.setCheckable(True)
+        self.trace_action.toggled.connect(self.toggle_trace)
+        debug_menu.addAction(self.trace_action)
+        save_trace_action = QAction("Save Trace...", self)
+        save_trace_action.triggered.connect(self.save_trace)
+        debug_menu.addAction(save_trace_action)
         
         # Toolbar
         # Subject Folder
@@ -127,9 +273,22 @@ class ZEDCameraApp(QMainWindow):
         # Image Display Format
         self.display_format_label = QLabel("Display Format: ")
         self.display_format_combo = QComboBox()
-        self.display_format_combo.addItems(["RGB", "Depth", "Sobel"])
+        self.display_format_combo.addItems(list(self.display_processors))
         self.display_format_combo.setCurrentIndex(0)
         self.display_format_combo.setFocusPolicy(Qt.NoFocus)
+        self.display_format_combo.currentTextChanged.connect(self.refresh_display)
+        self.sobel_power_text.textChanged.connect(self.refresh_display)
+
+        # Measurement Tools
+        self.measure_label = QLabel("Measure: ")
+        self.measure_combo = QComboBox()
+        self.measure_combo.addItems(MeasurementController.MODES)
+        self.measure_combo.setFocusPolicy(Qt.NoFocus)
+
+        # Auto Capture
+        self.auto_capture_checkbox = QCheckBox("Auto Capture")
+        self.auto_capture_checkbox.setFocusPolicy(Qt.NoFocus)
+        self.auto_capture_checkbox.toggled.connect(self.toggle_auto_capture)
 
         # Description Text Field
         self.description_label = QLabel("Description: ")
@@ -161,17 +320,43 @@ class ZEDCameraApp(QMainWindow):
         naming_toolbar.addSeparator()
         naming_toolbar.addWidget(self.sobel_power_label)
         naming_toolbar.addWidget(self.sobel_power_text)
+        naming_toolbar.addSeparator()
+        naming_toolbar.addWidget(self.measure_label)
+        naming_toolbar.addWidget(self.measure_combo)
+        naming_toolbar.addSeparator()
+        naming_toolbar.addWidget(self.auto_capture_checkbox)
 
         # Connect buttons
-        self.save_image_button.clicked.connect(self.save_images)
+        self.save_image_button.clicked.connect(lambda: self.save_images())
         self.save_image_button.setAutoDefault(True)
 
         # Layout
         layout = QVBoxLayout()
         layout.addLayout(self.description_layout)
-        layout.addWidget(self.image_label)
+        preview = self.image_label if self.preview_widget is None else self.preview_widget
+        layout.addWidget(preview)
         layout.addWidget(self.save_image_button)
 
+        # Measurement tools act on mouse events over the preview
+        self.measure_overlay = ([], False)
+        self.measurement = MeasurementController(self.frame_pool, self.preview_position, self.get_unit_label())
+        self.measurement.measurement_changed.connect(self.statusBar().showMessage)
+        self.disk_label = QLabel()
+        self.statusBar().addPermanentWidget(self.disk_label)
+        # Notifications are shown over the window without blocking the frame loop
+        self.toast = Toast(self)
+        self.derived_stage.product_finished.connect(self.on_product_finished)
+        self.derived_stage.product_failed.connect(self.on_product_failed)
+        self.save_queue.save_finished.connect(self.on_save_finished)
+        self.save_queue.save_failed.connect(self.on_save_failed)
+        # The disk is probed for its write bandwidth on the save thread, between captures
+        self.save_queue.idle_task = self.probe_disk
+        self.measurement.overlay_changed.connect(self.set_measure_overlay)
+        self.measure_combo.currentTextChanged.connect(self.measurement.set_mode)
+        self.image_label.setAlignment(Qt.AlignCenter)
+        preview.setMouseTracking(True)
+        preview.installEventFilter(self.measurement)
+
         central_widget = QWidget()
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
@@ -179,7 +364,30 @@ class ZEDCameraApp(QMainWindow):
         # Timer for updating frames
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frames)
-        self.timer.start(1000/60)  # 60fps
+        if self.camera_process is not None:
+            # Checking for a new frame is cheap, so poll often to keep the latency low
+            self.timer.start(5)
+        else:
+            self.timer.start(1000/60)  # 60fps
+
+        # Local control API for rig automation. Capture triggers wait for the first frame grabbed
+        # after them, and the time from trigger to grab is kept for the status command.
+        self.control_server: Optional[ControlServer] = None
+        self.pending_triggers: List[ControlRequest] = []
+        self.trigger_latencies = deque(maxlen=100)
+        self.latest_grab_time: Optional[int] = None
+        self.last_capture: Optional[dict] = None
+        # Capture folder being redone from the gallery, and the name and counter to restore after it
+        self.redo: Optional[Tuple[Path, str, str]] = None
+        self.capture_refusal = ""
+        if control_port is not None:
+            self.control_server = ControlServer(port=control_port)
+            self.control_server.request_received.connect(self.handle_control_request)
+            try:
+                self.control_server.start()
+            except OSError as e:
+                print(f"Could not start the control server on port {control_port}: {e}")
+                sys.exit(1)
 
     def update_frames(self):
         """
@@ -187,47 +395,227 @@ class ZEDCameraApp(QMainWindow):
 
         This method performs the following steps:
         1. Grabs a new frame from the ZED camera.
-        2. Retrieves the left view and depth view images from the camera.
-        3. Converts the retrieved images to OpenCV format.
-        4. Converts the OpenCV images to Qt format.
-        5. Displays the converted images in the GUI based on the selected display format.
+        2. Retrieves the full resolution data for saving into a free frame set.
+        3. Displays the selected display format with refresh_display, unless the preview governor
+           skips this frame.
+        4. Captures for control API triggers waiting for a frame grabbed after them.
+        5. Captures the current step of a running parameter sweep once the image has settled, or
+           triggers a capture if auto capture is on and the scene has become stable.
+
+        The capture work (step 2) always runs. The time it and the preview take is reported to the
+        preview governor, which lowers the preview quality when they overrun the frame period.
+        grab is not counted, as it blocks until the camera delivers the next frame.
 
-        The display format can be either "RGB" or "Depth", as selected in the display_format_combo widget.
+        With a camera process, steps 1 and 2 happen in that process, and this method only takes
+        the latest frame from shared memory with take_shared_frame, returning early if there is none.
 
         Returns:
             None
         """
-        if self.zed.grab(self.runtime_params) == sl.ERROR_CODE.SUCCESS:
-            # Retrieve images
-            self.zed.retrieve_image(self.image_zed, sl.VIEW.LEFT, sl.MEM.CPU, self.display_size)
-            self.zed.retrieve_image(self.depth_image_zed, sl.VIEW.DEPTH, sl.MEM.CPU, self.display_size)
-            self.zed.retrieve_measure(self.depth_map_zed, sl.MEASURE.DEPTH)
-            self.zed.retrieve_measure(self.point_cloud_zed, sl.MEASURE.XYZRGBA)
-            self.zed.retrieve_image(self.rgb_image, sl.VIEW.LEFT, sl.MEM.CPU, self.image_size)
-            self.zed.retrieve_image(self.depth_map_image, sl.VIEW.DEPTH, sl.MEM.CPU, self.image_size)
-            self.timestamp = self.zed.get_timestamp(sl.TIME_REFERENCE.IMAGE)
-
-            # Convert to OpenCV format
-            image_ocv = self.image_zed.get_data()
-            depth_ocv = self.depth_image_zed.get_data()
-
-            # Convert to Qt format
-            qt_image = self.cv_to_qt(image_ocv)
-            qt_depth = self.cv_to_qt(depth_ocv)
-
-            # Display in labels
-            if self.display_format_combo.currentText() == "RGB":
-                self.image_label.setPixmap(qt_image)
-            elif self.display_format_combo.currentText() == "Depth":
-                self.image_label.setPixmap(qt_depth)
-            elif self.display_format_combo.currentText() == "Sobel":
-                try:
-                    sobel_image = sobel_filter(depth_ocv, power=float(self.sobel_power_text.text()))
-                    qt_sobel = self.cv_to_qt(sobel_image)
-                    self.image_label.setPixmap(qt_sobel)
-                except ValueError:
-                    pass
-                
+        with tracer.span("update_frames", "frame"):
+            with tracer.span("flush_video_settings", "frame"):
+                self.flush_video_settings()
+            start = time.perf_counter()
+            if self.camera_process is not None:
+                if not self.take_shared_frame():
+                    return
+            else:
+                with tracer.span("grab", "frame"):
+                    grabbed = self.zed.grab(self.runtime_params) == sl.ERROR_CODE.SUCCESS
+                if not grabbed:
+                    return
+                grab_time = time.perf_counter_ns()
+                start = time.perf_counter()
+                # Retrieve full resolution data into a free frame set; skipped if all are claimed
+                frame_set = self.frame_pool.acquire()
+                if frame_set is not None:
+                    frame_set.retrieve(self.zed, self.image_size, confidence=self.save_options["confidence"])
+                    frame_set.grab_time = grab_time
+                    self.frame_pool.publish(frame_set)
+                    self.latest_grab_time = grab_time
+                self.display_timestamp = self.zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds()
+            capture_seconds = time.perf_counter() - start
+            if self.governor.should_render(capture_seconds):
+                self.refresh_display()
+            preview_seconds = time.perf_counter() - start - capture_seconds
+            if self.governor.record(capture_seconds, preview_seconds, time.monotonic()):
+                self.apply_preview_quality()
+            if self.pending_triggers:
+                with tracer.span("control_triggers", "frame"):
+                    self.serve_triggers()
+            if self.sweep is not None:
+                with tracer.span("sweep", "frame"):
+                    self.update_sweep()
+            elif self.auto_capture_checkbox.isChecked():
+                with tracer.span("auto_capture", "frame"):
+                    image = self.display_sources.get(["image"], self.display_timestamp)["image"]
+                    triggered = self.stability_detector.update(image, self.display_timestamp / 1e9)
+                if triggered:
+                    tracer.instant("auto_capture_triggered", "capture")
+                    self.save_images(source="auto")
+
+    def take_shared_frame(self) -> bool:
+        """
+        Claims the latest frame published by the camera process for display.
+
+        The frame stays claimed until the next one is shown, so its display products and the
+        frame set can be read in place.
+
+        Returns:
+            bool: False if no frame newer than the displayed one has been published.
+        """
+        frame_set = self.frame_pool.claim_latest()
+        if frame_set is None:
+            return False
+        if frame_set.timestamp.get_nanoseconds() == self.display_timestamp:
+            self.frame_pool.release(frame_set)
+            return False
+        self.display_sources.show(frame_set)
+        self.display_timestamp = frame_set.timestamp.get_nanoseconds()
+        self.latest_grab_time = frame_set.grab_time
+        tracer.instant("shared_frame", "frame", latency_ms=(time.perf_counter_ns() - frame_set.grab_time) / 1e6)
+        return True
+
+    def refresh_display(self):
+        """
+        Displays the current frame in the selected display format.
+
+        Only the processor of the selected format is asked for its output. It retrieves the display
+        products it needs and reuses its cached output if neither the frame nor the display
+        parameters changed, so switching formats or editing parameters never recomputes needlessly.
+        """
+        if self.display_timestamp is None:
+            return
+        processor = self.display_processors[self.display_format_combo.currentText()]
+        if processor.expensive and self.governor.suspend_expensive:
+            processor = self.display_processors["RGB"]
+        params = {"sobel_power": self.sobel_power_text.text()}
+        timestamp = self.display_timestamp
+        try:
+            with tracer.span("display_output", "display", format=self.display_format_combo.currentText()):
+                frame = processor.output(timestamp, lambda names: self.display_sources.get(names, timestamp),
+                                         params, self.buffer_pool)
+        except ValueError:
+            return
+        with tracer.span("show_frame", "display"):
+            self.show_frame(frame, processor.colormap)
+        if self.streamer is not None:
+            with tracer.span("stream_publish", "display"):
+                self.streamer.publish(frame, processor.colormap)
+
+    def show_frame(self, frame: np.ndarray, colormap: bool=False):
+        """
+        Displays a frame in the preview.
+
+        Uses the OpenGL preview widget when available, which uploads the frame into a persistent
+        texture. Otherwise the frame is converted to a QPixmap and shown in the image label.
+
+        Args:
+            frame (np.ndarray): A BGRA (H x W x 4) or grayscale (H x W) image.
+            colormap (bool, optional): Apply a colormap to the image. Defaults to False.
+        """
+        if self.preview_widget is not None:
+            self.preview_widget.set_frame(frame, colormap)
+            return
+        if colormap:
+            shape = frame.shape[:2]
+            gray = frame if frame.ndim == 2 else \
+                cv2.extractChannel(frame, 0, dst=self.buffer_pool.get("colormap_gray", shape))
+            frame = cv2.applyColorMap(gray, cv2.COLORMAP_JET,
+                                      dst=self.buffer_pool.get("colormap", shape + (3,)))
+        pixmap = self.cv_to_qt(frame)
+        if pixmap.width() < self.display_size.width:
+            # Frames retrieved at a reduced preview resolution are shown at the usual size
+            pixmap = pixmap.scaled(self.display_size.width, self.display_size.height, Qt.KeepAspectRatio)
+        points, closed = self.measure_overlay
+        if points:
+            painter = QPainter(pixmap)
+            draw_overlay(painter, points, (0, 0, pixmap.width(), pixmap.height()), closed)
+            painter.end()
+        self.image_label.setPixmap(pixmap)
+
+    def apply_preview_quality(self):
+        """
+        Applies the preview resolution of the governor's current level and reports the change.
+        """
+        scale = self.governor.scale
+        preview_size = sl.Resolution(int(self.display_size.width * scale), int(self.display_size.height * scale))
+        if preview_size.width != self.display_sources.display_size.width:
+            for processor in self.display_processors.values():
+                processor.invalidate()
+            self.display_sources.resize(preview_size)
+        tracer.instant("preview_quality", "qos", level=self.governor.level)
+        self.statusBar().showMessage(f"Preview: {self.governor.description}", 3000)
+
+    def preview_position(self, position) -> Optional[Tuple[float, float]]:
+        """
+        Maps a position on the preview to normalized image coordinates.
+
+        Args:
+            position (QPoint): The position in preview widget coordinates.
+
+        Returns:
+            Tuple[float, float]: The horizontal and vertical image coordinates in [0, 1], or None if
+            the position is outside of the displayed image.
+        """
+        if self.preview_widget is not None:
+            rect = self.preview_widget.image_rect()
+        else:
+            pixmap = self.image_label.pixmap()
+            if pixmap.isNull():
+                return None
+            # The label shows the pixmap unscaled and centered
+            rect = ((self.image_label.width() - pixmap.width()) / 2,
+                    (self.image_label.height() - pixmap.height()) / 2,
+                    pixmap.width(), pixmap.height())
+        if rect is None:
+            return None
+        x, y, width, height = rect
+        u, v = (position.x() - x) / width, (position.y() - y) / height
+        if not (0 <= u <= 1 and 0 <= v <= 1):
+            return None
+        return u, v
+
+    @Slot(list, bool)
+    def set_measure_overlay(self, points: List[Tuple[float, float]], closed: bool):
+        """
+        Sets the measurement points drawn over the preview.
+
+        Args:
+            points (List[Tuple[float, float]]): The points in normalized image coordinates.
+            closed (bool): Whether the points form a closed polygon.
+        """
+        self.measure_overlay = (points, closed)
+        if self.preview_widget is not None:
+            self.preview_widget.set_overlay(points, closed)
+
+    def get_unit_label(self) -> str:
+        """
+        Returns the label of the current coordinate units.
+
+        Returns:
+            str: "mm", "cm" or "m", or an empty string for other units.
+        """
+        unit_labels = {
+            sl.UNIT.MILLIMETER: "mm",
+            sl.UNIT.CENTIMETER: "cm",
+            sl.UNIT.METER: "m"
+        }
+        return unit_labels.get(self.init.coordinate_units, "")
+
+    def get_millimeters_per_unit(self) -> float:
+        """
+        Returns the number of millimeters in one coordinate unit.
+        """
+        millimeters = {
+            sl.UNIT.MILLIMETER: 1.0,
+            sl.UNIT.CENTIMETER: 10.0,
+            sl.UNIT.METER: 1000.0,
+            sl.UNIT.INCH: 25.4,
+            sl.UNIT.FOOT: 304.8
+        }
+        return millimeters[self.init.coordinate_units]
+
     def open_camera_settings(self):
         """
         Opens the camera settings dialog.
@@ -258,15 +646,40 @@ class ZEDCameraApp(QMainWindow):
             SystemExit: If the camera fails to open with the updated settings.
         """
         self.init = new_params
-        self.zed.close()
-        if self.zed.open(self.init) != sl.ERROR_CODE.SUCCESS:
-            print("Failed to open ZED camera with updated settings.")
-            sys.exit(1)
-        # Update Resolution settings for GUI
-        camera_info = self.zed.get_camera_information()
-        self.image_size = camera_info.camera_configuration.resolution
-        dlg = AutoCloseDialog("Camera Settings Updated")
-        dlg.exec()
+        if self.camera_process is not None:
+            # Frames still claimed from the previous ring stay valid until they are released
+            try:
+                ring = self.camera_process.reopen(self.get_camera_process_settings())
+            except RuntimeError as e:
+                print(f"Failed to open ZED camera with updated settings: {e}")
+                sys.exit(1)
+            info = self.camera_process.info
+            self.image_size = sl.Resolution(info["width"], info["height"])
+            self.display_size = sl.Resolution(info["display_width"], info["display_height"])
+            self.frame_pool.resize(ring)
+            scale = self.governor.scale
+            self.display_sources.resize(sl.Resolution(int(self.display_size.width * scale),
+                                                      int(self.display_size.height * scale)))
+        else:
+            self.sensor_logger.stop()
+            self.zed.close()
+            if self.zed.open(self.init) != sl.ERROR_CODE.SUCCESS:
+                print("Failed to open ZED camera with updated settings.")
+                sys.exit(1)
+            self.sensor_logger.start()
+            if hasattr(self, "folder_path"):
+                self.open_sensor_log()
+            # Update Resolution settings for GUI
+            camera_info = self.zed.get_camera_information()
+            self.image_size = camera_info.camera_configuration.resolution
+            self.frame_pool.resize(self.image_size)
+        self.measurement.units = self.get_unit_label()
+        self.measurement.reset()
+        # Re-read video settings from the reopened camera on next use
+        self.video_settings.clear()
+        self.pending_video_settings.clear()
+        self.update_disk_status()
+        self.notify("Camera Settings Updated")
 
     def open_runtime_params(self):
         """
@@ -293,9 +706,273 @@ class ZEDCameraApp(QMainWindow):
             Displays a dialog indicating that the runtime parameters have been updated.
         """
         self.runtime_params = new_params
-        dlg = AutoCloseDialog("Runtime Parameters Updated")
+        self.push_runtime_params()
+        self.notify("Runtime Parameters Updated")
+
+    def push_runtime_params(self):
+        """
+        Sends the runtime parameters to the camera process, if the camera runs in one.
+        """
+        if self.camera_process is not None:
+            self.camera_process.send("runtime", {key: getattr(self.runtime_params, key) for key in RUNTIME_PARAMETERS})
+
+    def get_camera_process_settings(self) -> dict:
+        """
+        Returns the settings the camera process opens the camera with (see ZEDSource).
+        """
+        return {
+            "init": init_to_dict(self.init),
+            "runtime": {key: getattr(self.runtime_params, key) for key in RUNTIME_PARAMETERS},
+            "video_settings": [key.name for key in VideoSettingsDialog.get_default_settings()],
+        }
+
+    def open_save_options(self):
+        """
+        Opens a dialog to choose the additional products saved with each capture.
+        """
+        dlg = SaveOptionsDialog(self.save_options)
+        dlg.settings_changed.connect(self.update_save_options)
         dlg.exec()
 
+    @Slot(dict)
+    def update_save_options(self, new_options: dict):
+        """
+        Updates the save options.
+
+        Args:
+            new_options (dict): The new save options.
+        """
+        self.save_options = dict(new_options)
+        if self.camera_process is not None:
+            self.camera_process.send("confidence", self.save_options["confidence"])
+        self.update_disk_status()
+        self.notify("Save Options Updated", duration=1000)
+
+    def open_stream_settings(self):
+        """
+        Opens a dialog to configure the live preview stream.
+        """
+        dlg = StreamSettingsDialog(self.stream_settings)
+        dlg.settings_changed.connect(self.update_stream_settings)
+        dlg.exec()
+
+    @Slot(dict)
+    def update_stream_settings(self, new_settings: dict):
+        """
+        Updates the stream settings, restarting the stream server if it is enabled.
+
+        Args:
+            new_settings (dict): The new stream settings.
+        """
+        self.stream_settings = dict(new_settings)
+        if self.streamer is not None:
+            self.streamer.stop()
+            self.streamer = None
+        if not self.stream_settings["enabled"]:
+            self.notify("Preview Stream Stopped", duration=1000)
+            return
+        streamer = PreviewStreamer(port=self.stream_settings["port"], width=self.stream_settings["width"],
+                                   quality=self.stream_settings["quality"])
+        try:
+            streamer.start()
+        except OSError as e:
+            self.notify(f"Could not start the preview stream: {e}", "Error", error=True)
+            return
+        self.streamer = streamer
+        self.notify(f"Streaming preview on port {self.stream_settings['port']}", duration=1000)
+
+    def open_auto_capture_settings(self):
+        """
+        Opens a dialog to configure automatic capture.
+        """
+        dlg = AutoCaptureDialog(self.auto_capture_settings)
+        dlg.settings_changed.connect(self.update_auto_capture_settings)
+        dlg.exec()
+
+    @Slot(dict)
+    def update_auto_capture_settings(self, new_settings: dict):
+        """
+        Updates the auto capture settings.
+
+        Args:
+            new_settings (dict): The new auto capture settings.
+        """
+        self.auto_capture_settings = dict(new_settings)
+        self.stability_detector = StabilityDetector(**self.auto_capture_settings)
+        self.notify("Auto Capture Settings Updated", duration=1000)
+
+    @Slot(bool)
+    def toggle_auto_capture(self, checked: bool):
+        """
+        Turns auto capture on or off. A subject folder must be chosen first.
+
+        Once on, a capture is taken each time the scene becomes stable after a change.
+        """
+        self.stability_detector.reset()
+        if checked and not hasattr(self, "folder_path"):
+            self.auto_capture_checkbox.setChecked(False)
+            self.notify("Please select a subject folder", "Error Starting Auto Capture", error=True)
+
+    def start_sweep(self):
+        """
+        Runs a parameter sweep read from a JSON file (see Sweep.load_sweep).
+
+        Each step applies its video settings and runtime parameters, waits until the image has
+        settled, and captures with the step recorded in the metadata. Captures are written in the
+        background while the next step settles. The settings in use before the sweep are restored
+        when it ends.
+        """
+        if not hasattr(self, "folder_path"):
+            self.notify("Please select a subject folder", "Error Starting Sweep", error=True)
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Run Sweep", "", "Sweep Files (*.json)")
+        if not path:
+            return
+        video_names = [key for key in VideoSettingsDialog.get_sl_mapping() if isinstance(key, str)]
+        try:
+            steps, settle_options = load_sweep(path, video_names + list(RUNTIME_PARAMETERS))
+            detector = SettleDetector(**settle_options)
+        except (OSError, ValueError, TypeError) as e:
+            self.notify(f"Could not load the sweep: {e}", "Error Starting Sweep", error=True)
+            return
+        self.finish_sweep(None)
+        setting_mapping = VideoSettingsDialog.get_sl_mapping()
+        video_settings = {setting_mapping[key]: value for key, value in self.get_video_settings().items()}
+        runtime_params = {key: getattr(self.runtime_params, key) for key in RUNTIME_PARAMETERS}
+        self.sweep_restore = (video_settings, runtime_params)
+        self.sweep = ParameterSweep(steps, detector)
+        self.advance_sweep()
+
+    def advance_sweep(self):
+        """
+        Applies the settings of the next sweep step, or ends the sweep after the last one.
+
+        Video settings are queued for flush_video_settings and runtime parameters are set directly,
+        so both apply from the next grab.
+        """
+        settings = self.sweep.advance()
+        if settings is None:
+            self.finish_sweep("Sweep finished")
+            return
+        self.apply_sweep_settings(settings)
+        self.statusBar().showMessage(f"Sweep step {self.sweep.index + 1}/{len(self.sweep.steps)}: "
+                                     + ", ".join(f"{key} = {value}" for key, value in settings.items()))
+
+    def apply_sweep_settings(self, settings: dict):
+        """
+        Applies video settings and runtime parameters by name.
+
+        Args:
+            settings (dict): Video setting names (as in the video settings dialog) and runtime
+                parameter names, with their values.
+        """
+        self.update_video_settings({key: value for key, value in settings.items() if key not in RUNTIME_PARAMETERS})
+        for key, value_type in RUNTIME_PARAMETERS.items():
+            if key in settings:
+                setattr(self.runtime_params, key, value_type(settings[key]))
+        self.push_runtime_params()
+
+    def update_sweep(self):
+        """
+        Captures the current sweep step once the image has settled and moves on to the next step.
+
+        The capture waits while earlier captures are still being written, and until the latest
+        frame set comes from the grab the image was checked on.
+        """
+        image = self.display_sources.get(["image"], self.display_timestamp)["image"]
+        if not self.sweep.update(image) or self.save_queue.full:
+            return
+        latest = self.frame_pool.latest
+        if latest is None or latest.timestamp.get_nanoseconds() != self.display_timestamp:
+            return
+        tracer.instant("sweep_step_settled", "capture", **self.sweep.describe())
+        if self.save_images(source="sweep", extra_metadata={"sweep": self.sweep.describe()}):
+            self.advance_sweep()
+        else:
+            self.finish_sweep("Sweep stopped: capture failed")
+
+    def finish_sweep(self, message: Optional[str]):
+        """
+        Ends the running sweep, if any, and restores the settings in use before it.
+
+        Args:
+            message (str): The status bar message, or None for no message.
+        """
+        if self.sweep is None:
+            return
+        self.sweep = None
+        video_settings, runtime_params = self.sweep_restore
+        self.apply_sweep_settings({**video_settings, **runtime_params})
+        if message is not None:
+            self.statusBar().showMessage(message, 5000)
+
+    @Slot(bool)
+    def toggle_trace(self, checked: bool):
+        """
+        Starts or stops recording a timeline trace of the frame loop and captures.
+        """
+        if checked:
+            tracer.enable()
+            self.statusBar().showMessage("Recording trace", 3000)
+        else:
+            tracer.disable()
+            self.statusBar().showMessage("Trace recording stopped", 3000)
+
+    def save_trace(self):
+        """
+        Saves the recorded trace as Chrome Trace Event JSON, viewable in Perfetto or chrome://tracing.
+        """
+        path, _ = QFileDialog.getSaveFileName(self, "Save Trace", "trace.json", "Trace Files (*.json)")
+        if not path:
+            return
+        count = tracer.save(path)
+        self.statusBar().showMessage(f"Saved {count} trace events to {path}", 3000)
+
+    def open_gallery(self):
+        """
+        Opens the gallery of the captures in the current subject folder.
+
+        Deleting the most recent capture of the current name steps the counter back, and redoing
+        a capture sets the name and counter to it so the next capture replaces it.
+        """
+        if not hasattr(self, "folder_path"):
+            self.notify("Please select a subject folder", "Error Opening Gallery", error=True)
+            return
+        dlg = GalleryDialog(self.folder_path, self.thumbnail_cache)
+        dlg.capture_deleted.connect(self.on_capture_deleted)
+        dlg.redo_requested.connect(self.redo_capture)
+        dlg.exec()
+
+    @Slot(str, int)
+    def on_capture_deleted(self, name: str, counter: int):
+        """
+        Steps the counter back if the most recent capture of the current name was deleted.
+
+        Args:
+            name (str): The image name of the deleted capture.
+            counter (int): The counter of the deleted capture.
+        """
+        if name == self.name_text.text() and counter == int(self.counter_text.text()) - 1:
+            self.decrement_counter()
+
+    @Slot(str, int)
+    def redo_capture(self, name: str, counter: int):
+        """
+        Sets the name and counter to a deleted capture so that the next capture replaces it.
+
+        The name and counter in use before are restored once the redo capture is queued, so that
+        later captures do not step into the captures that follow the redone one.
+
+        Args:
+            name (str): The image name of the capture to redo.
+            counter (int): The counter of the capture to redo.
+        """
+        # A redo that replaces a pending one restores the name and counter from before the first
+        previous = self.redo[1:] if self.redo is not None else (self.name_text.text(), self.counter_text.text())
+        self.name_text.setText(name)
+        self.counter_text.setText(str(counter))
+        self.redo = (self.get_save_folder(), *previous)
+
     def open_video_settings(self):
         """
         Opens a dialog to modify video settings.
@@ -304,25 +981,44 @@ class ZEDCameraApp(QMainWindow):
         video settings to it. It connects the dialog's settings_changed signal
         to the update_video_settings method to handle any changes made in the dialog.
         Finally, it executes the dialog.
+
+        The dialog applies changes live, so the camera feed keeps updating while it is open.
         """
-        # Get Current Video settings from camera
-        settings = VideoSettingsDialog.get_default_settings()
-        for key, _ in settings.items():
-            status, new_value = self.zed.get_camera_settings(key)
-            settings[key] = new_value
-        
         # Open Dialog with current video settings
-        dlg = VideoSettingsDialog(settings)
+        dlg = VideoSettingsDialog(self.get_video_settings())
         dlg.settings_changed.connect(self.update_video_settings)
         dlg.exec()
 
+    def get_video_settings(self) -> Dict[sl.VIDEO_SETTINGS, float]:
+        """
+        Returns a snapshot of the current video settings of the ZED camera.
+
+        The settings are read from the camera only the first time (or after the camera is
+        reopened); afterwards the cached snapshot, kept up to date by flush_video_settings,
+        is returned so that reopening the video settings dialog is instant.
+
+        Returns:
+            Dict[sl.VIDEO_SETTINGS, float]: The current video settings, including pending changes.
+        """
+        if not self.video_settings:
+            for key in VideoSettingsDialog.get_default_settings():
+                if self.camera_process is not None:
+                    value = self.camera_process.info["video_settings"][key.name]
+                else:
+                    status, value = self.zed.get_camera_settings(key)
+                self.video_settings[key] = value
+        settings = dict(self.video_settings)
+        settings.update(self.pending_video_settings)
+        return settings
+
     @Slot(dict)
     def update_video_settings(self, new_params: Dict[str, float]):
         """
-        Update the video settings of the ZED camera.
+        Queue updated video settings for the ZED camera.
 
-        This method updates the video settings of the ZED camera based on the provided parameters.
-        It uses a mapping from the VideoSettingsDialog to set the appropriate camera settings.
+        Settings are not sent to the camera immediately. They are coalesced by key, so that
+        rapid changes (e.g. dragging a slider) only keep the latest value, and are applied by
+        flush_video_settings once per frame.
 
         Args:
             new_params (Dict[str, float]): A dictionary containing the video settings to be updated.
@@ -333,86 +1029,352 @@ class ZEDCameraApp(QMainWindow):
         """
         setting_mapping = VideoSettingsDialog.get_sl_mapping()
         for key, value in new_params.items():
-            status = self.zed.set_camera_settings(setting_mapping[key], value)
+            self.pending_video_settings[setting_mapping[key]] = value
+
+    def flush_video_settings(self):
+        """
+        Apply the queued video settings to the ZED camera.
+
+        Only settings whose value differs from the last applied value are sent, so each
+        setting results in at most one set_camera_settings call per frame.
+        """
+        if not self.pending_video_settings:
+            return
+        pending = self.pending_video_settings
+        self.pending_video_settings = {}
+        if self.camera_process is not None:
+            # Failures are reported by the camera process
+            changed = {setting: value for setting, value in pending.items() if self.video_settings.get(setting) != value}
+            if changed:
+                self.camera_process.send("video", {setting.name: value for setting, value in changed.items()})
+                self.video_settings.update(changed)
+            return
+        for setting, value in pending.items():
+            if self.video_settings.get(setting) == value:
+                continue
+            status = self.zed.set_camera_settings(setting, value)
             if status == sl.ERROR_CODE.SUCCESS:
-                print(f"Updated {key} to {value}")
+                self.video_settings[setting] = value
+                print(f"Updated {setting} to {value}")
             else:
-                print(f"Failed to update {key} to {value}")
-        dlg = AutoCloseDialog("Video Settings Updated", duration=1000)
-        dlg.exec()
-    
+                print(f"Failed to update {setting} to {value}")
+
     def cv_to_qt(self, cv_image) -> QPixmap:
         """
         Converts an OpenCV image to a QPixmap for use in a Qt application.
 
+        The RGBA conversion is written into a pooled buffer, and the QImage wrapping that buffer
+        and the returned QPixmap are reused between calls, so the returned pixmap is only valid
+        until the next call.
+
         Args:
-            cv_image (numpy.ndarray): The OpenCV image to be converted.
+            cv_image (numpy.ndarray): The OpenCV image to be converted (BGRA, BGR or grayscale).
 
         Returns:
             QPixmap: The converted image in QPixmap format.
         """
-        cv_image = cv2.cvtColor(cv_image, cv2.COLOR_BGRA2RGBA)
-        height, width, channel = cv_image.shape
-        bytes_per_line = channel * width
-        qt_image = QImage(cv_image.data, width, height, bytes_per_line, QImage.Format_RGBA8888)
-        return QPixmap.fromImage(qt_image)
-
-    def save_images(self):
+        height, width = cv_image.shape[:2]
+        if cv_image.ndim == 2:
+            conversion = cv2.COLOR_GRAY2RGBA
+        elif cv_image.shape[2] == 4:
+            conversion = cv2.COLOR_BGRA2RGBA
+        else:
+            conversion = cv2.COLOR_BGR2RGBA
+        rgba = self.buffer_pool.get("qt_rgba", (height, width, 4))
+        cv2.cvtColor(cv_image, conversion, dst=rgba)
+        # Only wrap the buffer in a new QImage if the pool reallocated it
+        if self.qt_image_buffer is not rgba:
+            self.qt_image = QImage(rgba.data, width, height, 4 * width, QImage.Format_RGBA8888)
+            self.qt_image_buffer = rgba
+        self.qt_pixmap.convertFromImage(self.qt_image)
+        return self.qt_pixmap
+
+    def save_images(self, source: str="manual", extra_metadata: Optional[dict]=None) -> bool:
         """
         Saves the current RGB image and depth map from the ZED camera to the specified folder.
 
-        This method retrieves the RGB image and depth map from the ZED camera, saves them as PNG files,
-        and also saves the depth map as a NumPy array file (.npy). The filenames are generated using
-        a predefined naming convention, and the save folder is created if it does not exist.
-        """
-        # Save image and depth map
-        image_rgb = self.rgb_image.get_data()
-        image_depth = self.depth_map_image.get_data()
-        depth_map = self.depth_map_zed.get_data()
-        point_cloud = self.point_cloud_zed.get_data()
+        This method claims the latest frame set from the frame pool, so that every saved file and the
+        metadata timestamp come from the same grab, and queues it to be written in the background by
+        save_frame_set. The file name, save options and metadata are taken now, so the counter can
+        move on immediately. The save folder is created if it does not exist. After redoing a capture
+        from the gallery, the name and counter from before the redo are restored. The capture is
+        refused if the disk might fill up before all of its files, and those of pending captures, are
+        written, or if too many captures are still being written.
 
+        Args:
+            source (str, optional): What triggered the capture: "manual", "auto", "sweep" or "control".
+                Defaults to "manual".
+            extra_metadata (dict, optional): Sections added to the capture metadata.
+        Returns:
+            bool: True if the capture was queued.
+        """
         # Raise a dialog if the user has not selected a subject folder
         try:
             save_folder = self.get_save_folder()
         except AttributeError:
-            dlg = AutoCloseDialog("Please select a subject folder", "Error Saving Images")
-            dlg.exec()
-            return
-        
+            return self.refuse_capture("Please select a subject folder")
+        redo = self.redo is not None and save_folder == self.redo[0]
+
+        estimated_bytes = self.estimate_capture_bytes()
+        status = self.disk_monitor.status(save_folder, estimated_bytes)
+        required_bytes = status.required_bytes + self.save_queue.pending * estimated_bytes
+        if status.free_bytes < required_bytes:
+            self.update_disk_status()
+            return self.refuse_capture(f"Not enough disk space: {status.free_bytes / 1e6:.0f} MB free, "
+                                       f"{required_bytes / 1e6:.0f} MB needed")
+
+        if self.save_queue.full:
+            return self.refuse_capture("Still writing earlier captures, capture skipped", quiet=True)
+
+        frame_set = self.frame_pool.claim_latest()
+        if frame_set is None:
+            return self.refuse_capture("No camera frame available yet")
+
         if not save_folder.exists():
             save_folder.mkdir(parents=True)
 
-        filename_rgb = Path(f"RGB_{self.get_filename()}")
-        filename_depth = Path(f"DEPTH_{self.get_filename()}")
-        filename_cloud = Path(f"CLOUD_{self.get_filename()}")
+        filename = self.get_filename()
+        metadata = self.build_metadata(filename, frame_set.timestamp, extra_metadata)
+        write = partial(self.write_capture, frame_set, save_folder, filename, dict(self.save_options),
+                        self.get_millimeters_per_unit(), metadata)
+        if not self.save_queue.submit(save_folder, write, source):
+            self.frame_pool.release(frame_set)
+            return self.refuse_capture("Still writing earlier captures, capture skipped", quiet=True)
+        self.last_capture = {
+            "folder": str(save_folder),
+            "filename": filename,
+            "source": source,
+            "status": "pending",
+            "captured_at": datetime.now().isoformat(timespec="milliseconds"),
+            "timestamp_ns": frame_set.timestamp.get_nanoseconds(),
+            "grab_time_ns": frame_set.grab_time,
+            "files": [],
+        }
+        if redo:
+            _, name, counter = self.redo
+            self.redo = None
+            self.name_text.setText(name)
+            self.counter_text.setText(counter)
+        else:
+            self.increment_counter()
+        return True
+
+    def refuse_capture(self, message: str, quiet: bool=False) -> bool:
+        """
+        Reports why a capture was refused, and keeps the reason for the control API.
+
+        Args:
+            message (str): The reason.
+            quiet (bool, optional): Show the reason in the status bar rather than as a notification.
+                Defaults to False.
+        Returns:
+            bool: False, for save_images to return.
+        """
+        self.capture_refusal = message
+        if quiet:
+            self.statusBar().showMessage(message, 3000)
+        else:
+            self.notify(message, "Error Saving Images", error=True)
+        return False
+
+    def write_capture(self, frame_set: FrameSet, save_folder: Path, filename: str, options: dict,
+                      millimeters_per_unit: float, metadata: dict):
+        """
+        Writes a claimed frame set with save_frame_set and releases it. Runs on the save thread.
+        """
+        try:
+            self.save_frame_set(frame_set, save_folder, filename, options, millimeters_per_unit, metadata)
+        finally:
+            self.frame_pool.release(frame_set)
+
+    def probe_disk(self, save_folder: Path):
+        """
+        Measures the write bandwidth of the disk when due. Runs on the save thread between captures.
+        """
+        with tracer.span("probe_disk", "save"):
+            self.disk_monitor.probe(save_folder)
+
+    @Slot(str, str, float)
+    def on_save_finished(self, folder: str, source: str, seconds: float):
+        """
+        Reports a capture that has been written and updates the disk status.
+
+        Args:
+            folder (str): The capture folder.
+            source (str): What triggered the capture.
+            seconds (float): The time taken to write it.
+        """
+        self.disk_monitor.record_save(DiskMonitor.folder_bytes(Path(folder)))
+        self.update_disk_status()
+        if self.last_capture is not None and self.last_capture["folder"] == folder:
+            self.last_capture["status"] = "saved"
+            self.last_capture["save_seconds"] = seconds
+            self.last_capture["files"] = sorted(str(path) for path in Path(folder).iterdir())
+        if source == "sweep":
+            self.statusBar().showMessage(f"Saved {Path(folder).name} in {seconds * 1000:.0f} ms", 3000)
+            return
+        self.notify(f"Saved {Path(folder).name} in {seconds * 1000:.0f} ms", "Images Saved")
+
+    @Slot(str, str, str)
+    def on_save_failed(self, folder: str, source: str, error: str):
+        """
+        Reports a capture that could not be written.
+
+        Args:
+            folder (str): The capture folder.
+            source (str): What triggered the capture.
+            error (str): The error message.
+        """
+        print(f"Failed to save {folder}: {error}")
+        if self.last_capture is not None and self.last_capture["folder"] == folder:
+            self.last_capture["status"] = "failed"
+            self.last_capture["error"] = error
+        if source == "sweep":
+            self.statusBar().showMessage(f"Failed to save {Path(folder).name}: {error}", 10000)
+            return
+        self.notify(f"Failed to save {Path(folder).name}: {error}", "Error Saving Images", error=True)
+
+    def save_frame_set(self, frame_set: FrameSet, save_folder: Path, filename: str, options: dict,
+                       millimeters_per_unit: float, metadata: dict):
+        """
+        Saves a claimed frame set to the save folder.
+
+        The RGB image and depth visualization are saved as PNG files, and the raw depth map and
+        point cloud as NumPy array files (.npy), or sparsely with their valid pixels stored apart
+        from the invalid ones (.sparse.npz). The depth map can instead be saved as uint16 millimeters, either as a
+        16-bit PNG (DEPTH16_*.png) or a uint16 .npy file, with 0 marking invalid pixels.
+        Depending on the save options, the confidence map is saved as a uint8
+        PNG and the point cloud is also exported as a binary PLY or PCD file. The data is read
+        directly from the frame set's Mats without copying, which is safe because the frame set is claimed.
+
+        Everything besides the frame set is passed in, as this runs on the save thread while the
+        GUI moves on to the next capture.
+
+        Args:
+            frame_set (FrameSet): The claimed frame set to save.
+            save_folder (Path): The folder to save the files into.
+            filename (str): The "{subject}_{name}_{counter}" base name of the capture.
+            options (dict): The save options (see SaveOptionsDialog.get_default_options).
+            millimeters_per_unit (float): The size of a coordinate unit, for 16-bit depth.
+            metadata (dict): The metadata from build_metadata.
+        """
+        filename_rgb = Path(f"RGB_{filename}")
+        filename_depth = Path(f"DEPTH_{filename}")
+        filename_cloud = Path(f"CLOUD_{filename}")
+        filename_confidence = Path(f"CONFIDENCE_{filename}")
 
         path_rgb = save_folder / filename_rgb
         path_depth = save_folder / filename_depth
         path_cloud = save_folder / filename_cloud
+        path_confidence = save_folder / filename_confidence
 
         # Save Image
-        cv2.imwrite(path_rgb.with_suffix(".png"), image_rgb)
-        cv2.imwrite(path_depth.with_suffix(".png"), image_depth)
+        with tracer.span("imwrite RGB", "save"):
+            cv2.imwrite(path_rgb.with_suffix(".png"), frame_set.rgb_image.get_data(deep_copy=False))
+        with tracer.span("imwrite DEPTH", "save"):
+            cv2.imwrite(path_depth.with_suffix(".png"), frame_set.depth_map_image.get_data(deep_copy=False))
+        depth_map = frame_set.depth_map_zed.get_data(deep_copy=False)
+        point_cloud = frame_set.point_cloud_zed.get_data(deep_copy=False)
         # Save Depth Map
-        np.save(path_depth.with_suffix(".npy"), depth_map)
+        depth_format = options["depth_format"]
+        if depth_format != "Float32":
+            with tracer.span("encode DEPTH16", "save"):
+                depth_mm = encode_depth_mm(depth_map, millimeters_per_unit)
+            if depth_format == "16-bit PNG":
+                with tracer.span("imwrite DEPTH16", "save"):
+                    cv2.imwrite(save_folder / f"DEPTH16_{filename}.png", depth_mm)
+            else:
+                with tracer.span("np.save DEPTH16", "save"):
+                    np.save(path_depth.with_suffix(".npy"), depth_mm)
+        elif options["sparse_depth"]:
+            # Save only the valid pixels
+            with tracer.span("save_sparse DEPTH", "save"):
+                save_sparse_array(path_depth.with_suffix(".sparse.npz"), depth_map, np.isfinite(depth_map))
+        else:
+            with tracer.span("np.save DEPTH", "save"):
+                np.save(path_depth.with_suffix(".npy"), depth_map)
         # Save Point cloud data
-        np.save(path_cloud.with_suffix(".npy"), point_cloud)
+        if options["sparse_depth"]:
+            with tracer.span("save_sparse CLOUD", "save"):
+                save_sparse_array(path_cloud.with_suffix(".sparse.npz"), point_cloud,
+                                  np.isfinite(point_cloud[:, :, 2]))
+        else:
+            with tracer.span("np.save CLOUD", "save"):
+                np.save(path_cloud.with_suffix(".npy"), point_cloud)
+        # Save Confidence Map (1-100, 0 where undefined)
+        if options["confidence"] and frame_set.has_confidence:
+            with tracer.span("imwrite CONFIDENCE", "save"):
+                confidence = np.nan_to_num(frame_set.confidence_map.get_data(deep_copy=False),
+                                           nan=0.0, posinf=0.0, neginf=0.0)
+                cv2.imwrite(path_confidence.with_suffix(".png"),
+                            np.clip(np.rint(confidence), 0, 100).astype(np.uint8))
+        if options["cloud_export"] != "None":
+            suffix = f".{options['cloud_export'].lower()}"
+            with tracer.span(f"export {suffix[1:].upper()}", "save"):
+                export_point_cloud(point_cloud, path_cloud.with_suffix(suffix), options["voxel_size"])
         # Save Metadata
-        self.save_metadata(save_folder)
+        with tracer.span("save_metadata", "save"):
+            self.save_metadata(save_folder, metadata)
+        # Queue derived products on copies, as the frame set is reused once released
+        products = options["derived_products"]
+        if products:
+            with tracer.span("submit_derived", "save", products=products):
+                inputs = frame_set.get_arrays(self.derived_stage.required_inputs(products), deep_copy=True)
+                self.derived_stage.submit(products, inputs, save_folder, filename)
+
+    def estimate_capture_bytes(self) -> int:
+        """
+        Returns the worst-case size of a capture at the current resolution and save options.
+        """
+        return DiskMonitor.estimate_capture_bytes(self.image_size.width, self.image_size.height, self.save_options)
 
-        self.increment_counter()
-        dlg = ImageSavedDialog()
-        dlg.exec()
+    def update_disk_status(self):
+        """
+        Shows the free space, remaining captures, time until full and write bandwidth in the status bar.
 
-    def save_metadata(self, dest: Path):
+        Warns in the status bar when few captures remain.
         """
-        Save metadata information to a specified destination.
+        if not hasattr(self, "folder_path"):
+            return
+        status = self.disk_monitor.status(self.get_save_folder(), self.estimate_capture_bytes())
+        self.disk_label.setText(format_status(status))
+        if status.low:
+            self.statusBar().showMessage(f"Disk almost full: about {status.remaining_captures} captures left", 10000)
 
-        This method collects metadata from the image and camera settings,
-        and saves it to a file named 'metadata.txt' in the specified destination directory.
+    @Slot(str, str, float)
+    def on_product_finished(self, product: str, path: str, seconds: float):
+        """
+        Reports a derived product that has been written.
 
         Args:
-            dest (Path): The destination directory where the metadata file will be saved.
+            product (str): The name of the derived product.
+            path (str): The file it was written to.
+            seconds (float): The time taken to compute and write it.
+        """
+        self.statusBar().showMessage(f"{product} saved in {seconds * 1000:.0f} ms", 3000)
+
+    @Slot(str, str)
+    def on_product_failed(self, product: str, error: str):
+        """
+        Reports a derived product that failed.
+
+        Args:
+            product (str): The name of the derived product.
+            error (str): The error message.
+        """
+        self.notify(f"Failed to generate {product}: {error}", "Error Saving Images", error=True)
+
+    def build_metadata(self, filename: str, timestamp: sl.Timestamp, extra: Optional[dict]=None) -> dict:
+        """
+        Collects the metadata of a capture from the image and camera settings.
+
+        Args:
+            filename (str): The "{subject}_{name}_{counter}" base name of the capture.
+            timestamp (sl.Timestamp): The image timestamp of the grab the capture was taken from.
+            extra (dict, optional): Additional sections, e.g. the step of a parameter sweep.
+
+        Returns:
+            dict: The metadata, for save_metadata.
 
         Metadata Structure:
             - image_data:
@@ -420,21 +1382,51 @@ class ZEDCameraApp(QMainWindow):
                 - resolution (str): The resolution of the image in the format "width x height".
                 - timestamp (str): The timestamp of the image in milliseconds.
                 - description (str): The description of the image.
+                - depth_scale (str): Coordinate units per step of a 16-bit depth map, if one was saved.
+            - sensors: Motion around the image timestamp (see Sensors.summarize_window), with the
+              session sensor log and the index of the window's first sample in it.
             - init_parameters (dict): The initial camera settings.
             - runtime_parameters (dict): The runtime parameters of the camera.
-
-        Raises:
-            IOError: If there is an error writing the metadata file.
+            - video_settings (dict): The video settings by name, as in the video settings dialog.
+            - sweep: The parameter sweep step (see Sweep.ParameterSweep.describe), for sweep captures.
         """
         metadata = {}
         metadata["image_data"] = {
-            "name" : self.get_filename(),
-            "resolution": f"{self.image_zed.get_width()} x {self.image_zed.get_height()}",
-            "timestamp": str(self.timestamp.get_milliseconds()),
+            "name" : filename,
+            "resolution": f"{self.display_size.width} x {self.display_size.height}",
+            "timestamp": str(timestamp.get_milliseconds()),
             "description": self.description_text.text()
         }
+        if self.save_options["depth_format"] != "Float32":
+            metadata["image_data"]["depth_scale"] = str(1 / self.get_millimeters_per_unit())
+        if self.sensor_logger is not None:
+            samples, log_index = self.sensor_logger.window(timestamp.get_nanoseconds())
+            if len(samples):
+                metadata["sensors"] = summarize_window(samples, timestamp.get_nanoseconds())
+                if log_index is not None:
+                    metadata["sensors"]["log"] = self.sensor_logger.log_path.name
+                    metadata["sensors"]["log_index"] = log_index
         metadata["init_parameters"] = param2dict(self.init)
         metadata["runtime_parameters"] = param2dict(self.runtime_params)
+        setting_mapping = VideoSettingsDialog.get_sl_mapping()
+        metadata["video_settings"] = {setting_mapping[key]: value for key, value in self.get_video_settings().items()}
+        metadata.update(extra or {})
+        return metadata
+
+    def save_metadata(self, dest: Path, metadata: dict):
+        """
+        Save metadata information to a specified destination.
+
+        The metadata is saved to files named 'metadata.txt' and 'metadata.json' in the specified
+        destination directory.
+
+        Args:
+            dest (Path): The destination directory where the metadata file will be saved.
+            metadata (dict): The metadata from build_metadata.
+
+        Raises:
+            IOError: If there is an error writing the metadata file.
+        """
         # Save Metadata to text and json files
         save_file = dest / "metadata.txt"
         with save_file.open("w") as file:
@@ -447,9 +1439,35 @@ class ZEDCameraApp(QMainWindow):
         Closes the ZED camera when the application is closed.
         """
         # Cleanup
-        self.zed.close()
+        if self.control_server is not None:
+            self.control_server.stop()
+        for request in self.pending_triggers:
+            request.error("The application is closing")
+        self.measurement.set_mode("Off")
+        self.save_queue.shutdown()
+        self.derived_stage.shutdown()
+        if self.streamer is not None:
+            self.streamer.stop()
+        if self.camera_process is not None:
+            self.camera_process.stop()
+            self.frame_pool.close()
+        else:
+            self.sensor_logger.stop()
+            self.zed.close()
         event.accept()
 
+    def notify(self, message: str, title: str=None, duration: int=3000, error: bool=False):
+        """
+        Shows a notification over the window without interrupting the frame loop or capturing.
+
+        Args:
+            message (str): The message to be displayed.
+            title (str, optional): A heading for the message. Defaults to None.
+            duration (int, optional): The duration in milliseconds the message is shown. Defaults to 3000 ms.
+            error (bool, optional): Whether the message reports an error. Defaults to False.
+        """
+        self.toast.show_message(message, title, duration, error)
+
     def open_folder_dialog(self):
         """
         Opens a folder dialog for the user to select a directory.
@@ -461,6 +1479,15 @@ class ZEDCameraApp(QMainWindow):
         folder_path = QFileDialog.getExistingDirectory(self, "Select Subject Folder")
         self.folder_text.setText(Path(folder_path).name)
         self.folder_path = Path(folder_path)
+        self.open_sensor_log()
+        self.update_disk_status()
+
+    def open_sensor_log(self):
+        """
+        Starts a new sensor log for this session in the subject folder.
+        """
+        if self.sensor_logger is not None:
+            self.sensor_logger.open_log(self.folder_path / f"SENSORS_{datetime.now():%Y%m%d_%H%M%S}.bin")
 
     def increment_counter(self):
         """
@@ -483,6 +1510,15 @@ class ZEDCameraApp(QMainWindow):
         """
         self.counter_text.setText("1")
 
+    def get_counter(self) -> Optional[int]:
+        """
+        Returns the image counter, or None if the counter field does not hold a number.
+        """
+        try:
+            return int(self.counter_text.text())
+        except ValueError:
+            return None
+
     def get_filename(self) -> str:
         """
         Constructs a filename string based on the subject, name, and counter values.
@@ -512,6 +1548,123 @@ class ZEDCameraApp(QMainWindow):
         folder_name = f"{subject}_{name}_{counter}"
         return subj_folder / folder_name
     
+    @Slot(object)
+    def handle_control_request(self, request: ControlRequest):
+        """
+        Answers a request of the control API (see ControlServer).
+
+        Commands:
+            - capture: Captures the first frame grabbed after the request, like the save button.
+              Replies with the capture (see last_capture) and the trigger-to-grab latency in ms.
+            - set: Sets any of "name", "description" and "counter". Replies with the status.
+            - last_capture: Replies with the folder, files, timestamps and status of the last capture.
+            - status: Replies with the naming, the save queue depth, trigger-to-grab latencies and
+              the last capture.
+
+        Args:
+            request (ControlRequest): The request, answered now or once its capture is taken.
+        """
+        handlers = {
+            "capture": self.control_capture,
+            "set": self.control_set,
+            "last_capture": lambda request: request.reply({"capture": self.control_last_capture()}),
+            "status": lambda request: request.reply(self.control_status()),
+        }
+        handler = handlers.get(request.command)
+        if handler is None:
+            request.error(f"Unknown command: {request.command}")
+            return
+        try:
+            handler(request)
+        except Exception as e:
+            # Answer now rather than leaving the client to time out
+            request.error(f"{request.command} failed: {e}")
+
+    def control_capture(self, request: ControlRequest):
+        """
+        Queues a capture trigger, taken by serve_triggers once a frame grabbed after it is available.
+        """
+        if not hasattr(self, "folder_path"):
+            request.error("Please select a subject folder")
+        elif self.sweep is not None:
+            request.error("A parameter sweep is running")
+        else:
+            tracer.instant("control_trigger", "capture")
+            self.pending_triggers.append(request)
+
+    def serve_triggers(self):
+        """
+        Captures for the pending triggers that the latest frame was grabbed after, and answers them
+        with the time from receiving the trigger to grabbing the captured frame.
+        """
+        waiting = []
+        for request in self.pending_triggers:
+            if request.cancelled:
+                continue
+            if self.latest_grab_time is None or self.latest_grab_time < request.received:
+                waiting.append(request)
+            elif self.save_images(source="control"):
+                latency_ms = (self.last_capture["grab_time_ns"] - request.received) / 1e6
+                self.trigger_latencies.append(latency_ms)
+                tracer.instant("control_capture", "capture", trigger_to_grab_ms=latency_ms)
+                request.reply({"capture": self.control_last_capture(), "trigger_to_grab_ms": latency_ms})
+            else:
+                request.error(self.capture_refusal)
+        self.pending_triggers = waiting
+
+    def control_set(self, request: ControlRequest):
+        """
+        Sets the name, description and counter given in a request. Nothing is set if any is invalid.
+        """
+        params = request.params
+        unknown = set(params) - {"name", "description", "counter"}
+        name = params.get("name", self.name_text.text())
+        description = params.get("description", self.description_text.text())
+        counter = params.get("counter", self.get_counter())
+        if unknown:
+            request.error(f"Unknown fields: {', '.join(sorted(unknown))}")
+        elif counter is None:
+            request.error(f"The counter field holds {self.counter_text.text()!r}, set a counter")
+        elif not isinstance(name, str) or not name:
+            request.error("name must be a non-empty string")
+        elif not isinstance(description, str):
+            request.error("description must be a string")
+        elif isinstance(counter, bool) or not isinstance(counter, int) or counter < 1:
+            request.error("counter must be a positive integer")
+        else:
+            self.name_text.setText(name)
+            self.description_text.setText(description)
+            self.counter_text.setText(str(counter))
+            request.reply(self.control_status())
+
+    def control_status(self) -> dict:
+        """
+        Returns the status reported by the control API. The counter is None if the counter field
+        does not hold a number.
+        """
+        latencies = list(self.trigger_latencies)
+        return {
+            "subject_folder": str(self.folder_path) if hasattr(self, "folder_path") else None,
+            "name": self.name_text.text(),
+            "description": self.description_text.text(),
+            "counter": self.get_counter(),
+            "save_queue": {"pending": self.save_queue.pending, "max_pending": self.save_queue.max_pending},
+            "sweep_running": self.sweep is not None,
+            "trigger_to_grab_ms": {
+                "count": len(latencies),
+                "last": latencies[-1] if latencies else None,
+                "median": statistics.median(latencies) if latencies else None,
+                "max": max(latencies, default=None),
+            },
+            "last_capture": self.control_last_capture(),
+        }
+
+    def control_last_capture(self) -> Optional[dict]:
+        """
+        Returns a copy of the last capture, as responses are serialized on a server thread.
+        """
+        return None if self.last_capture is None else dict(self.last_capture)
+
     def keyPressEvent(self, event):
         """
         Saves images if Enter or Return Key is pressed.
@@ -521,7 +1674,13 @@ class ZEDCameraApp(QMainWindow):
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = ZEDCameraApp()
+    parser = argparse.ArgumentParser(description="View and capture images and depth maps from a ZED camera.")
+    parser.add_argument("--camera-process", action="store_true",
+                        help="Grab in a separate process that shares frames through shared memory")
+    parser.add_argument("--control-port", type=int, default=None,
+                        help="Serve the JSON control API on this local TCP port")
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = ZEDCameraApp(camera_process=args.camera_process, control_port=args.control_port)
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,119 @@
+import numpy as np
+import pyzed.sl as sl
+from Display import DisplaySources
+from FramePool import FrameSet
+from SharedFrames import DISPLAY_ARRAYS
+from typing import Dict, Tuple
+
+# InitParameters set by the camera settings dialog, and the enum types of those stored by name
+INIT_FIELDS = ("camera_resolution", "camera_fps", "depth_mode", "coordinate_units",
+               "depth_minimum_distance", "depth_maximum_distance")
+INIT_ENUMS = {"camera_resolution": sl.RESOLUTION, "depth_mode": sl.DEPTH_MODE, "coordinate_units": sl.UNIT}
+
+
+def init_to_dict(init: sl.InitParameters) -> dict:
+    """
+    Converts the InitParameters set by the camera settings dialog to a picklable dict.
+    """
+    values = {}
+    for field in INIT_FIELDS:
+        value = getattr(init, field)
+        values[field] = value.name if field in INIT_ENUMS else value
+    return values
+
+
+def dict_to_init(values: dict) -> sl.InitParameters:
+    """
+    Converts a dict from init_to_dict back to InitParameters.
+    """
+    init = sl.InitParameters()
+    for field, value in values.items():
+        setattr(init, field, getattr(INIT_ENUMS[field], value) if field in INIT_ENUMS else value)
+    return init
+
+
+class ZEDSource:
+    """
+    The ZED camera as a source for the camera process (see CameraProcess.camera_main).
+
+    The camera is opened and grabbed exactly as in the GUI. Each grab is retrieved into a FrameSet
+    and display sources, then copied into the ring slot, since the SDK cannot retrieve into
+    shared memory; readers of the ring then use the frames without further copies.
+
+    The settings passed to open are:
+        - init (dict): The InitParameters, from init_to_dict.
+        - runtime (dict): Runtime parameters by name.
+        - video_settings (List[str]): The sl.VIDEO_SETTINGS names reported in the camera info.
+    """
+    def __init__(self):
+        self.zed = sl.Camera()
+        self.runtime_params = sl.RuntimeParameters(enable_fill_mode=False)
+        self.image_size = None
+        self.frame_set = None
+        self.display_sources = None
+        self.timestamp = 0
+
+    def open(self, settings: dict) -> dict:
+        """
+        Opens the camera with static positional tracking and returns its info.
+
+        Raises:
+            RuntimeError: If the camera could not be opened.
+        """
+        if self.zed.open(dict_to_init(settings["init"])) != sl.ERROR_CODE.SUCCESS:
+            raise RuntimeError("Failed to open ZED camera")
+        tracking_params = sl.PositionalTrackingParameters()
+        tracking_params.set_as_static = True
+        if self.zed.enable_positional_tracking(tracking_params) != sl.ERROR_CODE.SUCCESS:
+            raise RuntimeError("Failed to enable positional tracking")
+        self.set_runtime_params(settings.get("runtime", {}))
+        configuration = self.zed.get_camera_information().camera_configuration
+        self.image_size = configuration.resolution
+        self.frame_set = FrameSet(self.image_size)
+        display_size = sl.Resolution(self.image_size.width // 2, self.image_size.height // 2)
+        self.display_sources = DisplaySources(self.zed, display_size)
+        video_settings = {}
+        for name in settings.get("video_settings", []):
+            status, value = self.zed.get_camera_settings(getattr(sl.VIDEO_SETTINGS, name))
+            video_settings[name] = value
+        return {"width": self.image_size.width, "height": self.image_size.height, "fps": configuration.fps,
+                "display_width": display_size.width, "display_height": display_size.height,
+                "video_settings": video_settings}
+
+    def grab(self) -> bool:
+        if self.zed.grab(self.runtime_params) != sl.ERROR_CODE.SUCCESS:
+            return False
+        self.timestamp = self.zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds()
+        return True
+
+    def retrieve(self, arrays: Dict[str, np.ndarray], display_size: Tuple[int, int], confidence: bool):
+        """
+        Retrieves the last grab and copies it into the arrays of a ring slot.
+        """
+        self.frame_set.retrieve(self.zed, self.image_size, confidence=confidence)
+        names = list(FrameSet.ARRAYS) if confidence else [name for name in FrameSet.ARRAYS if name != "confidence"]
+        for name, array in self.frame_set.get_arrays(names).items():
+            np.copyto(arrays[name], array)
+        if (self.display_sources.display_size.width, self.display_sources.display_size.height) != display_size:
+            self.display_sources.resize(sl.Resolution(*display_size))
+        products = self.display_sources.get(DISPLAY_ARRAYS, self.timestamp)
+        for name, product in products.items():
+            np.copyto(arrays[DISPLAY_ARRAYS[name]], product)
+
+    def set_video_settings(self, settings: Dict[str, float]):
+        """
+        Applies video settings by sl.VIDEO_SETTINGS name.
+        """
+        for name, value in settings.items():
+            if self.zed.set_camera_settings(getattr(sl.VIDEO_SETTINGS, name), value) != sl.ERROR_CODE.SUCCESS:
+                print(f"Failed to update {name} to {value}")
+
+    def set_runtime_params(self, params: dict):
+        """
+        Applies runtime parameters by name.
+        """
+        for name, value in params.items():
+            setattr(self.runtime_params, name, value)
+
+    def close(self):
+        self.zed.close()
@@ -0,0 +1,25 @@
+import sys
+import types
+from pathlib import Path
+
+# The GUI modules import each other by module name, as when running GUI/ZEDCameraApp.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "GUI"))
+
+try:
+    import pyzed.sl
+except ImportError:
+    # Without the ZED SDK, the GUI modules import a stand-in whose attributes are placeholders:
+    # enough for the annotations and enums referenced at import, as the tests use no camera.
+    class _Placeholder:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __getattr__(self, name):
+            return _Placeholder()
+
+    sl = types.ModuleType("pyzed.sl")
+    sl.__getattr__ = lambda name: _Placeholder
+    pyzed = types.ModuleType("pyzed")
+    pyzed.sl = sl
+    sys.modules["pyzed"] = pyzed
+    sys.modules["pyzed.sl"] = sl
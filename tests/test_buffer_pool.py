@@ -0,0 +1,84 @@
+import tracemalloc
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from Display import create_display_processors
+from Utils import BufferPool
+
+WIDTH, HEIGHT = 640, 360
+WARM_UP_FRAMES = 3
+FRAMES = 20
+# NumPy's ufunc buffers (8192 elements) and small Python objects are fine; the smallest
+# image-sized array (one uint8 channel) is 225 KiB
+MAX_PEAK_BYTES = 64 * 1024
+MAX_BYTES_PER_FRAME = 1024
+
+
+def make_sources() -> dict:
+    """
+    Returns synthetic display products: BGRA images and an XYZ point cloud of a tilted plane with holes.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:HEIGHT, 0:WIDTH].astype(np.float32)
+    z = 1000 + 0.5 * x + 0.25 * y
+    cloud = np.dstack([x - WIDTH / 2, y - HEIGHT / 2, z, np.ones_like(z)]).astype(np.float32)
+    cloud[rng.random((HEIGHT, WIDTH)) < 0.05] = np.nan
+    return {
+        "image": rng.integers(0, 256, (HEIGHT, WIDTH, 4), dtype=np.uint8),
+        "depth_image": rng.integers(0, 256, (HEIGHT, WIDTH, 4), dtype=np.uint8),
+        "display_cloud": cloud,
+    }
+
+
+def show_frame(frame: np.ndarray, colormap: bool, pool: BufferPool):
+    """
+    The array work of ZEDCameraApp.show_frame and cv_to_qt, without the Qt widgets.
+    """
+    shape = frame.shape[:2]
+    if colormap:
+        gray = frame if frame.ndim == 2 else cv2.extractChannel(frame, 0, dst=pool.get("colormap_gray", shape))
+        frame = cv2.applyColorMap(gray, cv2.COLORMAP_JET, dst=pool.get("colormap", shape + (3,)))
+    if frame.ndim == 2:
+        conversion = cv2.COLOR_GRAY2RGBA
+    elif frame.shape[2] == 4:
+        conversion = cv2.COLOR_BGRA2RGBA
+    else:
+        conversion = cv2.COLOR_BGR2RGBA
+    cv2.cvtColor(frame, conversion, dst=pool.get("qt_rgba", shape + (4,)))
+
+
+@pytest.mark.parametrize("display_format", ["RGB", "Depth Color", "Sobel", "Normals"])
+def test_preview_does_not_allocate_per_frame_after_warm_up(display_format):
+    processor = create_display_processors()[display_format]
+    pool = BufferPool()
+    sources = make_sources()
+    params = {"sobel_power": "1.5"}
+
+    def refresh_display(timestamp: int):
+        # As ZEDCameraApp.refresh_display; a new timestamp recomputes the output every frame
+        frame = processor.output(timestamp, lambda names: {name: sources[name] for name in names}, params, pool)
+        show_frame(frame, processor.colormap, pool)
+
+    for timestamp in range(WARM_UP_FRAMES):
+        refresh_display(timestamp)
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for timestamp in range(WARM_UP_FRAMES, WARM_UP_FRAMES + FRAMES):
+            refresh_display(timestamp)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak - baseline < MAX_PEAK_BYTES, f"{display_format} allocated a temporary of {peak - baseline} bytes"
+    assert (current - baseline) / FRAMES < MAX_BYTES_PER_FRAME
+
+
+def test_buffer_pool_reuses_buffers_until_the_shape_changes():
+    pool = BufferPool()
+    buffer = pool.get("a", (4, 4), np.float32)
+    assert pool.get("a", (4, 4), np.float32) is buffer
+    assert pool.get("a", (4, 5), np.float32) is not buffer
+    assert pool.get("a", (4, 5), np.uint8).dtype == np.uint8
@@ -0,0 +1,25 @@
+from DiskMonitor import PROBE_NAME, DiskMonitor
+
+
+def test_probe_measures_a_synced_write(tmp_path):
+    monitor = DiskMonitor()
+    bandwidth = monitor.probe(tmp_path)
+    assert bandwidth is not None and bandwidth > 0
+    assert not (tmp_path / PROBE_NAME).exists()
+    assert monitor.status(tmp_path, 1024).bandwidth == bandwidth
+
+
+def test_probe_waits_for_the_interval(tmp_path):
+    monitor = DiskMonitor(probe_interval=3600)
+    assert monitor.probe(tmp_path) is not None
+    assert monitor.probe(tmp_path) is None
+    assert monitor.probe(tmp_path, force=True) is not None
+
+
+def test_saves_do_not_set_the_bandwidth(tmp_path):
+    monitor = DiskMonitor()
+    monitor.record_save(10 ** 6)
+    monitor.record_save(10 ** 6)
+    status = monitor.status(tmp_path, 2 * 10 ** 6)
+    assert status.bandwidth is None
+    assert status.seconds_to_full is not None
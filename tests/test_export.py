@@ -0,0 +1,81 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from Export import PCD_DTYPE, PLY_DTYPE, export_point_cloud, voxel_downsample
+
+
+def make_cloud(rows: int=40, cols: int=30, spacing: float=1.0) -> np.ndarray:
+    """
+    Returns an XYZRGBA point cloud on a grid, with a hole and a distinct color per point.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:rows, 0:cols].astype(np.float32) * spacing
+    z = np.full_like(x, 500.0)
+    z[5:10, 5:10] = np.nan
+    colors = rng.integers(0, 256, (rows, cols, 4), dtype=np.uint8)
+    colors[:, :, 3] = 255
+    return np.dstack([x, y, z, colors.view(np.float32)[:, :, 0]])
+
+
+def read_records(path, dtype: np.dtype) -> np.ndarray:
+    """
+    Reads the binary records after a PLY or PCD header, checking the point count in the header.
+    """
+    data = path.read_bytes()
+    marker = b"end_header\n" if path.suffix == ".ply" else b"DATA binary\n"
+    header, body = data.split(marker, 1)
+    records = np.frombuffer(body, dtype=dtype)
+    count_field = b"element vertex " if path.suffix == ".ply" else b"POINTS "
+    count = int(header.split(count_field, 1)[1].split(b"\n", 1)[0])
+    assert count == len(records)
+    return records
+
+
+def brute_force_downsample(cloud: np.ndarray, voxel_size: float) -> dict:
+    """
+    Returns the centroid of the points of each voxel, by voxel index.
+    """
+    points = cloud.reshape(-1, 4)
+    points = points[np.isfinite(points[:, 2]), :3].astype(np.float64)
+    voxels = {}
+    for point in points:
+        voxels.setdefault(tuple(np.floor(point / voxel_size).astype(np.int64)), []).append(point)
+    return {key: np.mean(members, axis=0) for key, members in voxels.items()}
+
+
+@pytest.mark.parametrize("suffix, dtype", [(".ply", PLY_DTYPE), (".pcd", PCD_DTYPE)])
+def test_export_round_trip(tmp_path, suffix, dtype):
+    cloud = make_cloud()
+    path = tmp_path / f"cloud{suffix}"
+    count = export_point_cloud(cloud, path, chunk_rows=7)
+    records = read_records(path, dtype)
+    flat = cloud.reshape(-1, 4)
+    valid = flat[np.isfinite(flat[:, 2])]
+    colors = valid[:, 3].copy().view(np.uint8).reshape(-1, 4)
+    assert count == len(valid)
+    assert np.array_equal(np.stack([records["x"], records["y"], records["z"]], axis=1), valid[:, :3])
+    if suffix == ".pcd":
+        rgb = records["rgb"]
+        assert np.array_equal(np.stack([rgb >> 16, (rgb >> 8) & 255, rgb & 255], axis=1), colors[:, :3])
+    else:
+        assert np.array_equal(np.stack([records["red"], records["green"], records["blue"]], axis=1), colors[:, :3])
+
+
+@pytest.mark.parametrize("spacing, voxel_size", [(1.0, 4.0), (1.0, 2.5), (1e5, 0.01)])
+def test_voxel_downsample_matches_brute_force(spacing, voxel_size):
+    # The last case spans far more than 2^21 voxels per axis, beyond the packed keys
+    cloud = make_cloud(spacing=spacing)
+    points, colors = voxel_downsample(cloud, voxel_size, chunk_rows=7)
+    expected = brute_force_downsample(cloud, voxel_size)
+    assert len(points) == len(expected) == len(colors)
+    centroids = np.array([expected[key] for key in sorted(expected)], dtype=np.float32)
+    assert np.allclose(points, centroids, rtol=1e-6)
+
+
+def test_voxel_downsample_rejects_unusable_voxel_sizes():
+    cloud = make_cloud(spacing=1e5)
+    with pytest.raises(ValueError):
+        voxel_downsample(cloud, 0.0)
+    with pytest.raises(ValueError):
+        voxel_downsample(cloud, 1e-12)
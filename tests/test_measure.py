@@ -0,0 +1,90 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("PySide6")
+
+from Measure import MeasurementController
+from SharedFrames import FrameTimestamp
+
+
+class FakeMat:
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+    def get_data(self, deep_copy: bool=False) -> np.ndarray:
+        return self.data.copy() if deep_copy else self.data
+
+
+class FakeFrameSet:
+    def __init__(self, timestamp: int, z: float):
+        cloud = np.zeros((4, 4, 4), dtype=np.float32)
+        cloud[:, :, 2] = z
+        self.timestamp = FrameTimestamp(timestamp)
+        self.point_cloud_zed = FakeMat(cloud)
+        self.claims = 0
+
+
+class FakePool:
+    """
+    Publishes frame sets like FramePool, with a uniform depth per frame.
+    """
+    def __init__(self):
+        self.latest = None
+
+    def publish(self, timestamp: int, z: float):
+        self.latest = FakeFrameSet(timestamp, z)
+
+    def claim_latest(self):
+        if self.latest is not None:
+            self.latest.claims += 1
+        return self.latest
+
+    def release(self, frame_set):
+        frame_set.claims -= 1
+
+
+def make_controller(mode: str):
+    pool = FakePool()
+    pool.publish(1, 1000.0)
+    controller = MeasurementController(pool, lambda position: position)
+    messages = []
+    controller.measurement_changed.connect(messages.append)
+    controller.set_mode(mode)
+    return pool, controller, messages
+
+
+def test_point_mode_reads_the_latest_point_cloud():
+    pool, controller, messages = make_controller("Point")
+    first = pool.latest
+    controller._hover((0.5, 0.5))
+    assert "Z: 1000.0" in messages[-1]
+    pool.publish(2, 2000.0)
+    controller._hover((0.5, 0.5))
+    assert "Z: 2000.0" in messages[-1]
+    # The previous frame set is no longer pinned
+    assert first.claims == 0
+    assert pool.latest.claims == 1
+
+
+def test_measurement_in_progress_keeps_its_point_cloud():
+    pool, controller, messages = make_controller("Distance")
+    controller._click((0.25, 0.25))
+    first = controller.frame_set
+    pool.publish(2, 2000.0)
+    controller._hover((0.75, 0.75))
+    assert controller.frame_set is first
+    assert "Z: 1000.0" in messages[-1]
+    controller._click((0.75, 0.75))
+    # Once finished, hovering moves to the latest point cloud
+    pool.publish(3, 3000.0)
+    controller._hover((0.5, 0.5))
+    assert "Z: 3000.0" in messages[-1]
+    assert first.claims == 0
+
+
+def test_off_releases_the_claim():
+    pool, controller, _ = make_controller("Point")
+    controller._hover((0.5, 0.5))
+    controller.set_mode("Off")
+    assert pool.latest.claims == 0
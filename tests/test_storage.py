@@ -0,0 +1,49 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from Storage import arrays_identical, load_compact_array, load_sparse_array, save_compact_array, save_sparse_array
+
+
+def make_cloud() -> np.ndarray:
+    """
+    Returns an XYZRGBA point cloud with NaN, +inf and -inf depths and a packed color on every pixel.
+    """
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:48, 0:64].astype(np.float32)
+    z = 1000 + x + y
+    codes = rng.random(z.shape)
+    z[codes < 0.1] = np.nan
+    z[(codes >= 0.1) & (codes < 0.15)] = np.inf
+    z[(codes >= 0.15) & (codes < 0.2)] = -np.inf
+    color = rng.integers(0, 2 ** 24, z.shape, dtype=np.uint32).view(np.float32)
+    cloud = np.dstack([x, y, z, color])
+    cloud[~np.isfinite(z), :2] = np.nan
+    return cloud
+
+
+@pytest.mark.parametrize("channel", [None, slice(None)])
+def test_sparse_round_trip_is_exact(tmp_path, channel):
+    cloud = make_cloud()
+    array = cloud[:, :, 2].copy() if channel is None else cloud
+    path = tmp_path / "array.sparse.npz"
+    save_sparse_array(path, array, np.isfinite(cloud[:, :, 2]))
+    assert arrays_identical(load_sparse_array(path), array)
+
+
+def test_sparse_files_without_invalid_pixels_load_as_nan(tmp_path):
+    depth = make_cloud()[:, :, 2].copy()
+    valid = np.isfinite(depth)
+    path = tmp_path / "depth.sparse.npz"
+    with open(path, "wb") as file:
+        np.savez_compressed(file, mask=np.packbits(valid), values=depth[valid], shape=np.array(depth.shape))
+    loaded = load_sparse_array(path)
+    assert np.array_equal(loaded[valid], depth[valid])
+    assert np.isnan(loaded[~valid]).all()
+
+
+def test_compact_round_trip_is_exact(tmp_path):
+    cloud = make_cloud()
+    path = tmp_path / "cloud.npz"
+    save_compact_array(path, cloud)
+    assert arrays_identical(load_compact_array(path), cloud)
@@ -0,0 +1,86 @@
+import http.client
+import threading
+import time
+import urllib.error
+import urllib.request
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from Stream import PreviewStreamer
+
+
+def read_part(response: http.client.HTTPResponse) -> bytes:
+    """
+    Reads the JPEG of the next part of a multipart MJPEG response.
+    """
+    while response.readline().strip() != b"--frame":
+        pass
+    headers = {}
+    while True:
+        line = response.readline().strip()
+        if not line:
+            break
+        key, value = line.decode().split(":", 1)
+        headers[key.lower()] = value.strip()
+    assert headers["content-type"] == "image/jpeg"
+    return response.read(int(headers["content-length"]))
+
+
+def decode(jpeg: bytes) -> np.ndarray:
+    return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+@pytest.fixture
+def streamer():
+    streamer = PreviewStreamer(host="127.0.0.1", port=0, width=320)
+    streamer.start()
+    yield streamer
+    streamer.stop()
+
+
+def test_stream_and_snapshot_over_loopback(streamer):
+    host, port = streamer.address
+    frame = np.zeros((360, 640, 4), dtype=np.uint8)
+    frame[:, :, 2] = np.linspace(0, 255, 640, dtype=np.uint8)
+    frame[:, :, 3] = 255
+
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    connection.request("GET", "/stream.mjpg")
+    response = connection.getresponse()
+    assert response.status == 200
+    assert response.getheader("Content-Type").startswith("multipart/x-mixed-replace")
+
+    # Frames are only encoded while someone is watching, as the frame loop would offer them
+    stop = threading.Event()
+
+    def feed():
+        while not stop.is_set():
+            streamer.publish(frame)
+            time.sleep(0.01)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        for _ in range(3):
+            image = decode(read_part(response))
+            assert image.shape == (180, 320, 3)
+            # The red gradient survives encoding: dark on the left, bright on the right
+            assert image[90, 5, 2] < 40 and image[90, 315, 2] > 215
+        assert streamer.clients == 1
+
+        with urllib.request.urlopen(f"http://{host}:{port}/snapshot.jpg", timeout=5) as snapshot:
+            assert snapshot.headers["Content-Type"] == "image/jpeg"
+            assert decode(snapshot.read()).shape == (180, 320, 3)
+    finally:
+        stop.set()
+        feeder.join()
+        connection.close()
+
+
+def test_snapshot_before_the_first_frame(streamer):
+    host, port = streamer.address
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"http://{host}:{port}/snapshot.jpg", timeout=5)
+    assert error.value.code == 503
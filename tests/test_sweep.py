@@ -0,0 +1,57 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from Sweep import ParameterSweep, SettleDetector, expand_grid
+
+
+def frame(level: int) -> np.ndarray:
+    """
+    Returns a uniform BGRA frame, standing in for the image at some exposure.
+    """
+    image = np.full((72, 128, 4), level, dtype=np.uint8)
+    image[::2, ::2, :3] = min(level + 40, 255)
+    return image
+
+
+def test_not_settled_before_the_change_reaches_the_image():
+    detector = SettleDetector(min_frames=2, max_frames=30, window=3)
+    for _ in range(3):
+        detector.update(frame(100))
+    detector.reset()
+    # The new settings take four frames to reach the image
+    assert not any(detector.update(frame(100)) for _ in range(4))
+    results = [detector.update(frame(160)) for _ in range(3)]
+    assert results == [False, False, True]
+    assert detector.changed and detector.converged
+
+
+def test_waits_max_frames_if_the_image_never_changes():
+    detector = SettleDetector(max_frames=10)
+    detector.update(frame(100))
+    detector.reset()
+    results = [detector.update(frame(100)) for _ in range(10)]
+    assert results == [False] * 9 + [True]
+    assert not detector.changed and not detector.converged
+
+
+def test_baseline_is_kept_across_steps_without_frames():
+    detector = SettleDetector(max_frames=30)
+    detector.update(frame(100))
+    detector.reset()
+    # A step that needed no settling, then one whose change shows in the first frame
+    detector.reset()
+    assert [detector.update(frame(160)) for _ in range(3)] == [False, False, True]
+    assert detector.changed and detector.converged
+
+
+def test_sweep_captures_instant_steps_without_waiting():
+    steps = expand_grid({"Exposure": [30], "confidence_threshold": [50, 80]})
+    sweep = ParameterSweep(steps, SettleDetector(max_frames=5))
+    sweep.advance()
+    assert not sweep.update(frame(100))
+    sweep.advance()
+    assert sweep.changed == ["confidence_threshold"]
+    assert sweep.update(frame(100))
+    assert sweep.describe()["settled"]